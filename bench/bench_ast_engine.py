@@ -0,0 +1,144 @@
+"""
+Python AST 引擎基准：旧版递归 NodeVisitor 与单次显式栈遍历的耗时对比
+
+Usage:
+    python -m bench.bench_ast_engine [directory] [--repeat N]
+
+默认扫描标准库目录（不含 site-packages 和测试目录）。分别计时：
+- 遍历：同一批语法树上，旧版 ComplexityVisitor 与 run_ast_engine（后者另外收集函数级指标和代码异味）
+- 解析：ast.parse 与 compile(PyCF_ONLY_AST, dont_inherit=True)
+- 重复分析：analyze_python_source 第二次命中内容哈希缓存
+并检查两种遍历的文件级结果（复杂度、import、docstring）一致。
+"""
+import gc
+import os
+import ast
+import sys
+import time
+
+from src.analyzers.python_ast import run_ast_engine, parse_python_source, analyze_python_source
+
+
+SKIP_DIRS = {'site-packages', 'test', 'tests', '__pycache__'}
+
+
+class ComplexityVisitor(ast.NodeVisitor):
+    """旧版实现（逐类型 visit_* 方法 + generic_visit 递归），仅统计文件级指标"""
+
+    def __init__(self):
+        self.complexity = 1
+        self.imports = 0
+        self.docstrings = 0
+
+    def _branch(self, node):
+        self.complexity += 1
+        self.generic_visit(node)
+
+    visit_If = visit_For = visit_AsyncFor = visit_While = visit_IfExp = _branch
+
+    def visit_Try(self, node):
+        self.complexity += len(node.handlers)
+        self.generic_visit(node)
+
+    def _documented(self, node):
+        if ast.get_docstring(node):
+            self.docstrings += 1
+        self.generic_visit(node)
+
+    visit_FunctionDef = visit_AsyncFunctionDef = visit_ClassDef = _documented
+
+    def _import(self, node):
+        self.imports += len(node.names)
+        self.generic_visit(node)
+
+    visit_Import = visit_ImportFrom = _import
+
+    def visit_BoolOp(self, node):
+        self.complexity += len(node.values) - 1
+        self.generic_visit(node)
+
+    def visit_Match(self, node):
+        case_count = len(node.cases)
+        self.complexity += 1 if case_count <= 3 else case_count * 0.5
+        self.generic_visit(node)
+
+    def _comprehension(self, node):
+        for generator in node.generators:
+            self.complexity += 1 + len(generator.ifs)
+        self.generic_visit(node)
+
+    visit_ListComp = visit_SetComp = visit_DictComp = visit_GeneratorExp = _comprehension
+
+
+def old_walk(tree):
+    visitor = ComplexityVisitor()
+    if ast.get_docstring(tree):
+        visitor.docstrings += 1
+    visitor.visit(tree)
+    return int(visitor.complexity + 0.5), visitor.imports, visitor.docstrings
+
+
+def load_sources(root):
+    sources = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        for filename in sorted(filenames):
+            if filename.endswith('.py'):
+                try:
+                    with open(os.path.join(dirpath, filename), encoding='utf-8') as f:
+                        content = f.read()
+                    ast.parse(content)
+                except (OSError, UnicodeDecodeError, SyntaxError, ValueError):
+                    continue
+                sources.append(content)
+    return sources
+
+
+def best_of(repeat, fn):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    args = sys.argv[1:]
+    repeat = 3
+    if '--repeat' in args:
+        idx = args.index('--repeat')
+        repeat = int(args[idx + 1])
+        del args[idx:idx + 2]
+    root = args[0] if args else os.path.dirname(ast.__file__)
+
+    sources = load_sources(root)
+    trees = [parse_python_source(content) for content in sources]
+    # 常驻的语法树移出分代回收，否则循环垃圾回收反复扫描全部节点，计时被回收开销淹没
+    gc.freeze()
+    print(f"{len(sources)} files, {sum(s.count(chr(10)) for s in sources)} lines ({root})")
+
+    mismatches = sum(1 for tree in trees
+                     if old_walk(tree) != tuple(run_ast_engine(tree)[k] for k in ('complexity', 'imports', 'docstrings')))
+    old = best_of(repeat, lambda: [old_walk(tree) for tree in trees])
+    new = best_of(repeat, lambda: [run_ast_engine(tree) for tree in trees])
+    print(f"traversal  NodeVisitor {old:.2f}s  run_ast_engine {new:.2f}s  speedup {old / new:.2f}x  "
+          f"mismatches {mismatches}")
+
+    old = best_of(repeat, lambda: all(ast.parse(content) for content in sources))
+    new = best_of(repeat, lambda: all(parse_python_source(content) for content in sources))
+    print(f"parse      ast.parse {old:.2f}s  compile flags {new:.2f}s  speedup {old / new:.2f}x")
+
+    start = time.perf_counter()
+    for content in sources:
+        analyze_python_source(content, reuse_tree=True)
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    for content in sources:
+        analyze_python_source(content, reuse_tree=True)
+    cached = time.perf_counter() - start
+    print(f"analyze    first pass {first:.2f}s  repeated content {cached:.3f}s")
+
+
+if __name__ == '__main__':
+    main()
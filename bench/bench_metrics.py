@@ -0,0 +1,99 @@
+"""
+指标插件基准：不同指标组合下逐文件分析的耗时，以及每个订阅者的派发开销
+
+Usage:
+    python -m bench.bench_metrics [directory] [--limit N] [--repeat N]
+
+默认取标准库目录中的前 --limit 个源文件，文件内容预先读入内存，只计 analyze_file。
+先完整分析一遍预热（Python 文件的 AST 结果按内容哈希缓存，之后各组合只差在逐行扫描上）。
+除内置指标外，另注册若干空指标（只订阅行事件 / 只订阅词法事件、不做任何计算），
+用来单独衡量事件派发和词法切分本身的开销。
+"""
+import os
+import ast
+import sys
+import time
+
+from src.analyzers.file_analyzer import analyze_file, iter_source_files
+from src.analyzers.file_budget import resolve_file_budget
+from src.analyzers.metrics import Metric, register_metric
+
+
+NULL_METRICS = 8
+
+
+def _null_metric(name, events):
+    class NullMetric(Metric):
+        __slots__ = ()
+    NullMetric.name = name
+    NullMetric.events = events
+    return register_metric(NullMetric)
+
+
+NULL_LINE = [_null_metric(f'null_line_{i}', ('line',)).name for i in range(NULL_METRICS)]
+NULL_TOKEN = [_null_metric(f'null_token_{i}', ('token',)).name for i in range(NULL_METRICS)]
+
+CONFIGURATIONS = (
+    ('none', []),
+    ('halstead', ['halstead']),
+    ('cognitive', ['cognitive']),
+    ('all built-in', ['halstead', 'cognitive', 'mi']),
+    ('1 null line', NULL_LINE[:1]),
+    (f'{NULL_METRICS} null line', NULL_LINE),
+    ('1 null token', NULL_TOKEN[:1]),
+    (f'{NULL_METRICS} null token', NULL_TOKEN),
+)
+
+
+def load_files(root, limit):
+    files = []
+    for file_path, lang_info in iter_source_files(root):
+        if 'site-packages' in file_path:
+            continue
+        try:
+            with open(file_path, 'rb') as f:
+                files.append((file_path, lang_info, f.read()))
+        except OSError:
+            continue
+        if len(files) >= limit:
+            break
+    return files
+
+
+def run(files, budget, metric_names, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for file_path, lang_info, data in files:
+            analyze_file(file_path, lang_info, data, budget, metric_names)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    args = sys.argv[1:]
+    options = {'--limit': 400, '--repeat': 3}
+    for name in options:
+        if name in args:
+            idx = args.index(name)
+            options[name] = int(args[idx + 1])
+            del args[idx:idx + 2]
+    root = args[0] if args else os.path.dirname(ast.__file__)
+
+    files = load_files(root, options['--limit'])
+    # 不限制单文件预算，各组合都走完整层级
+    budget = resolve_file_budget(1 << 40, 1 << 40, 0)
+    lines = sum(data.count(b'\n') for _, _, data in files)
+    print(f"{len(files)} files, {lines} lines ({root})")
+    run(files, budget, [], 1)
+
+    baseline = None
+    for label, metric_names in CONFIGURATIONS:
+        elapsed = run(files, budget, metric_names, options['--repeat'])
+        baseline = elapsed if baseline is None else baseline
+        overhead = (elapsed - baseline) / baseline * 100
+        print(f"{label:<16} {elapsed:.3f}s  {overhead:+6.1f}%  {lines / elapsed / 1000:.0f}k lines/s")
+
+
+if __name__ == '__main__':
+    main()
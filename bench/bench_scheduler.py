@@ -0,0 +1,67 @@
+"""
+并行调度基准：模拟不同分发策略下的完成时间（makespan）
+
+Usage:
+    python -m bench.bench_scheduler [--files N] [--jobs N] [--seed N]
+
+文件耗时取帕累托分布（少数生成文件、打包产物远大于其余文件），按遍历顺序随机排列。
+空闲进程按提交顺序领取下一批，每批另有固定的进程间通信开销。对比：
+- walk-order：遍历顺序，固定批大小（Pool.map 默认的 len / (4 × 进程数)）
+- largest-first：从大到小逐个分发（每个文件一批）
+- guided：plan_chunks（从大到小，批大小随剩余工作量递减）
+输出各策略的完成时间相对理论下界 max(总耗时 / 进程数, 最大单文件) 的倍数和批次数。
+"""
+import sys
+import heapq
+import random
+
+from src.analyzers.scheduler import plan_chunks
+
+
+# 每批的进程间通信开销（与单个文件平均耗时同一量级）
+CHUNK_OVERHEAD = 1.0
+
+
+def makespan(chunks, costs, jobs):
+    """按顺序把批次交给最早空闲的进程，返回全部完成的时间"""
+    workers = [0.0] * jobs
+    for chunk in chunks:
+        start = heapq.heappop(workers)
+        heapq.heappush(workers, start + CHUNK_OVERHEAD + sum(costs[i] for i in chunk))
+    return max(workers)
+
+
+def walk_order(costs, jobs):
+    size = max(1, -(-len(costs) // (4 * jobs)))
+    return [list(range(i, min(i + size, len(costs)))) for i in range(0, len(costs), size)]
+
+
+def largest_first(costs, jobs):
+    return [[i] for i in sorted(range(len(costs)), key=lambda i: costs[i], reverse=True)]
+
+
+STRATEGIES = (('walk-order', walk_order), ('largest-first', largest_first), ('guided', plan_chunks))
+
+
+def main():
+    args = sys.argv[1:]
+    options = {'--files': 20000, '--jobs': 8, '--seed': 1}
+    for name in options:
+        if name in args:
+            idx = args.index(name)
+            options[name] = int(args[idx + 1])
+            del args[idx:idx + 2]
+    rng = random.Random(options['--seed'])
+    jobs = options['--jobs']
+    costs = [rng.paretovariate(1.2) for _ in range(options['--files'])]
+    bound = max(sum(costs) / jobs, max(costs))
+    print(f"{len(costs)} files, {jobs} jobs, total {sum(costs):.0f}, largest {max(costs):.0f}, "
+          f"lower bound {bound:.0f}")
+    for name, strategy in STRATEGIES:
+        chunks = strategy(costs, jobs)
+        span = makespan(chunks, costs, jobs)
+        print(f"{name:<14} makespan {span:>10.0f}  x{span / bound:.3f}  chunks {len(chunks)}")
+
+
+if __name__ == '__main__':
+    main()
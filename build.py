@@ -15,10 +15,30 @@ MODULE_ORDER = [
     'src/config/colors.py',
     'src/config/i18n.py',
     'src/config/constants.py',
+    'src/reporters/table_render.py',
     'src/analyzers/python_ast.py',
+    'src/analyzers/file_budget.py',
+    'src/analyzers/result_cache.py',
+    'src/analyzers/parser_backend.py',
+    'src/analyzers/metrics.py',
+    'src/analyzers/smell_rules.py',
+    'src/analyzers/byte_prefilter.py',
     'src/analyzers/file_analyzer.py',
+    'src/analyzers/prefetch_io.py',
+    'src/analyzers/scheduler.py',
+    'src/analyzers/input_sources.py',
+    'src/analyzers/sampling.py',
+    'src/analyzers/dependency_graph.py',
+    'src/analyzers/session.py',
+    'src/analyzers/sharding.py',
+    'src/analyzers/churn.py',
+    'src/analyzers/interval_index.py',
     'src/analyzers/refactor_advisor.py',
+    'src/analyzers/clone_detector.py',
+    'src/analyzers/async_api.py',
+    'src/reporters/sqlite_export.py',
     'src/reporters/exporter.py',
+    'src/analyzers/batch_scan.py',
     'src/__main__.py',
 ]
 
@@ -26,11 +46,29 @@ MODULE_ORDER = [
 STDLIB_IMPORTS = """import os
 import re
 import sys
+import time
+import math
+import random
 import ast
+import io
 import csv
+import json
 import locale
+import tarfile
+import zipfile
+import subprocess
+import threading
+import heapq
+import hashlib
+import importlib
 import unicodedata
-from collections import defaultdict
+import asyncio
+import sqlite3
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import accumulate
 """
 
 # 匹配 src 内部 import 的模式（包括多行 from ... import (...)）
@@ -42,7 +80,11 @@ INTERNAL_IMPORT_PATTERN = re.compile(
 )
 
 # 匹配标准库 import
-STDLIB_PATTERN = re.compile(r'^(import (os|re|sys|ast|csv|locale|unicodedata)|from collections import).*$', re.MULTILINE)
+STDLIB_PATTERN = re.compile(
+    r'^(import (io|os|re|sys|time|math|random|ast|csv|json|locale|tarfile|zipfile|subprocess|heapq|hashlib|importlib|unicodedata|asyncio|sqlite3)'
+    r'|from (collections|array|bisect|itertools|concurrent\.futures) import).*$',
+    re.MULTILINE
+)
 
 
 def read_module(filepath):
@@ -9,4 +9,19 @@ Usage:
     python -m src <directory>           # 开发模式
     python TypeLineas.py <directory>    # 单文件模式
     python TypeLineas.py . --report     # 生成报告
+
+在 Python 中直接调用：
+    from src import Analyzer
+    result = Analyzer().scan_tree('/path/to/project')
+
+asyncio 应用中：
+    from src import analyze_many
+    results = await analyze_many(paths, timeout=5)
+
+自定义异味规则（随 --advice 输出）：
+    from src import register_smell_rule
+    register_smell_rule('legacy_log', r'logging[.]warn[(]', literals=['logging.warn'], languages=['Python'])
 """
+from src.analyzers.session import Analyzer
+from src.analyzers.async_api import analyze_many, iter_analyze, analyze_path_async, advise_async
+from src.analyzers.smell_rules import register_smell_rule, load_smell_rules
@@ -4,48 +4,43 @@ TypeLineas 主程序入口
 命令行参数解析和分析流程控制。
 
 Usage:
-    python -m src <directory> [--all] [--report [filename]] [--advice]
+    python -m src <directory | archive> [--all] [--report [filename]] [--advice] [--clones] [--jobs N]
+                    [--max-bytes N] [--max-lines N] [--max-ms N] [--sample [fraction]]
+                    [--io-threads N] [--git-rev REV] [--metrics [name,...]] [--rules FILE] [--churn [days]]
+    python -m src --batch <manifest> [--report-dir DIR] [--jobs N] [--advice]
+    python -m src <directory> --shard i/N [--partial FILE]
+    python -m src merge <partial files...> [--root DIR] [--report [filename]] [--advice] [--clones] [--all]
 """
 import os
 import sys
-import unicodedata
 from collections import defaultdict
 
 from src.config.colors import Colors
 from src.config.i18n import t
-from src.config.constants import LANG_DEFINITIONS, DEFAULT_IGNORES
-from src.analyzers.file_analyzer import analyze_file
-from src.analyzers.refactor_advisor import print_refactor_advice
+from src.config.constants import LANG_DEFINITIONS
+from src.analyzers.sampling import collect_candidates, estimate_project, print_sample_estimate
+from src.analyzers.refactor_advisor import print_refactor_advice, diagnose_file, needs_advice
+from src.analyzers.clone_detector import detect_clones, print_clone_report
+from src.analyzers.file_budget import ANALYSIS_TIERS, set_file_budget
+from src.analyzers.batch_scan import read_manifest, run_batch
+from src.analyzers.prefetch_io import PREFETCH_THREADS
+from src.analyzers.scheduler import default_jobs
+from src.analyzers.metrics import METRIC_PLUGINS, enable_metrics, active_metric_fields
+from src.analyzers.smell_rules import load_smell_rules
+from src.analyzers.churn import read_churn_index, apply_churn, print_churn_hotspots
+from src.analyzers.session import Analyzer
+from src.analyzers.input_sources import load_source_buffers
+from src.analyzers.sharding import parse_shard_spec, scan_shard, write_partial, load_partial, merge_partials
 from src.reporters.exporter import export_report
-
-
-def str_width(s):
-    """计算字符串显示宽度"""
-    width = 0
-    for char in str(s):
-        if unicodedata.east_asian_width(char) in ('F', 'W'):
-            width += 2
-        else:
-            width += 1
-    return width
-
-
-def pad_cjk(s, width, align='left'):
-    """填充字符串到指定显示宽度"""
-    s = str(s)
-    current = str_width(s)
-    padding = width - current
-    if padding <= 0:
-        return s
-    if align == 'right':
-        return ' ' * padding + s
-    return s + ' ' * padding
+from src.reporters.table_render import pad_to_width
 
 
 def main():
     raw_args = sys.argv[1:]
     show_all = False
     show_advice = False
+    show_clones = False
+    jobs = 1
     
     if "--all" in raw_args:
         show_all = True
@@ -54,6 +49,126 @@ def main():
     if "--advice" in raw_args:
         show_advice = True
         raw_args.remove("--advice")
+    
+    if "--clones" in raw_args:
+        show_clones = True
+        raw_args.remove("--clones")
+    
+    if "--jobs" in raw_args:
+        idx = raw_args.index("--jobs")
+        raw_args.pop(idx)
+        if idx < len(raw_args) and raw_args[idx].isdigit():
+            jobs = int(raw_args.pop(idx)) or default_jobs()
+        else:
+            jobs = default_jobs()
+        
+    # git 版本：--git-rev <rev>，直接读取该版本的文件树（不检出）
+    git_rev = None
+    if "--git-rev" in raw_args:
+        idx = raw_args.index("--git-rev")
+        raw_args.pop(idx)
+        if idx < len(raw_args):
+            git_rev = raw_args.pop(idx)
+    
+    # 预读线程数：--io-threads N，0 表示不预读
+    io_threads = PREFETCH_THREADS
+    if "--io-threads" in raw_args:
+        idx = raw_args.index("--io-threads")
+        raw_args.pop(idx)
+        if idx < len(raw_args) and raw_args[idx].isdigit():
+            io_threads = int(raw_args.pop(idx))
+    
+    # 变更 × 复杂度热点：--churn [天数]，不带天数时读取全部历史
+    show_churn = False
+    churn_days = None
+    if "--churn" in raw_args:
+        idx = raw_args.index("--churn")
+        raw_args.pop(idx)
+        show_churn = True
+        if idx < len(raw_args) and raw_args[idx].isdigit():
+            churn_days = int(raw_args.pop(idx))
+    
+    # 抽样比例：--sample [比例]，默认 0.1
+    sample_fraction = None
+    if "--sample" in raw_args:
+        idx = raw_args.index("--sample")
+        raw_args.pop(idx)
+        sample_fraction = 0.1
+        if idx < len(raw_args):
+            try:
+                sample_fraction = float(raw_args[idx])
+                raw_args.pop(idx)
+            except ValueError:
+                pass
+        sample_fraction = min(1.0, max(0.001, sample_fraction))
+    
+    # 扩展指标：--metrics [名称,...]，不带名称时启用全部已注册指标
+    if "--metrics" in raw_args:
+        idx = raw_args.index("--metrics")
+        raw_args.pop(idx)
+        metric_names = list(METRIC_PLUGINS)
+        if idx < len(raw_args) and all(name in METRIC_PLUGINS for name in raw_args[idx].split(',')):
+            metric_names = raw_args.pop(idx).split(',')
+        enable_metrics(metric_names)
+    
+    # 自定义异味规则：--rules <JSON 文件>
+    if "--rules" in raw_args:
+        idx = raw_args.index("--rules")
+        raw_args.pop(idx)
+        if idx < len(raw_args):
+            rules_file = raw_args.pop(idx)
+            try:
+                load_smell_rules(rules_file)
+            except (OSError, ValueError) as e:
+                print(f"{Colors.FAIL}{t('rules_invalid')}: {e}{Colors.ENDC}")
+                sys.exit(1)
+    
+    # 单文件预算：--max-bytes / --max-lines / --max-ms，0 表示不限制
+    budget = {}
+    for flag in ("--max-bytes", "--max-lines", "--max-ms"):
+        if flag in raw_args:
+            idx = raw_args.index(flag)
+            raw_args.pop(idx)
+            if idx < len(raw_args) and raw_args[idx].isdigit():
+                budget[flag[2:].replace('-', '_')] = int(raw_args.pop(idx))
+    set_file_budget(**budget)
+        
+    # 批量扫描：--batch <仓库清单> [--report-dir 目录]
+    batch_manifest = None
+    report_dir = "typelineas_reports"
+    for flag in ("--batch", "--report-dir"):
+        if flag in raw_args:
+            idx = raw_args.index(flag)
+            raw_args.pop(idx)
+            if idx < len(raw_args):
+                value = raw_args.pop(idx)
+                if flag == "--batch":
+                    batch_manifest = value
+                else:
+                    report_dir = value
+    if batch_manifest:
+        run_batch(read_manifest(batch_manifest), report_dir, jobs=jobs, include_advice=show_advice)
+        return
+    
+    # 分片扫描：--shard i/N [--partial 文件]；合并：merge <部分结果...> [--root 目录]
+    shard = None
+    partial_file = None
+    merge_root = None
+    for flag in ("--shard", "--partial", "--root"):
+        if flag in raw_args:
+            idx = raw_args.index(flag)
+            raw_args.pop(idx)
+            value = raw_args.pop(idx) if idx < len(raw_args) else None
+            if flag == "--shard":
+                # 分片参数写错时不能退化为整仓扫描（CI 矩阵中每个节点都会重复全部工作）
+                shard = parse_shard_spec(value) if value else None
+                if shard is None:
+                    print(f"{Colors.FAIL}{t('shard_invalid')}: {value or ''}{Colors.ENDC}")
+                    sys.exit(1)
+            elif flag == "--partial":
+                partial_file = value
+            else:
+                merge_root = value
         
     report_file = None
     if "--report" in raw_args:
@@ -66,7 +181,17 @@ def main():
             report_file = "AUTO"
             raw_args.pop(idx)
             
-    root_dir = raw_args[0] if raw_args else os.getcwd()
+    partials = None
+    if raw_args and raw_args[0] == "merge":
+        try:
+            partials = [load_partial(p) for p in raw_args[1:]]
+            result = merge_partials(partials, root=merge_root)
+        except (OSError, ValueError) as e:
+            print(f"{Colors.FAIL}{t('shard_incomplete')}: {e}{Colors.ENDC}")
+            sys.exit(1)
+        root_dir = result['root']
+    else:
+        root_dir = raw_args[0] if raw_args else os.getcwd()
     
     if report_file == "AUTO":
         project_name = os.path.basename(os.path.abspath(root_dir))
@@ -76,52 +201,63 @@ def main():
     print(f"{Colors.HEADER}{t('scanning')}: {root_dir}{all_mode_text}{Colors.ENDC}")
     print(f"{Colors.CYAN}{t('engine')}: Polyglot CC (AST + Regex) | {t('quality_metric')}: {t('project_coder_index')}{Colors.ENDC}")
     
-    all_file_stats = []
-    project_summary = defaultdict(lambda: {'files': 0, 'total': 0, 'code': 0, 'comments': 0, 'imports': 0, 'boilerplate': 0, 'cc': 0})
-    total_weighted_score = 0
-    total_weight = 0
+    # 抽样模式：只分析分层抽取的部分文件，外推全量统计并给出置信区间
+    if sample_fraction:
+        print_sample_estimate(estimate_project(collect_candidates(root_dir), sample_fraction))
+        return
+
+    if shard:
+        shard_index, shard_count = shard
+        try:
+            partial = scan_shard(root_dir, shard_index, shard_count, git_rev=git_rev, io_threads=io_threads)
+        except ValueError as e:
+            print(f"{Colors.FAIL}{t('input_invalid')}: {e}{Colors.ENDC}")
+            sys.exit(1)
+        partial_file = partial_file or f"typelineas_shard_{shard_index + 1}of{shard_count}.json"
+        write_partial(partial_file, partial)
+        print(f"{t('shard')} {shard_index + 1}/{shard_count}: {len(partial['files'])} / {partial['total_files']} {t('files')}")
+        print(f"{Colors.GREEN}{t('shard_written')}: {partial_file}{Colors.ENDC}")
+        return
 
-    for root, dirs, files in os.walk(root_dir):
-        dirs[:] = [d for d in dirs if d not in DEFAULT_IGNORES]
-        for file in files:
-            ext = file.split('.')[-1].lower() if '.' in file else ''
-            if ext in LANG_DEFINITIONS:
-                f_stats = analyze_file(os.path.join(root, file), LANG_DEFINITIONS[ext])
-                all_file_stats.append(f_stats)
-                l_name = f_stats['lang']
-                project_summary[l_name]['files'] += 1
-                for k in ['total', 'code', 'comments', 'boilerplate']:
-                    project_summary[l_name][k] += f_stats[k]
-                project_summary[l_name]['imports'] += f_stats['imports']
-                project_summary[l_name]['cc'] += f_stats['complexity']
-                
-                if f_stats['coder_score'] >= 0 and not f_stats['is_exempt']:
-                    weight = f_stats['code']
-                    total_weighted_score += f_stats['coder_score'] * weight
-                    total_weight += weight
+    # 目录（后台线程预读）、归档文件或 git 版本，由分析会话统一扫描；merge 时已由部分结果合并得到
+    analyzer = Analyzer(io_threads=io_threads, jobs=jobs)
+    if partials is None:
+        try:
+            result = analyzer.scan_tree(root_dir, git_rev=git_rev)
+        except ValueError as e:
+            # git 版本不存在、不在仓库中或归档损坏
+            print(f"{Colors.FAIL}{t('input_invalid')}: {e}{Colors.ENDC}")
+            sys.exit(1)
+    repo_dir = root_dir
+    root_dir = result['root']
+    all_file_stats = result['files']
+    project_summary = result['languages']
+    prefilter_counts = result['prefilter_counts']
+    tier_counts = defaultdict(int, result['tier_counts'])
+    graph_summary = result['graph']
 
     # 表格列宽定义
     col_widths = [12, 8, 10, 10, 10, 10, 8]
     print("-" * 80)
     # 表头本地化
     headers = [t('language'), t('files'), t('lines'), t('code'), t('comments'), t('coupling'), t('avg_cc')]
-    header_row = ' '.join(pad_cjk(h, w) for h, w in zip(headers, col_widths))
+    header_row = ' '.join(pad_to_width(h, w) for h, w in zip(headers, col_widths))
     print(header_row)
     print("-" * 80)
     grand_totals = {'files': 0, 'total': 0, 'code': 0, 'imports': 0, 'comments': 0, 'boilerplate': 0}
     for lang, s in sorted(project_summary.items(), key=lambda x: x[1]['code'], reverse=True):
         avg_cc = f"{s['cc'] / s['files']:.1f}" if s['files'] > 0 and s['cc'] > 0 else "-"
         row = [lang, s['files'], s['total'], s['code'], s['comments'], s['imports'], avg_cc]
-        print(f"{Colors.BOLD}{pad_cjk(row[0], col_widths[0])}{Colors.ENDC} " + ' '.join(pad_cjk(row[i], col_widths[i]) for i in range(1, len(row))))
+        print(f"{Colors.BOLD}{pad_to_width(row[0], col_widths[0])}{Colors.ENDC} " + ' '.join(pad_to_width(row[i], col_widths[i]) for i in range(1, len(row))))
         for k in grand_totals:
             grand_totals[k] += s[k]
     print("-" * 80)
     total_row = [t('total'), grand_totals['files'], grand_totals['total'], grand_totals['code'], grand_totals['comments'], grand_totals['imports'], '-']
-    print(f"{Colors.GREEN}{pad_cjk(total_row[0], col_widths[0])} " + ' '.join(pad_cjk(total_row[i], col_widths[i]) for i in range(1, len(total_row))) + f"{Colors.ENDC}")
+    print(f"{Colors.GREEN}{pad_to_width(total_row[0], col_widths[0])} " + ' '.join(pad_to_width(total_row[i], col_widths[i]) for i in range(1, len(total_row))) + f"{Colors.ENDC}")
     print("-" * 80)
     
-    if total_weight > 0:
-        project_score = int(total_weighted_score / total_weight)
+    if result['project_index'] is not None:
+        project_score = result['project_index']
         if project_score >= 90:
             verdict, v_color = t('legendary'), Colors.GREEN
         elif project_score >= 80:
@@ -134,6 +270,23 @@ def main():
             verdict, v_color = t('toxic'), Colors.FAIL
         print(f"{t('project_coder_index')}: {v_color}{project_score} / 100 ({verdict}){Colors.ENDC}")
         print(f"{t('total_lines')}: {grand_totals['total']} | {t('boilerplate')}: {(grand_totals['boilerplate']/grand_totals['total']*100):.1f}%")
+    skipped = {k: v for k, v in prefilter_counts.items() if k != 'source'}
+    if skipped:
+        print(f"{t('prefiltered_files')}: " + ' | '.join(f"{t('prefilter_' + k)} {v}" for k, v in sorted(skipped.items())))
+    degraded = [(k, tier_counts[k]) for k in ANALYSIS_TIERS[1:] if tier_counts[k]]
+    if degraded:
+        print(f"{Colors.WARNING}{t('over_budget_files')}: " + ' | '.join(f"{t('tier_' + k)} {v}" for k, v in degraded) + Colors.ENDC)
+    metric_fields = active_metric_fields()
+    if metric_fields:
+        averages = []
+        for field in metric_fields:
+            values = [s[field] for s in all_file_stats if field in s]
+            if values:
+                averages.append(f"{field} {sum(values) / len(values):.1f}")
+        print(f"{t('extra_metrics')} ({t('metric_mean')}): " + ' | '.join(averages))
+    cycle_color = Colors.WARNING if graph_summary['cycles'] else Colors.GREEN
+    print(f"{t('dependency_graph')}: {graph_summary['modules']} {t('modules')} | {graph_summary['edges']} {t('dependencies')} | "
+          f"{cycle_color}{t('import_cycles')}: {graph_summary['cycles']} ({t('largest_cycle')}: {graph_summary['largest_cycle']}){Colors.ENDC}")
     print("")
 
     print(f"{Colors.WARNING}{Colors.BOLD}=== {t('top_shit_mountains')} ==={Colors.ENDC}")
@@ -170,13 +323,45 @@ def main():
             comp_str = f"{comp_src}:{s['complexity']}" if s['complexity'] > 0 else f"Dp:{s['max_nesting']}"
             c_score = str(s['coder_score']) if s['coder_score'] >= 0 else '--'
             print(f"{Colors.PURPLE}{s['shit_score']:<8} {c_score:<6} {comp_str:<8} {s['imports']:<6} {s['total']:<8} {rel_p} [Exempt]{Colors.ENDC}")
+    
+    # 变更 × 复杂度热点（在导出之前合并，报告中带变更字段）
+    if show_churn:
+        churn = read_churn_index(repo_dir, rev=git_rev, since_days=churn_days)
+        if churn is None:
+            print(f"\n{Colors.WARNING}{t('churn_unavailable')}{Colors.ENDC}")
+        else:
+            churn_index, commit_count = churn
+            print_churn_hotspots(apply_churn(all_file_stats, root_dir, churn_index), root_dir, commit_count)
             
+    clone_files = [(s['path'], LANG_DEFINITIONS[s['path'].split('.')[-1].lower()])
+                   for s in all_file_stats if s['is_logic'] and s['prefilter'] == 'source' and s['tier'] != 'lines']
+    # 归档、git 版本和合并的分片：文件路径是虚拟路径，重构建议和克隆检测需要的源码从输入源重新读取
+    sources = None
+    if show_advice or show_clones:
+        wanted = [s['path'] for s in top_shit] if show_advice else []
+        if show_advice and report_file:
+            wanted += [s['path'] for s in all_file_stats if needs_advice(s, diagnose_file(s))]
+        if show_clones:
+            wanted += [path for path, _ in clone_files]
+        try:
+            sources = load_source_buffers(*result['source'], wanted)
+        except ValueError as e:
+            print(f"{Colors.FAIL}{t('source_unavailable')}: {e}{Colors.ENDC}")
+            sys.exit(1)
+        if sources:
+            analyzer.advice_store.add_sources(sources)
+
     if report_file:
-        export_report(all_stats=all_file_stats, filename=report_file, root_dir=root_dir, include_advice=show_advice)
+        export_report(all_stats=all_file_stats, filename=report_file, root_dir=root_dir, include_advice=show_advice, jobs=jobs,
+                      store=analyzer.advice_store)
     
     # 重构建议
     if show_advice:
-        print_refactor_advice(top_shit, root_dir)
+        print_refactor_advice(top_shit, root_dir, store=analyzer.advice_store)
+    
+    # 跨文件克隆检测
+    if show_clones:
+        print_clone_report(detect_clones(clone_files, jobs=jobs, sources=sources), root_dir)
 
 
 if __name__ == "__main__":
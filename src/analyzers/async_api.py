@@ -0,0 +1,154 @@
+"""
+asyncio 接口
+
+供 asyncio 应用（如代码评审机器人）在事件循环中调用，分析过程不阻塞事件循环：
+- 文件读取在线程中完成，分析和重构建议的正则扫描交给可配置的执行器
+  （默认线程池；CPU 密集场景可传入 ProcessPoolExecutor）
+- 信号量限制同时在途的文件数，可在多个请求之间共享同一个信号量
+- 支持单文件超时和取消：尚未开始的任务会被撤销，已在执行器中运行的任务
+  无法中断，但其结果会被丢弃（单文件耗时仍受 --max-ms 预算约束）
+- 单文件预算、扩展指标和自定义异味规则随每个任务传入，调用方自建的进程池
+  不需要 create_worker_pool 的初始化函数（扩展指标须在模块导入时注册，子进程才能找到）
+
+    results = await analyze_many(paths, executor=pool, timeout=5)
+    async for path, stats in iter_analyze(paths):
+        ...
+"""
+import os
+import asyncio
+
+from src.analyzers.file_analyzer import analyze_file
+from src.analyzers.prefetch_io import read_file_for_analysis
+from src.analyzers.refactor_advisor import compute_file_advice
+from src.analyzers.smell_rules import SMELL_RULES, sync_smell_rules
+from src.analyzers.session import Analyzer
+
+
+# 默认同时在途的文件数
+ASYNC_CONCURRENCY = 8
+
+
+async def analyze_path_async(path, lang=None, executor=None, timeout=None, semaphore=None, analyzer=None):
+    """
+    异步分析单个文件
+
+    Args:
+        lang: 语言名或扩展名，不传时按文件扩展名识别
+        executor: 执行分析的执行器，None 使用事件循环的默认线程池
+        timeout: 超时秒数，超时抛出 asyncio.TimeoutError
+        semaphore: 限制并发的 asyncio.Semaphore（可在多个调用之间共享）
+        analyzer: Analyzer 会话（语言识别、单文件预算和扩展指标），None 按当前全局设置创建
+
+    Returns:
+        dict: 文件统计；无法识别语言时返回 None
+    """
+    analyzer = analyzer or Analyzer()
+    if lang is None:
+        lang = path.split('.')[-1] if '.' in path.replace('\\', '/').split('/')[-1] else ''
+    lang_info = analyzer.lang_info_for(lang)
+    if not lang_info:
+        return None
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        # 读取走默认线程池（I/O），分析走指定执行器（CPU）
+        data = await loop.run_in_executor(None, read_file_for_analysis, path, None, analyzer.budget['bytes'])
+        return await loop.run_in_executor(executor, analyze_file, path, lang_info, data,
+                                          analyzer.budget, analyzer.metrics)
+
+    if semaphore is None:
+        return await asyncio.wait_for(run(), timeout)
+    async with semaphore:
+        return await asyncio.wait_for(run(), timeout)
+
+
+def _advise_task(file_path, lang_name, max_ms, rules, owner_pid):
+    """执行器任务：在其他进程中运行时先同步调用方的自定义规则（同一进程的线程直接共用规则）"""
+    if os.getpid() != owner_pid:
+        sync_smell_rules(rules)
+    return compute_file_advice(file_path, lang_name, max_ms)
+
+
+async def advise_async(stats, executor=None, timeout=None, max_ms=None, analyzer=None):
+    """
+    异步计算单个文件的重构建议（热点函数和代码异味）
+
+    Args:
+        max_ms: 耗时预算，None 使用 analyzer 会话的预算（未传会话时为全局预算）
+
+    Returns:
+        dict: hotspots、smells、truncated，与 compute_file_advice 相同
+    """
+    if max_ms is None:
+        max_ms = (analyzer or Analyzer()).budget['ms']
+    loop = asyncio.get_running_loop()
+    return await asyncio.wait_for(
+        loop.run_in_executor(executor, _advise_task, stats['path'], stats['lang'], max_ms,
+                             list(SMELL_RULES.values()), os.getpid()),
+        timeout
+    )
+
+
+async def iter_analyze(paths, executor=None, timeout=None, concurrency=ASYNC_CONCURRENCY, semaphore=None,
+                       return_exceptions=False, analyzer=None):
+    """
+    异步生成器：按完成顺序逐个产出 (路径, 文件统计)
+
+    在途任务数不超过 concurrency，超大的路径列表不会一次性创建全部任务。
+    生成器被关闭或取消时，撤销所有在途任务。
+
+    Args:
+        return_exceptions: True 时单个文件的异常（含超时）作为结果产出，而不是中断迭代
+        analyzer: Analyzer 会话（单文件预算和扩展指标），None 按当前全局设置创建
+    """
+    analyzer = analyzer or Analyzer()
+    semaphore = semaphore or asyncio.Semaphore(concurrency)
+    paths = iter(paths)
+    pending = {}  # task -> path
+
+    def schedule():
+        while len(pending) < concurrency:
+            path = next(paths, None)
+            if path is None:
+                return
+            task = asyncio.ensure_future(analyze_path_async(
+                path, executor=executor, timeout=timeout, semaphore=semaphore, analyzer=analyzer))
+            pending[task] = path
+
+    try:
+        schedule()
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                path = pending.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    result = e
+                yield path, result
+            schedule()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def analyze_many(paths, executor=None, timeout=None, concurrency=ASYNC_CONCURRENCY, semaphore=None,
+                       return_exceptions=False, analyzer=None):
+    """
+    异步分析多个文件
+
+    Returns:
+        list: 与 paths 顺序一致的文件统计（无法识别语言为 None；
+              return_exceptions=True 时失败或超时的文件为异常对象）
+    """
+    paths = list(paths)
+    results = {}
+    async for path, result in iter_analyze(paths, executor=executor, timeout=timeout, concurrency=concurrency,
+                                           semaphore=semaphore, return_exceptions=return_exceptions,
+                                           analyzer=analyzer):
+        results[path] = result
+    return [results[path] for path in paths]
@@ -0,0 +1,140 @@
+"""
+多仓库批量扫描
+
+读取仓库清单，所有仓库的文件共用同一个进程池分析：
+解释器启动、模块导入和正则表编译只在进程池启动时付出一次，
+任务按预估耗时从大到小分发（见 scheduler），规模差异很大的仓库之间也能均衡负载。
+每个仓库单独导出报告（依赖图缓存和重构建议同样共用），最后输出跨仓库汇总。
+"""
+import os
+
+from src.config.colors import Colors
+from src.config.i18n import t
+from src.analyzers.file_analyzer import iter_source_files
+from src.analyzers.scheduler import create_worker_pool, file_costs, scheduled_map, record_timings
+from src.analyzers.dependency_graph import apply_coupling_metrics
+from src.analyzers.session import analyze_file_task, compute_project_index
+from src.analyzers.refactor_advisor import AdviceStore
+from src.reporters.exporter import export_report
+from src.reporters.table_render import render_markdown_table
+
+
+def read_manifest(manifest_path):
+    """读取仓库清单：每行一个目录，忽略空行和 # 注释"""
+    roots = []
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                roots.append(os.path.expanduser(line))
+    return roots
+
+
+def report_name(root_dir, used_names):
+    """按仓库目录名生成报告文件名，重名时追加序号"""
+    base = os.path.basename(os.path.abspath(root_dir)) or 'root'
+    name, idx = base, 2
+    while name in used_names:
+        name = f"{base}_{idx}"
+        idx += 1
+    used_names.add(name)
+    return f"{name}_report.md"
+
+
+def summarize_repo(root_dir, stats_list, graph_summary):
+    """汇总单个仓库的关键指标"""
+    scored = [s['shit_score'] for s in stats_list if not s['is_exempt']]
+    return {
+        'root': root_dir,
+        'files': len(stats_list),
+        'total': sum(s['total'] for s in stats_list),
+        'code': sum(s['code'] for s in stats_list),
+        'index': compute_project_index(stats_list),
+        'max_shit': max(scored) if scored else 0,
+        'cycles': graph_summary['cycles'],
+    }
+
+
+def analyze_all_files(roots, jobs=1, pool=None):
+    """
+    分析所有仓库的文件
+
+    Returns:
+        list: 与 roots 对齐的文件统计列表（按遍历顺序，已去掉二进制和被跳过的文件）
+    """
+    tasks = []
+    costs = []
+    for repo_idx, root_dir in enumerate(roots):
+        repo_tasks = []
+        for file_path, lang_info in iter_source_files(root_dir):
+            try:
+                size = os.path.getsize(file_path)
+            except OSError:
+                continue
+            repo_tasks.append((repo_idx, file_path, lang_info, size))
+        if pool is not None:
+            # 预估耗时：文件大小，或该仓库上次记录的耗时
+            costs.extend(file_costs(root_dir, [task[1] for task in repo_tasks], [task[3] for task in repo_tasks]))
+        tasks.extend(repo_tasks)
+
+    ordered_tasks = [(task[1], task[2]) for task in tasks]
+    if pool is not None:
+        results, elapsed = scheduled_map(analyze_file_task, ordered_tasks, costs, pool, jobs)
+        # 一次遍历按仓库归类任务下标
+        repo_indices = [[] for _ in roots]
+        for i, task in enumerate(tasks):
+            repo_indices[task[0]].append(i)
+        for root_dir, indices in zip(roots, repo_indices):
+            record_timings(root_dir, [tasks[i][1] for i in indices], [elapsed[i] for i in indices])
+    else:
+        results = [analyze_file_task(task) for task in ordered_tasks]
+
+    per_repo = [[] for _ in roots]
+    for (repo_idx, _, _, _), stats in zip(tasks, results):
+        if stats['prefilter'] == 'binary' or stats['tier'] == 'skipped':
+            continue
+        per_repo[repo_idx].append(stats)
+    return per_repo
+
+
+def run_batch(roots, report_dir, jobs=1, include_advice=False):
+    """批量扫描多个仓库，导出各仓库报告和跨仓库汇总，返回汇总列表"""
+    os.makedirs(report_dir, exist_ok=True)
+    print(f"{Colors.HEADER}{t('batch_scan')}: {len(roots)} {t('repositories')}{Colors.ENDC}")
+
+    pool = create_worker_pool(jobs) if jobs > 1 else None
+    store = AdviceStore()
+    summaries = []
+    used_names = set()
+    try:
+        per_repo = analyze_all_files(roots, jobs=jobs, pool=pool)
+        for root_dir, stats_list in zip(roots, per_repo):
+            graph_summary = apply_coupling_metrics(stats_list, root_dir)
+            report_path = os.path.join(report_dir, report_name(root_dir, used_names))
+            # 重构建议缓存只在同一仓库内复用
+            store.clear()
+            export_report(stats_list, report_path, root_dir, include_advice=include_advice,
+                          jobs=jobs, pool=pool, store=store)
+            summary = summarize_repo(root_dir, stats_list, graph_summary)
+            summary['report'] = os.path.basename(report_path)
+            summaries.append(summary)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    headers = [t('repository'), t('files'), t('lines'), t('code'), t('project_coder_index'),
+               t('max_shit_score'), t('import_cycles'), t('report_file')]
+    rows = [[
+        f"`{s['root']}`", str(s['files']), str(s['total']), str(s['code']),
+        str(s['index']) if s['index'] is not None else '--', str(s['max_shit']), str(s['cycles']), s['report'],
+    ] for s in summaries]
+    table = render_markdown_table(headers, rows, ['left'] + ['right'] * 6 + ['left'])
+
+    summary_path = os.path.join(report_dir, 'batch_summary.md')
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        f.write(f"# {t('batch_summary')}\n\n{t('generated_by')}\n\n")
+        f.writelines(table)
+    print(f"\n{Colors.BOLD}=== {t('batch_summary')} ==={Colors.ENDC}")
+    print(''.join(table), end='')
+    print(f"{Colors.GREEN}{t('report_exported')}: {summary_path}{Colors.ENDC}")
+    return summaries
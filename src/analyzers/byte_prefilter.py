@@ -0,0 +1,94 @@
+"""
+字节级预过滤
+
+在解码之前直接对原始字节做廉价判断：
+- 含 NUL 字节的二进制文件直接跳过
+- 在字节上统计行数和空行数
+- 识别压缩（平均行长过长）和自动生成（生成器头部标记）的文件，只走统计行数的廉价路径
+- 超出字节预算的文件流式统计行数，不整体读入
+
+只有需要深度分析的文件才会被完整解码。
+"""
+import io
+import re
+
+from src.config.constants import (
+    BINARY_SNIFF_BYTES, MINIFIED_AVG_LINE_LENGTH, MINIFIED_MIN_BYTES,
+    GENERATED_HEADER_BYTES, GENERATED_MARKERS, BUDGET_CHECK_INTERVAL
+)
+from src.analyzers.file_budget import deadline_passed
+
+
+# 空白行（仅含空白字符）匹配，在字节上运行
+BLANK_LINE_BYTES = re.compile(rb'^[ \t\r\f\v]*$', re.MULTILINE)
+
+
+def read_source_bytes(file_path):
+    """以二进制方式读取文件"""
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+
+def count_lines_bytes(data):
+    """按字节统计行数（与文本模式 readlines 的行数一致）"""
+    if not data:
+        return 0
+    # 文本模式会把单独的 \r 也视为换行
+    newlines = data.count(b'\n') + data.count(b'\r') - data.count(b'\r\n')
+    return newlines + (0 if data.endswith((b'\n', b'\r')) else 1)
+
+
+def count_blank_lines_bytes(data):
+    """按字节统计空行数"""
+    if not data:
+        return 0
+    blanks = len(BLANK_LINE_BYTES.findall(data))
+    # 末尾换行后的"空串"不是一行
+    if data.endswith(b'\n'):
+        blanks -= 1
+    return blanks
+
+
+def count_lines_stream(file_path, deadline=None):
+    """
+    流式统计超大文件的行数和空行数（不整体读入内存）
+
+    Returns:
+        tuple: (行数, 空行数)；超过截止时间时返回 None
+    """
+    total = blank = 0
+    with open(file_path, 'rb') as f:
+        for line in f:
+            total += 1
+            if not line.strip():
+                blank += 1
+            if total % BUDGET_CHECK_INTERVAL == 0 and deadline_passed(deadline):
+                return None
+    return total, blank
+
+
+def classify_source_bytes(data):
+    """
+    对文件原始字节分类
+
+    Returns:
+        str: 'binary'（跳过）、'minified' / 'generated'（仅统计行数）或 'source'（深度分析）
+    """
+    if b'\x00' in data[:BINARY_SNIFF_BYTES]:
+        return 'binary'
+    head = data[:GENERATED_HEADER_BYTES].lower()
+    if any(marker in head for marker in GENERATED_MARKERS):
+        return 'generated'
+    if len(data) >= MINIFIED_MIN_BYTES and len(data) / max(1, count_lines_bytes(data)) > MINIFIED_AVG_LINE_LENGTH:
+        return 'minified'
+    return 'source'
+
+
+def decode_source_lines(data, strict=False):
+    """
+    解码为文本行，行为与 open(..., encoding='utf-8').readlines() 一致（含通用换行转换）
+
+    Args:
+        strict: True 时遇到非法 UTF-8 抛出 UnicodeDecodeError，否则忽略非法字节
+    """
+    return io.TextIOWrapper(io.BytesIO(data), encoding='utf-8', errors='strict' if strict else 'ignore').readlines()
@@ -0,0 +1,179 @@
+"""
+变更频率（churn）× 复杂度热点
+
+复杂度高且频繁修改的文件才是最先需要重构的地方。本模块流式读取一次
+git log --numstat 输出，建立按路径汇总的变更索引，与文件统计合并后给出按变更加权的排名：
+- 逐块读取 git 输出并按 NUL 切分，只保留每个路径的汇总（提交数、作者数、增删行数、
+  按半衰期衰减的变更权重、最近修改时间），内存只与路径数和作者数有关，与提交数无关
+- git log 从新到旧输出，衰减以最新一次提交的时间为基准（同一仓库状态结果可复现）
+- 重命名在流中沿时间倒序传递：旧路径上更早的修改计入文件当前的路径
+"""
+import os
+import subprocess
+
+from src.config.colors import Colors
+from src.config.i18n import t
+
+
+# 变更权重的半衰期（天）：半衰期前的一次提交权重为 0.5
+CHURN_HALF_LIFE_DAYS = 90
+# 读取 git 输出的块大小
+CHURN_READ_CHUNK = 1 << 20
+# 写入文件统计的字段
+CHURN_FIELDS = ('churn_commits', 'churn_authors', 'churn_lines', 'churn_weight', 'hotspot_score')
+# 提交头标记：git log --format 中的 %x01
+COMMIT_MARKER = b'\x01'
+
+
+class PathChurn:
+    """单个路径的变更汇总（作者集合存为以作者编号为位的整数位图）"""
+    __slots__ = ('commits', 'lines', 'weight', 'last_time', 'authors')
+
+    def __init__(self):
+        self.commits = 0
+        self.lines = 0
+        self.weight = 0.0
+        self.last_time = 0
+        self.authors = 0
+
+
+def iter_nul_records(stream, chunk_size=CHURN_READ_CHUNK):
+    """逐块读取二进制流，按 NUL 切分产出记录（不整体读入）"""
+    tail = b''
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        records = (tail + chunk).split(b'\0')
+        tail = records.pop()
+        yield from records
+    if tail:
+        yield tail
+
+
+def iter_numstat_commits(stream):
+    """
+    解析 git log --numstat -z --format=%x01%at%x00%aE 的输出
+
+    Yields:
+        tuple: (提交时间戳, 作者, [(路径, 重命名前路径或 None, 增删行数)])，路径均为 bytes
+    """
+    records = iter_nul_records(stream)
+    commit = None
+    for record in records:
+        record = record.lstrip(b'\n')
+        if record.startswith(COMMIT_MARKER):
+            if commit:
+                yield commit
+            author = next(records, b'')
+            commit = (int(record[1:] or 0), author, [])
+            continue
+        if not record or commit is None:
+            continue
+        added, deleted, path = record.split(b'\t', 2)
+        old_path = None
+        if not path:
+            # 重命名：A\tD\t\0旧路径\0新路径
+            old_path = next(records, b'')
+            path = next(records, b'')
+        # 二进制文件的增删行数为 '-'
+        lines = (int(added) if added.isdigit() else 0) + (int(deleted) if deleted.isdigit() else 0)
+        commit[2].append((path, old_path, lines))
+    if commit:
+        yield commit
+
+
+def build_churn_index(commits, half_life_days=CHURN_HALF_LIFE_DAYS):
+    """
+    把从新到旧的提交流汇总为按路径的变更索引
+
+    Returns:
+        tuple: (相对路径 -> PathChurn, 提交数)
+    """
+    index = {}
+    renamed = {}
+    author_ids = {}
+    half_life = half_life_days * 86400
+    newest = None
+    count = 0
+    for timestamp, author, changes in commits:
+        count += 1
+        if newest is None:
+            newest = timestamp
+        weight = 0.5 ** (max(0, newest - timestamp) / half_life)
+        author_bit = 1 << author_ids.setdefault(author, len(author_ids))
+        for path, old_path, lines in changes:
+            current = renamed.get(path, path)
+            if old_path is not None:
+                # 更早的提交中旧路径上的修改属于同一个文件
+                renamed[old_path] = current
+            entry = index.get(current)
+            if entry is None:
+                entry = index[current] = PathChurn()
+            entry.commits += 1
+            entry.lines += lines
+            entry.weight += weight
+            entry.authors |= author_bit
+            if timestamp > entry.last_time:
+                entry.last_time = timestamp
+    return {path.decode('utf-8', errors='surrogateescape'): entry for path, entry in index.items()}, count
+
+
+def read_churn_index(repo_dir, rev=None, since_days=None, half_life_days=CHURN_HALF_LIFE_DAYS):
+    """
+    流式读取 git 历史并建立变更索引（路径相对于 repo_dir，--relative 限定在该目录内）
+
+    Returns:
+        tuple: (相对路径 -> PathChurn, 提交数)；不是 git 仓库或 git 不可用时返回 None
+    """
+    cmd = ['git', '-C', repo_dir, 'log', '--numstat', '-z', '--relative', '--format=%x01%at%x00%aE']
+    if since_days:
+        cmd.append(f'--since={since_days} days ago')
+    if rev:
+        cmd.append(rev)
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except OSError:
+        return None
+    try:
+        result = build_churn_index(iter_numstat_commits(proc.stdout), half_life_days)
+    finally:
+        proc.stdout.close()
+        returncode = proc.wait()
+    return result if returncode == 0 else None
+
+
+def apply_churn(all_stats, root_dir, index):
+    """
+    把变更索引合并到文件统计，热点分 = Shit Score × 变更权重 / 最大变更权重
+
+    Returns:
+        list: 有变更记录且非豁免文件按热点分从高到低排列的文件统计
+    """
+    matched = []
+    for stats in all_stats:
+        entry = index.get(os.path.relpath(stats['path'], root_dir).replace(os.sep, '/'))
+        if entry is not None:
+            stats['churn_commits'] = entry.commits
+            stats['churn_authors'] = bin(entry.authors).count('1')
+            stats['churn_lines'] = entry.lines
+            stats['churn_weight'] = round(entry.weight, 2)
+            matched.append((stats, entry.weight))
+    max_weight = max((weight for _, weight in matched), default=0) or 1
+    for stats, weight in matched:
+        stats['hotspot_score'] = round(stats['shit_score'] * weight / max_weight, 1)
+    return sorted((stats for stats, _ in matched if not stats['is_exempt']),
+                  key=lambda s: s['hotspot_score'], reverse=True)
+
+
+def print_churn_hotspots(ranked, root_dir, commit_count, limit=10):
+    """打印变更 × 复杂度热点排名"""
+    print(f"\n{Colors.FAIL}{Colors.BOLD}=== {t('churn_hotspots')} ==={Colors.ENDC}")
+    print(f"{t('churn_history')}: {commit_count} {t('commits')} | {len(ranked)} {t('files')}")
+    print(f"{'Hotspot':<8} {'Score':<6} {'Commits':<8} {'Authors':<8} {'Churn':<8} {t('file_path')}")
+    print("-" * 115)
+    for s in ranked[:limit]:
+        rel_p = os.path.relpath(s['path'], root_dir)
+        color = Colors.FAIL if s['hotspot_score'] > 40 else (Colors.WARNING if s['hotspot_score'] > 10 else Colors.ENDC)
+        print(f"{color}{s['hotspot_score']:<8}{Colors.ENDC} {s['shit_score']:<6} {s['churn_commits']:<8} "
+              f"{s['churn_authors']:<8} {s['churn_lines']:<8} {rel_p}")
@@ -0,0 +1,261 @@
+"""
+跨文件重复代码（克隆）检测器
+
+将每个文件归一化为逻辑行序列（复用 sanitize_line 剔除字符串与行内注释），
+对连续 k 行窗口计算滚动哈希，并用 Winnowing 选取指纹写入全局哈希表，
+最终合并相邻命中输出克隆对（同一文件内相互重叠的自匹配不算克隆）。
+
+时间复杂度近似线性，内存只与指纹数量相关；指纹提取可分片到多个进程并行。
+"""
+import os
+import re
+import hashlib
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from src.config.colors import Colors
+from src.config.i18n import t
+from src.analyzers.file_analyzer import sanitize_line
+from src.analyzers.byte_prefilter import decode_source_lines
+from src.analyzers.scheduler import scheduled_map
+
+
+# 克隆检测参数
+CLONE_WINDOW = 6          # k：每个指纹覆盖的连续逻辑行数
+WINNOW_SIZE = 4           # w：Winnowing 窗口，保证 >= k+w-1 行的重复必被发现
+MIN_CLONE_LINES = 8       # 报告的最小克隆长度（逻辑行）
+MAX_BUCKET = 32           # 单个指纹最多记录的位置数，超出视为模板代码不再配对
+MIN_LINE_CHARS = 3        # 归一化后短于此长度的行（如 `}`、`);`）不参与比较
+# 至少含一个标识符/数字字符的行才参与比较（`"":"",`、`}]);` 这类纯符号行不计入窗口）
+WORD_CHAR_PATTERN = re.compile(r'\w')
+
+# 滚动哈希参数：模 2^61-1 的多项式哈希
+ROLL_MOD = (1 << 61) - 1
+ROLL_BASE = 1000003
+
+
+def hash_line(text):
+    """计算单行的 64 位稳定哈希（跨进程一致，不受 PYTHONHASHSEED 影响）"""
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def normalize_lines(lines, lang_name, single_comments):
+    """
+    将源码行归一化为 (原始行号, 归一化文本) 序列
+
+    字符串字面量统一替换为 ""，剔除行内注释和所有空白，
+    跳过空行、整行注释、过短的行和纯符号行。
+    """
+    normalized = []
+    for line_no, line in enumerate(lines, 1):
+        stripped = line.strip()
+        if not stripped or any(stripped.startswith(c) for c in single_comments):
+            continue
+        text = ''.join(sanitize_line(stripped, lang_name).split())
+        if len(text) < MIN_LINE_CHARS or not WORD_CHAR_PATTERN.search(text):
+            continue
+        normalized.append((line_no, text))
+    return normalized
+
+
+def winnow(hashes, window):
+    """
+    Winnowing 指纹选取：在每 window 个连续哈希中选最小值（并列取最右）
+
+    Returns:
+        list: [(hash, position)]，位置单调递增且不重复
+    """
+    selected = []
+    if not hashes:
+        return selected
+    if len(hashes) <= window:
+        pos = min(range(len(hashes)), key=lambda i: (hashes[i], -i))
+        return [(hashes[pos], pos)]
+
+    candidates = deque()  # 单调队列，存放位置，对应哈希值递增
+    last_pos = -1
+    for i, h in enumerate(hashes):
+        while candidates and hashes[candidates[-1]] >= h:
+            candidates.pop()
+        candidates.append(i)
+        if candidates[0] <= i - window:
+            candidates.popleft()
+        if i >= window - 1 and candidates[0] != last_pos:
+            last_pos = candidates[0]
+            selected.append((hashes[last_pos], last_pos))
+    return selected
+
+
+def fingerprint_file(file_path, lang_info, data=None):
+    """
+    提取单个文件的克隆指纹
+
+    Args:
+        data: 内存中的文件内容（归档 / git 输入），为 None 时读取文件
+
+    Returns:
+        tuple: (原始行号数组, [(指纹哈希, 逻辑行下标)])；读取失败时返回空结果
+    """
+    lang_name, single_comments = lang_info[0], lang_info[1]
+    try:
+        if data is not None:
+            lines = decode_source_lines(data)
+        else:
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                lines = f.readlines()
+    except:
+        return array('I'), []
+
+    normalized = normalize_lines(lines, lang_name, single_comments)
+    line_map = array('I', (ln for ln, _ in normalized))
+    if len(normalized) < CLONE_WINDOW:
+        return line_map, []
+
+    line_hashes = [hash_line(text) for _, text in normalized]
+    top_power = pow(ROLL_BASE, CLONE_WINDOW - 1, ROLL_MOD)
+    rolling = 0
+    window_hashes = []
+    for i, h in enumerate(line_hashes):
+        if i >= CLONE_WINDOW:
+            rolling = (rolling - line_hashes[i - CLONE_WINDOW] * top_power) % ROLL_MOD
+        rolling = (rolling * ROLL_BASE + h) % ROLL_MOD
+        if i >= CLONE_WINDOW - 1:
+            window_hashes.append(rolling)
+    return line_map, winnow(window_hashes, WINNOW_SIZE)
+
+
+def _fingerprint_task(task):
+    """进程池任务包装（必须是模块级函数才能被 pickle）"""
+    file_path, lang_info, data = task
+    return fingerprint_file(file_path, lang_info, data)
+
+
+def collect_match_runs(index):
+    """
+    从全局指纹表生成命中对，按 (文件A, 文件B, 偏移差) 分组
+
+    Returns:
+        dict: (fa, fb, delta) -> [文件A中的逻辑行下标]
+    """
+    runs = {}
+    for locations in index.values():
+        if len(locations) < 2 or len(locations) > MAX_BUCKET:
+            continue
+        for a in range(len(locations)):
+            fa, ia = locations[a]
+            for b in range(a + 1, len(locations)):
+                fb, ib = locations[b]
+                if fa == fb and abs(ia - ib) < CLONE_WINDOW:
+                    continue  # 同文件内自重叠（重复行模式），不算克隆
+                runs.setdefault((fa, fb, ib - ia), []).append(ia)
+    return runs
+
+
+def detect_clones(files, jobs=1, sources=None):
+    """
+    检测跨文件重复代码
+
+    Args:
+        files: [(文件路径, lang_info)] 列表，lang_info 为 LANG_DEFINITIONS 中的元组
+        jobs: 指纹提取的进程数，<= 1 时串行执行
+        sources: 归档 / git 输入的文件内容（虚拟路径 -> bytes），其余文件从磁盘读取
+
+    Returns:
+        list: 克隆对列表，按重复行数降序
+    """
+    sources = sources or {}
+    tasks = [(file_path, lang_info, sources.get(file_path)) for file_path, lang_info in files]
+    if jobs > 1 and len(tasks) > 1:
+        sizes = []
+        for file_path, _, data in tasks:
+            if data is not None:
+                sizes.append(len(data))
+                continue
+            try:
+                sizes.append(os.path.getsize(file_path))
+            except OSError:
+                sizes.append(0)
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results, _ = scheduled_map(_fingerprint_task, tasks, sizes, pool, jobs)
+    else:
+        results = [_fingerprint_task(task) for task in tasks]
+
+    # 全局指纹表：hash -> [(文件下标, 逻辑行下标)]
+    index = {}
+    line_maps = []
+    for file_idx, (line_map, fingerprints) in enumerate(results):
+        line_maps.append(line_map)
+        for h, pos in fingerprints:
+            bucket = index.get(h)
+            if bucket is None:
+                index[h] = [(file_idx, pos)]
+            elif len(bucket) <= MAX_BUCKET:
+                bucket.append((file_idx, pos))
+    runs = collect_match_runs(index)
+    del index
+
+    # 合并同一偏移上相邻的指纹命中为连续区间
+    max_gap = CLONE_WINDOW + WINNOW_SIZE - 1
+    clones = []
+    for (fa, fb, delta), positions in runs.items():
+        positions.sort()
+        start = end = positions[0]
+        for pos in positions[1:] + [None]:
+            if pos is not None and pos - end <= max_gap:
+                end = pos
+                continue
+            length = end - start + CLONE_WINDOW
+            # 同一文件内偏移差小于区间长度时两段相互重叠，是同一块代码的自匹配
+            if length >= MIN_CLONE_LINES and not (fa == fb and abs(delta) < length):
+                map_a, map_b = line_maps[fa], line_maps[fb]
+                last = end + CLONE_WINDOW - 1
+                clones.append({
+                    'file_a': tasks[fa][0],
+                    'start_a': map_a[start], 'end_a': map_a[last],
+                    'file_b': tasks[fb][0],
+                    'start_b': map_b[start + delta], 'end_b': map_b[last + delta],
+                    'lines': length,
+                })
+            if pos is not None:
+                start = end = pos
+
+    clones.sort(key=lambda c: (-c['lines'], c['file_a'], c['start_a']))
+    return dedupe_clone_regions(clones)
+
+
+def dedupe_clone_regions(clones):
+    """
+    去掉两侧区域都落在同一文件对中更长克隆对内的克隆对
+    （同一段重复代码在其他偏移上的局部命中只报告一次）
+
+    Args:
+        clones: 按重复行数降序排列的克隆对列表
+    """
+    kept = []
+    by_pair = {}
+    for c in clones:
+        reported = by_pair.setdefault((c['file_a'], c['file_b']), [])
+        if any(k['start_a'] <= c['start_a'] and c['end_a'] <= k['end_a']
+               and k['start_b'] <= c['start_b'] and c['end_b'] <= k['end_b'] for k in reported):
+            continue
+        reported.append(c)
+        kept.append(c)
+    return kept
+
+
+def print_clone_report(clones, root_dir, limit=10):
+    """打印跨文件克隆检测结果"""
+    print(f"\n{Colors.BLUE}{Colors.BOLD}=== {t('clone_detection')} ==={Colors.ENDC}")
+    if not clones:
+        print(f"  {Colors.GREEN}{t('no_clones')}{Colors.ENDC}")
+        return
+    print(f"{t('lines'):<8} {t('clone_location_a'):<50} {t('clone_location_b')}")
+    print("-" * 115)
+    for c in clones[:limit]:
+        loc_a = f"{os.path.relpath(c['file_a'], root_dir)}:L{c['start_a']}-{c['end_a']}"
+        loc_b = f"{os.path.relpath(c['file_b'], root_dir)}:L{c['start_b']}-{c['end_b']}"
+        color = Colors.FAIL if c['lines'] >= 30 else Colors.WARNING
+        print(f"{color}{c['lines']:<8}{Colors.ENDC} {loc_a:<50} {loc_b}")
+    total = sum(c['lines'] for c in clones)
+    print(f"{t('clone_pairs')}: {len(clones)} | {t('duplicated_lines')}: {total}")
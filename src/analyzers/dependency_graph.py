@@ -0,0 +1,311 @@
+"""
+依赖图与耦合度指标
+
+将各文件的 import 目标解析为项目内的文件，构建 CSR（压缩稀疏行）邻接结构，
+线性时间计算扇入/扇出、循环依赖（Tarjan 强连通分量）和不稳定度，
+用真实的架构耦合替代单纯的 import 行数参与 Shit Score 评分。
+
+依赖图只取决于文件集合和各文件的 import 目标，因此以二者的摘要为签名跨运行缓存。
+"""
+import os
+import hashlib
+from array import array
+
+from src.config.constants import PACKAGE_ENTRY_STEMS
+from src.analyzers.file_analyzer import calculate_scores
+from src.analyzers.result_cache import load_cache, save_cache
+
+
+# 按路径解析 import 的语言（相对路径 / include）
+PATH_IMPORT_LANGS = {'JavaScript', 'TypeScript', 'React', 'React TS', 'C', 'C++', 'C/C++ Header', 'C++ Header'}
+# 按 "." 分隔模块名解析的语言
+DOTTED_IMPORT_LANGS = {'Java', 'Kotlin', 'Kotlin Script'}
+# JS/TS 无扩展名 import 的候选扩展
+JS_EXTENSIONS = ('js', 'ts', 'jsx', 'tsx')
+
+GRAPH_CACHE_NAME = 'depgraph'
+
+
+def split_module_path(rel_path):
+    """将相对路径拆为模块路径片段（去扩展名，包入口文件代表其目录）"""
+    parts = rel_path.split('/')
+    stem = parts[-1].rsplit('.', 1)[0]
+    if stem in PACKAGE_ENTRY_STEMS:
+        return parts[:-1]
+    return parts[:-1] + [stem]
+
+
+def build_module_index(rel_paths, logic_mask):
+    """
+    为所有逻辑语言文件建立解析索引
+
+    Returns:
+        dict: suffix（模块路径后缀 -> 节点列表）、path（带扩展名的完整路径 -> 节点）、
+              name（文件名 -> 节点列表）、dir（目录路径后缀 -> 节点列表）
+    """
+    index = {'suffix': {}, 'path': {}, 'name': {}, 'dir': {}}
+    for node, rel_path in enumerate(rel_paths):
+        if not logic_mask[node]:
+            continue
+        index['path'][rel_path] = node
+        index['name'].setdefault(rel_path.rsplit('/', 1)[-1], []).append(node)
+        parts = split_module_path(rel_path)
+        for i in range(len(parts)):
+            index['suffix'].setdefault('/'.join(parts[i:]), []).append(node)
+        if rel_path.endswith('.go') and not rel_path.endswith('_test.go'):
+            dir_parts = rel_path.split('/')[:-1]
+            for i in range(len(dir_parts)):
+                index['dir'].setdefault('/'.join(dir_parts[i:]), []).append(node)
+    return index
+
+
+def pick_candidate(candidates, key, importer, rel_paths):
+    """多个候选时优先完整路径匹配，其次选与导入方目录前缀最长的文件"""
+    if len(candidates) == 1:
+        return candidates[0]
+    exact = [c for c in candidates if '/'.join(split_module_path(rel_paths[c])) == key]
+    if len(exact) == 1:
+        return exact[0]
+    importer_dir = os.path.dirname(importer)
+    return max(exact or candidates, key=lambda c: len(os.path.commonprefix([importer_dir, os.path.dirname(rel_paths[c])])))
+
+
+def lookup_module(parts, index, importer, rel_paths):
+    """按模块路径片段查找文件；允许回退一级（from a import b 中 b 可能是符号而非模块）"""
+    parts = [p for p in parts if p]
+    if not parts:
+        return []
+    min_parts = min(2, len(parts))
+    for k in (len(parts), len(parts) - 1):
+        if k < min_parts:
+            break
+        key = '/'.join(parts[:k])
+        candidates = index['suffix'].get(key)
+        if candidates:
+            return [pick_candidate(candidates, key, importer, rel_paths)]
+    return []
+
+
+def resolve_path_import(target, lang_name, importer, index):
+    """解析基于路径的 import（JS/TS 相对路径、C/C++ 引号 include）"""
+    base_dir = os.path.dirname(importer)
+    is_c = lang_name not in ('JavaScript', 'TypeScript', 'React', 'React TS')
+    if not is_c and not target.startswith('.'):
+        return []  # npm 包等外部依赖
+    joined = os.path.normpath(os.path.join(base_dir, target)).replace(os.sep, '/')
+    if joined in index['path']:
+        return [index['path'][joined]]
+    if not is_c:
+        for ext in JS_EXTENSIONS:
+            for candidate in (f"{joined}.{ext}", f"{joined}/index.{ext}"):
+                if candidate in index['path']:
+                    return [index['path'][candidate]]
+        return []
+    # C/C++：include 路径相对于 include 目录，退化为按文件名唯一匹配
+    same_name = index['name'].get(target.rsplit('/', 1)[-1], [])
+    return same_name[:1] if len(same_name) == 1 else []
+
+
+def resolve_target(target, lang_name, importer, index, rel_paths):
+    """
+    将单个 import 目标解析为项目内文件节点
+
+    Returns:
+        list: 目标节点列表（Go 包导入对应目录下的多个文件），外部依赖返回空列表
+    """
+    if lang_name in PATH_IMPORT_LANGS:
+        return resolve_path_import(target, lang_name, importer, index)
+
+    if lang_name == 'Python':
+        level = len(target) - len(target.lstrip('.'))
+        parts = target[level:].split('.')
+        if level:
+            base = importer.split('/')[:-1]
+            if level - 1 > len(base):
+                return []
+            parts = base[:len(base) - (level - 1)] + parts
+        return lookup_module(parts, index, importer, rel_paths)
+
+    if lang_name in DOTTED_IMPORT_LANGS:
+        return lookup_module(target.split('.'), index, importer, rel_paths)
+
+    if lang_name == 'Rust':
+        parts = [p for p in target.split('::') if p not in ('crate', 'self', 'super')]
+        return lookup_module(parts, index, importer, rel_paths)
+
+    if lang_name == 'PHP':
+        if target.endswith('.php') or '/' in target:
+            joined = os.path.normpath(os.path.join(os.path.dirname(importer), target)).replace(os.sep, '/')
+            return [index['path'][joined]] if joined in index['path'] else []
+        return lookup_module(target.split('\\'), index, importer, rel_paths)
+
+    if lang_name == 'Go':
+        parts = target.split('/')
+        if '.' not in parts[0]:
+            return []  # 标准库（首段不含域名）
+        for i in range(1, len(parts)):
+            nodes = index['dir'].get('/'.join(parts[i:]))
+            if nodes:
+                return nodes
+    return []
+
+
+def graph_signature(rel_paths, all_stats):
+    """依赖图签名：文件集合 + 各文件语言与 import 目标的摘要"""
+    digest = hashlib.blake2b(digest_size=16)
+    for rel_path, s in zip(rel_paths, all_stats):
+        digest.update(f"{rel_path}\0{s['lang']}\0{chr(1).join(s.get('import_targets', []))}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def build_dependency_graph(all_stats, root_dir, use_cache=True):
+    """
+    构建项目内文件级依赖图（CSR 邻接结构）
+
+    Returns:
+        dict: nodes（相对路径列表）、offsets/targets（CSR 出边数组）、
+              external（每个节点未能解析到项目内的 import 数）
+    """
+    rel_paths = [os.path.relpath(s['path'], root_dir).replace(os.sep, '/') for s in all_stats]
+    signature = graph_signature(rel_paths, all_stats)
+    if use_cache:
+        cached = load_cache(root_dir, GRAPH_CACHE_NAME)
+        if cached and cached.get('signature') == signature:
+            return {
+                'nodes': rel_paths,
+                'offsets': array('i', cached['offsets']),
+                'targets': array('i', cached['targets']),
+                'external': array('i', cached['external']),
+            }
+
+    index = build_module_index(rel_paths, [s['is_logic'] for s in all_stats])
+    offsets = array('i', [0])
+    targets = array('i')
+    external = array('i')
+    for node, s in enumerate(all_stats):
+        out_edges = set()
+        unresolved = 0
+        for target in s.get('import_targets', []):
+            resolved = resolve_target(target, s['lang'], rel_paths[node], index, rel_paths)
+            if resolved:
+                out_edges.update(resolved)
+            else:
+                unresolved += 1
+        out_edges.discard(node)
+        targets.extend(sorted(out_edges))
+        offsets.append(len(targets))
+        external.append(unresolved)
+
+    graph = {'nodes': rel_paths, 'offsets': offsets, 'targets': targets, 'external': external}
+    if use_cache:
+        save_cache(root_dir, GRAPH_CACHE_NAME, {
+            'signature': signature,
+            'offsets': offsets.tolist(),
+            'targets': targets.tolist(),
+            'external': external.tolist(),
+        })
+    return graph
+
+
+def strongly_connected_components(offsets, targets):
+    """
+    迭代版 Tarjan 强连通分量算法，O(V+E)，不受递归深度限制
+
+    Returns:
+        tuple: (每个节点所属分量编号数组, 分量数量)
+    """
+    n = len(offsets) - 1
+    order = array('i', [-1]) * n
+    low = array('i', [0]) * n
+    comp = array('i', [-1]) * n
+    on_stack = bytearray(n)
+    stack = []
+    counter = 0
+    comp_count = 0
+
+    for root in range(n):
+        if order[root] != -1:
+            continue
+        order[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        work = [[root, offsets[root]]]
+        while work:
+            frame = work[-1]
+            v, edge = frame
+            if edge < offsets[v + 1]:
+                frame[1] = edge + 1
+                w = targets[edge]
+                if order[w] == -1:
+                    order[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = 1
+                    work.append([w, offsets[w]])
+                elif on_stack[w] and order[w] < low[v]:
+                    low[v] = order[w]
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if low[v] < low[parent]:
+                    low[parent] = low[v]
+            if low[v] == order[v]:
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = 0
+                    comp[w] = comp_count
+                    if w == v:
+                        break
+                comp_count += 1
+    return comp, comp_count
+
+
+def compute_coupling_metrics(graph):
+    """
+    计算每个节点的扇入、扇出、不稳定度和所在循环依赖的规模
+
+    不稳定度 I = Ce / (Ca + Ce)，Ce 为扇出、Ca 为扇入；0 表示极稳定，1 表示极不稳定。
+    """
+    offsets, targets = graph['offsets'], graph['targets']
+    n = len(offsets) - 1
+    fan_in = array('i', [0]) * n
+    for w in targets:
+        fan_in[w] += 1
+    comp, comp_count = strongly_connected_components(offsets, targets)
+    comp_sizes = array('i', [0]) * comp_count
+    for c in comp:
+        comp_sizes[c] += 1
+
+    metrics = []
+    for v in range(n):
+        fan_out = offsets[v + 1] - offsets[v]
+        degree = fan_in[v] + fan_out
+        metrics.append({
+            'fan_in': fan_in[v],
+            'fan_out': fan_out,
+            'external_imports': graph['external'][v],
+            'instability': round(fan_out / degree, 2) if degree else 0.0,
+            'cycle_size': comp_sizes[comp[v]],
+        })
+    cycles = [size for size in comp_sizes if size > 1]
+    summary = {
+        'modules': n,
+        'edges': len(targets),
+        'cycles': len(cycles),
+        'largest_cycle': max(cycles) if cycles else 0,
+    }
+    return metrics, summary
+
+
+def apply_coupling_metrics(all_stats, root_dir, use_cache=True):
+    """构建依赖图，将耦合指标写入各文件统计并重新计算评分，返回依赖图摘要"""
+    graph = build_dependency_graph(all_stats, root_dir, use_cache=use_cache)
+    metrics, summary = compute_coupling_metrics(graph)
+    for stats, node_metrics in zip(all_stats, metrics):
+        stats.update(node_metrics)
+        # 只统计行数的文件（预过滤或超出预算）不参与评分
+        if stats['total'] > 0 and stats['prefilter'] == 'source' and stats.get('tier', 'full') in ('full', 'regex'):
+            stats['shit_score'], stats['coder_score'] = calculate_scores(stats, stats['is_logic'])
+    return summary
@@ -7,10 +7,18 @@
 import os
 
 from src.config.constants import (
-    LANG_DEFINITIONS, IMPORT_PATTERNS, CC_PATTERNS, LANG_FAMILY,
-    SCRIPT_START, SCRIPT_END, STRING_LITERAL, EXEMPT_FILES
+    LANG_DEFINITIONS, IMPORT_PATTERNS, IMPORT_TARGET_PATTERNS, CC_PATTERNS, LANG_FAMILY,
+    SCRIPT_START, SCRIPT_END, STRING_LITERAL, EXEMPT_FILES, BUDGET_CHECK_INTERVAL,
+    DEFAULT_IGNORES
 )
-from src.analyzers.python_ast import analyze_python_ast
+from src.analyzers.python_ast import analyze_python_source
+from src.analyzers.byte_prefilter import (
+    read_source_bytes, classify_source_bytes, count_lines_bytes,
+    count_blank_lines_bytes, decode_source_lines, count_lines_stream
+)
+from src.analyzers.parser_backend import parse_with_backend
+from src.analyzers.file_budget import FILE_BUDGET, tier_for_size, start_deadline, deadline_passed
+from src.analyzers.metrics import start_metric_scan
 
 
 def sanitize_line(line, lang_name):
@@ -67,6 +75,17 @@ def estimate_cc_regex(line, lang_name):
     return score
 
 
+def extract_import_target(line, lang_name):
+    """从 import 语句中提取依赖目标（模块名或相对路径），无法识别时返回 None"""
+    pattern = IMPORT_TARGET_PATTERNS.get(lang_name)
+    if not pattern:
+        return None
+    match = pattern.search(line)
+    if not match:
+        return None
+    return next((g for g in match.groups() if g), None)
+
+
 def get_indentation_level(line):
     """计算缩进层级（每4空格为1级）"""
     expand = line.expandtabs(4)
@@ -87,7 +106,15 @@ def calculate_scores(stats, is_logic_lang):
             complexity_penalty = (stats['max_nesting'] - 4) * 12 if stats['max_nesting'] > 4 else 0
         else:
             complexity_penalty = max(0, cc - 10) * 1.5
-        coupling_penalty = stats['imports'] * 1.5
+        if 'fan_out' in stats:
+            # 依赖图可用：项目内依赖按扇出计，外部依赖权重较低，
+            # 被大量依赖且自身不稳定的模块、处于循环依赖中的模块额外惩罚
+            coupling_penalty = (stats['fan_out'] * 1.5 + stats['external_imports'] * 0.5
+                                + stats['fan_in'] * stats['instability'] * 0.5)
+            if stats['cycle_size'] > 1:
+                coupling_penalty += min(30, (stats['cycle_size'] - 1) * 5)
+        else:
+            coupling_penalty = stats['imports'] * 1.5
         comment_ratio = (stats['comments'] / base_lines) if base_lines > 0 else 0
         raw_shit = size_penalty + complexity_penalty + coupling_penalty
         shit_score = int(raw_shit * (1.0 - min(comment_ratio, 0.4)))
@@ -108,27 +135,89 @@ def calculate_scores(stats, is_logic_lang):
     return shit_score, coder_score
 
 
-def analyze_file(file_path, lang_info):
-    """分析单个文件的各项指标"""
+def set_line_counts_only(stats, total, blank):
+    """只保留行数统计（廉价路径），清空需要深度分析的指标"""
+    stats.update({
+        'total': total, 'boilerplate': blank, 'code': total - blank,
+        'comments': 0, 'logic_lines': 0, 'imports': 0, 'import_targets': [],
+        'max_nesting': 0, 'complexity': 0, 'ast_success': False, 'is_exempt': True,
+    })
+
+
+def analyze_file(file_path, lang_info, data=None, budget=None, metrics=None):
+    """
+    分析单个文件的各项指标
+    
+    Args:
+        data: 已预读的文件内容（bytes），为 None 时自行读取
+        budget: 单文件预算（resolve_file_budget 的结果），None 使用全局预算
+        metrics: 启用的扩展指标名（已包含依赖），None 使用全局启用的指标
+    """
     lang_name, single_comments, multi_start, multi_end, is_logic = lang_info
     stats = {
         'path': file_path, 'lang': lang_name, 'is_logic': is_logic,
         'total': 0, 'code': 0, 'comments': 0, 'boilerplate': 0,
         'imports': 0, 'max_nesting': 0, 'shit_score': 0, 'coder_score': -1,
         'logic_lines': 0, 'complexity': 0, 'ast_success': False,
-        'is_exempt': False
+        'is_exempt': False, 'import_targets': [], 'prefilter': 'source', 'tier': 'full'
     }
     
     if os.path.basename(file_path) in EXEMPT_FILES:
         stats['is_exempt'] = True
 
+    # 单文件预算：超出字节预算的文件不整体读入，流式统计行数，超时则跳过
+    budget = FILE_BUDGET if budget is None else budget
+    deadline = start_deadline(budget['ms'])
+    try:
+        if data is None:
+            stats['tier'] = tier_for_size(os.path.getsize(file_path), budget=budget)
+            if stats['tier'] == 'lines':
+                counts = count_lines_stream(file_path, deadline)
+                if counts is None:
+                    stats['tier'] = 'skipped'
+                else:
+                    set_line_counts_only(stats, *counts)
+                return stats
+            data = read_source_bytes(file_path)
+    except:
+        return stats
+
+    # 字节级预过滤：二进制跳过，压缩/生成文件只统计行数，不做解码和深度分析
+    stats['prefilter'] = classify_source_bytes(data)
+    if stats['prefilter'] != 'source':
+        if stats['prefilter'] != 'binary':
+            set_line_counts_only(stats, count_lines_bytes(data), count_blank_lines_bytes(data))
+        return stats
+    
+    # 超出行数预算的文件不做语法解析；预读/归档传入的超大内容只统计行数
+    stats['tier'] = tier_for_size(len(data), count_lines_bytes(data), budget)
+    if stats['tier'] == 'lines':
+        set_line_counts_only(stats, count_lines_bytes(data), count_blank_lines_bytes(data))
+        return stats
+    
+    try:
+        lines = decode_source_lines(data, strict=True)
+        valid_utf8 = True
+    except UnicodeDecodeError:
+        lines = decode_source_lines(data)
+        valid_utf8 = False
+
+    # 解析阶段（Python AST / 原生解析后端）无法中途打断：开始前和结束后各检查一次耗时预算，
+    # 超时则丢弃解析结果，降级为正则估算
+    if stats['tier'] == 'full' and deadline_passed(deadline):
+        stats['tier'] = 'regex'
+
     # Python 文件使用 AST 精确分析
-    if lang_name == 'Python':
-        ast_result = analyze_python_ast(file_path)
-        if ast_result['success']:
+    if lang_name == 'Python' and valid_utf8 and stats['tier'] == 'full':
+        ast_result = analyze_python_source(''.join(lines), file_path)
+        if deadline_passed(deadline):
+            stats['tier'] = 'regex'
+        elif ast_result['success']:
             stats['ast_success'] = True
             stats['complexity'] = ast_result['complexity']
             stats['imports'] = ast_result['imports']
+            stats['import_targets'] = ast_result['import_targets']
+    collect_imports = not stats['ast_success']
 
     in_script = False
     js_single, js_ms, js_me = ['//'], ['/*'], ['*/']
@@ -138,12 +227,28 @@ def analyze_file(file_path, lang_info):
     regex_cc = 1
 
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
         stats['total'] = len(lines)
         in_multiline = False
         
-        for line in lines:
+        # 其他逻辑语言：有原生解析后端时用语法树计算复杂度和嵌套
+        if is_logic and not stats['ast_success'] and stats['tier'] == 'full':
+            native = parse_with_backend(''.join(lines), lang_name)
+            if deadline_passed(deadline):
+                stats['tier'] = 'regex'
+            elif native:
+                stats['ast_success'] = True
+                stats['complexity'] = native['complexity']
+                stats['max_nesting'] = native['max_nesting']
+        
+        metric_scan = start_metric_scan(lang_name, metrics) if stats['tier'] == 'full' else None
+        # 逐行扫描是单独的阶段，重新计时
+        deadline = start_deadline(budget['ms'])
+        for line_idx, line in enumerate(lines):
+            # 超出耗时预算：放弃逐行分析，降级为只统计行数
+            if line_idx % BUDGET_CHECK_INTERVAL == 0 and deadline_passed(deadline):
+                set_line_counts_only(stats, len(lines), count_blank_lines_bytes(data))
+                stats['tier'] = 'lines'
+                return stats
             stripped = line.strip()
             
             # HTML 中的 script 标签处理
@@ -166,11 +271,15 @@ def analyze_file(file_path, lang_info):
 
             if not stripped:
                 stats['boilerplate'] += 1
+                if metric_scan:
+                    metric_scan.line('blank', line, stripped)
                 continue
             
             # 多行注释处理
             if in_multiline:
                 stats['comments'] += 1
+                if metric_scan:
+                    metric_scan.line('comment', line, stripped)
                 if any(t in line for t in curr_me):
                     in_multiline = False
                 continue
@@ -185,13 +294,23 @@ def analyze_file(file_path, lang_info):
                         in_multiline = False
                     break
             if is_m_start:
+                if metric_scan:
+                    metric_scan.line('comment', line, stripped)
                 continue
             
             # 单行注释
             if any(stripped.startswith(t) for t in curr_s):
                 stats['comments'] += 1
+                if metric_scan:
+                    metric_scan.line('comment', line, stripped)
                 continue
             
+            # 扩展指标：共享本次逐行扫描，不另外遍历文件
+            if metric_scan:
+                metric_scan.line('code', line, stripped)
+                if is_logic_line and metric_scan.token_handlers:
+                    metric_scan.code_tokens(sanitize_line(stripped, calc_lang))
+            
             # 逻辑代码行处理
             if is_logic_line:
                 stats['logic_lines'] += 1
@@ -200,9 +319,10 @@ def analyze_file(file_path, lang_info):
                     indent = get_indentation_level(line)
                     if indent > stats['max_nesting']:
                         stats['max_nesting'] = indent
+                if collect_imports:
                     regex = js_import_regex if (lang_name == 'HTML' and in_script) else import_regex
                     if regex and regex.match(stripped):
-                        unique_imports.add(stripped)
+                        unique_imports.add((stripped, 'JavaScript' if regex is js_import_regex else lang_name))
             
             if len(stripped) < 2 and stripped in '{}[]();,':
                 stats['boilerplate'] += 1
@@ -211,13 +331,28 @@ def analyze_file(file_path, lang_info):
         
         if not stats['ast_success']:
             stats['complexity'] = int(regex_cc)
+        if collect_imports:
             stats['imports'] = len(unique_imports)
+            targets = (extract_import_target(line, lang) for line, lang in sorted(unique_imports))
+            stats['import_targets'] = [target for target in targets if target]
         
         if lang_name == 'HTML' and stats['logic_lines'] >= 5:
             stats['lang'] = 'HTML+JS'
+        if metric_scan:
+            metric_scan.finish(stats)
             
         stats['shit_score'], stats['coder_score'] = calculate_scores(stats, is_logic)
     except:
         pass
     
     return stats
+
+
+def iter_source_files(root_dir, ignores=DEFAULT_IGNORES):
+    """遍历目录，逐个产出可识别语言的文件 (路径, lang_info)"""
+    for root, dirs, files in os.walk(root_dir):
+        dirs[:] = [d for d in dirs if d not in ignores]
+        for file in files:
+            ext = file.split('.')[-1].lower() if '.' in file else ''
+            if ext in LANG_DEFINITIONS:
+                yield os.path.join(root, file), LANG_DEFINITIONS[ext]
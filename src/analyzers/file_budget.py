@@ -0,0 +1,66 @@
+"""
+单文件预算
+
+限制单个文件在每个阶段消耗的资源（字节数、行数、耗时），
+超出预算的文件逐级降到更廉价的分析层级，避免一个病态文件拖住整次扫描：
+- full：完整分析（AST/原生解析 + 重构建议）
+- regex：正则估算复杂度，不做语法解析和代码异味扫描
+- lines：只统计行数
+- skipped：跳过
+
+文件最终所在的层级记录在统计结果的 tier 字段中，输出时一并标注。
+"""
+import time
+
+from src.config.constants import FILE_BUDGET_DEFAULTS
+
+
+# 分析层级，从最完整到最廉价
+ANALYSIS_TIERS = ('full', 'regex', 'lines', 'skipped')
+
+FILE_BUDGET = dict(FILE_BUDGET_DEFAULTS)
+
+
+def set_file_budget(max_bytes=None, max_lines=None, max_ms=None):
+    """设置单文件预算，None 表示保持当前值，0 表示不限制"""
+    FILE_BUDGET.update(resolve_file_budget(max_bytes, max_lines, max_ms))
+
+
+def resolve_file_budget(max_bytes=None, max_lines=None, max_ms=None):
+    """以当前全局预算为基础生成一份独立的预算（分析会话各自持有，None 表示沿用当前值）"""
+    budget = dict(FILE_BUDGET)
+    for key, value in (('bytes', max_bytes), ('lines', max_lines), ('ms', max_ms)):
+        if value is not None:
+            budget[key] = value
+    return budget
+
+
+def degrade_tier(tier):
+    """降到下一个更廉价的层级"""
+    idx = ANALYSIS_TIERS.index(tier)
+    return ANALYSIS_TIERS[min(idx + 1, len(ANALYSIS_TIERS) - 1)]
+
+
+def tier_for_size(size_bytes, total_lines=None, budget=None):
+    """
+    按文件大小和行数确定起始层级：超出字节预算只统计行数，超出行数预算不做语法解析
+
+    budget 为会话的预算（resolve_file_budget），不传时使用全局预算
+    """
+    budget = FILE_BUDGET if budget is None else budget
+    if budget['bytes'] and size_bytes > budget['bytes']:
+        return 'lines'
+    if budget['lines'] and total_lines is not None and total_lines > budget['lines']:
+        return 'regex'
+    return 'full'
+
+
+def start_deadline(max_ms=None):
+    """开始一个阶段的计时，返回截止时间（不限制时为 None）"""
+    max_ms = FILE_BUDGET['ms'] if max_ms is None else max_ms
+    return time.perf_counter() + max_ms / 1000.0 if max_ms else None
+
+
+def deadline_passed(deadline):
+    """是否已超过截止时间"""
+    return deadline is not None and time.perf_counter() > deadline
@@ -0,0 +1,167 @@
+"""
+输入源
+
+除磁盘目录外，直接从归档文件和 git 对象中读取源码，不解压到磁盘：
+- .tar / .tar.gz / .tgz / .tar.bz2 / .tar.xz：tarfile 流式模式逐个读取成员
+- .zip：zipfile 逐个读取成员
+- git 树：git ls-tree 列出文件，git cat-file --batch 单进程批量读取 blob
+
+所有输入源都遵循 DEFAULT_IGNORES 和扩展名映射，产出与目录扫描相同的
+((虚拟路径, lang_info), 文件内容)；虚拟路径以输入源标识为前缀，
+报告中的相对路径与解压后扫描一致。
+"""
+import os
+import tarfile
+import zipfile
+import subprocess
+
+from src.config.constants import LANG_DEFINITIONS, DEFAULT_IGNORES
+from src.analyzers.file_analyzer import iter_source_files
+from src.analyzers.prefetch_io import PREFETCH_THREADS, prefetch_files, read_file_for_analysis
+
+
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+ZIP_SUFFIXES = ('.zip',)
+
+
+def member_lang_info(rel_path, ignores=DEFAULT_IGNORES):
+    """归档/git 成员路径对应的 lang_info，被忽略的目录或未知扩展名返回 None"""
+    parts = rel_path.replace('\\', '/').strip('/').split('/')
+    if any(part in ignores for part in parts[:-1]):
+        return None
+    file_name = parts[-1]
+    ext = file_name.split('.')[-1].lower() if '.' in file_name else ''
+    return LANG_DEFINITIONS.get(ext)
+
+
+def is_archive(path):
+    """是否为支持的归档文件"""
+    lower = path.lower()
+    return os.path.isfile(path) and lower.endswith(TAR_SUFFIXES + ZIP_SUFFIXES)
+
+
+def iter_archive_files(archive_path, only=None):
+    """
+    流式读取归档中的源码文件，逐个产出 ((虚拟路径, lang_info), 内容)
+
+    Args:
+        only: 只读取这些（规范化后的）虚拟路径，None 表示全部
+
+    Raises:
+        ValueError: 归档损坏或格式不支持
+    """
+    try:
+        if archive_path.lower().endswith(ZIP_SUFFIXES):
+            with zipfile.ZipFile(archive_path) as archive:
+                for info in archive.infolist():
+                    lang_info = None if info.is_dir() else member_lang_info(info.filename)
+                    path = os.path.join(archive_path, info.filename)
+                    if lang_info and (only is None or os.path.normpath(path) in only):
+                        yield (path, lang_info), archive.read(info)
+            return
+
+        # r|* 为流式模式：按顺序读取，不需要随机访问（可处理管道和超大归档）
+        with tarfile.open(archive_path, mode='r|*') as archive:
+            for member in archive:
+                lang_info = member_lang_info(member.name) if member.isfile() else None
+                path = os.path.join(archive_path, member.name)
+                if lang_info and (only is None or os.path.normpath(path) in only):
+                    f = archive.extractfile(member)
+                    if f is not None:
+                        yield (path, lang_info), f.read()
+    except (tarfile.TarError, zipfile.BadZipFile, EOFError) as e:
+        raise ValueError(f"{archive_path}: {e}") from None
+
+
+def iter_git_tree_files(repo_dir, rev='HEAD', only=None):
+    """
+    读取 git 提交中的源码文件（不检出），逐个产出 ((虚拟路径, lang_info), 内容)
+
+    虚拟路径前缀为 <仓库目录>@<版本>；only 为需要读取的（规范化后的）虚拟路径，None 表示全部
+
+    Raises:
+        ValueError: 不是 git 仓库、版本不存在或 git 不可用
+    """
+    label = f"{repo_dir.rstrip(os.sep)}@{rev}"
+    try:
+        listing = subprocess.run(
+            ['git', '-C', repo_dir, 'ls-tree', '-r', '-z', rev],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True
+        ).stdout
+    except subprocess.CalledProcessError as e:
+        message = e.stderr.decode('utf-8', errors='replace').strip().splitlines()
+        raise ValueError(f"{label}: {message[0] if message else e}") from None
+    except OSError as e:
+        raise ValueError(f"{label}: {e}") from None
+    entries = []
+    for record in listing.split(b'\0'):
+        if not record:
+            continue
+        meta, rel_path = record.split(b'\t', 1)
+        _, obj_type, sha = meta.split()
+        rel_path = rel_path.decode('utf-8', errors='surrogateescape')
+        lang_info = member_lang_info(rel_path) if obj_type == b'blob' else None
+        if lang_info and (only is None or os.path.normpath(os.path.join(label, rel_path)) in only):
+            entries.append((rel_path, lang_info, sha))
+
+    # 单个 cat-file 进程按请求顺序返回：<sha> blob <size>\n<内容>\n
+    proc = subprocess.Popen(['git', '-C', repo_dir, 'cat-file', '--batch'],
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    try:
+        for rel_path, lang_info, sha in entries:
+            proc.stdin.write(sha + b'\n')
+            proc.stdin.flush()
+            header = proc.stdout.readline().split()
+            if len(header) < 3 or header[1] != b'blob':
+                continue
+            data = proc.stdout.read(int(header[2]))
+            proc.stdout.read(1)
+            yield (os.path.join(label, rel_path), lang_info), data
+    finally:
+        proc.stdin.close()
+        proc.stdout.close()
+        proc.wait()
+
+
+def open_input_source(root, git_rev=None, io_threads=PREFETCH_THREADS, max_file_bytes=None):
+    """
+    打开输入源
+
+    Args:
+        max_file_bytes: 单文件字节预算（超出的文件不预读），None 使用全局预算
+
+    Returns:
+        tuple: (报告用的根路径, 逐个产出 ((路径, lang_info), 内容) 的迭代器)
+    """
+    if git_rev:
+        return f"{root.rstrip(os.sep)}@{git_rev}", iter_git_tree_files(root, git_rev)
+    if is_archive(root):
+        return root, iter_archive_files(root)
+    reader = lambda path, reserve: read_file_for_analysis(path, reserve, max_file_bytes)
+    return root, prefetch_files(iter_source_files(root), threads=io_threads, reader=reader)
+
+
+def load_source_buffers(root, git_rev, paths):
+    """
+    重新读取归档或 git 输入中指定文件的内容（重构建议和克隆检测需要源码，虚拟路径无法从磁盘打开）
+
+    Args:
+        root / git_rev: 扫描时的输入源（见 open_input_source）
+        paths: 需要的虚拟路径
+
+    Returns:
+        dict: 虚拟路径 -> 内容；磁盘目录输入返回 None（直接按路径读取）
+
+    Raises:
+        ValueError: 输入源无法读取（例如合并分片时源码不在本机）
+    """
+    if not git_rev and not is_archive(root):
+        if os.path.isdir(root):
+            return None
+        raise ValueError(f"{root}: not a directory, archive or git revision")
+    wanted = {os.path.normpath(path): path for path in paths}
+    if git_rev:
+        files = iter_git_tree_files(root, git_rev, only=wanted)
+    else:
+        files = iter_archive_files(root, only=wanted)
+    return {wanted[os.path.normpath(path)]: data for (path, _), data in files}
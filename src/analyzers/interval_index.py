@@ -0,0 +1,61 @@
+"""
+函数区间索引
+
+将函数的行号区间整理为有序的基本段，每段记录覆盖它的最内层函数，
+按行号查询所属函数只需一次二分查找（O(log n)）。
+支持嵌套函数（内层优先）和启发式提取产生的交叉区间（起始行最晚者优先）。
+"""
+import heapq
+from bisect import bisect_right
+
+
+class FunctionIntervalIndex:
+    """行号 -> 最内层函数 的区间索引"""
+
+    __slots__ = ('ranges', '_seg_starts', '_owners')
+
+    def __init__(self, ranges):
+        """
+        Args:
+            ranges: [(函数名, 起始行, 结束行)]，结束行包含在区间内
+        """
+        self.ranges = list(ranges)
+        self._seg_starts = []
+        self._owners = []
+
+        breakpoints = sorted({start for _, start, _ in self.ranges} | {end + 1 for _, _, end in self.ranges})
+        order = sorted(range(len(self.ranges)), key=lambda i: self.ranges[i][1])
+        active = []  # 堆：(-起始行, 结束行, 下标)，堆顶为起始最晚（最内层）的函数
+        next_idx = 0
+        for point in breakpoints:
+            while next_idx < len(order) and self.ranges[order[next_idx]][1] <= point:
+                i = order[next_idx]
+                heapq.heappush(active, (-self.ranges[i][1], self.ranges[i][2], i))
+                next_idx += 1
+            while active and active[0][1] < point:
+                heapq.heappop(active)
+            owner = active[0][2] if active else -1
+            # 相邻且归属相同的段合并
+            if self._owners and self._owners[-1] == owner:
+                continue
+            self._seg_starts.append(point)
+            self._owners.append(owner)
+
+    def find(self, line_num):
+        """返回包含该行的最内层函数下标，不在任何函数内时返回 -1"""
+        pos = bisect_right(self._seg_starts, line_num) - 1
+        return self._owners[pos] if pos >= 0 else -1
+
+    def name_at(self, line_num):
+        """返回包含该行的最内层函数名，不在任何函数内时返回 None"""
+        idx = self.find(line_num)
+        return self.ranges[idx][0] if idx >= 0 else None
+
+    def count_by_function(self, line_nums):
+        """统计落在每个函数内的行数，返回与 ranges 对齐的计数列表"""
+        counts = [0] * len(self.ranges)
+        for line_num in line_nums:
+            idx = self.find(line_num)
+            if idx >= 0:
+                counts[idx] += 1
+        return counts
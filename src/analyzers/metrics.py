@@ -0,0 +1,235 @@
+"""
+可扩展指标插件
+
+新增指标（认知复杂度、Halstead、可维护性指数……）不再各自遍历一遍文件：
+analyze_file 的逐行扫描是唯一一次遍历，在其中向已启用的指标派发事件：
+- 行事件 on_line(kind, line, stripped)：kind 为 'code' / 'comment' / 'blank'
+- 词法事件 on_tokens(tokens)：逻辑代码行去掉字符串和注释后切分出的词法单元，
+  只有订阅了词法事件的指标启用时才切分，且每行只切分一次
+文件扫描结束后，各指标的 result(stats) 返回写入文件统计的字段。
+
+每个文件为每个指标创建一个累加器实例，状态保存在 __slots__ 中；
+用 @register_metric 注册新指标，用 enable_metrics 按名称启用（默认不启用任何指标）。
+"""
+import re
+import math
+
+
+# 已注册的指标：名称 -> 指标类（按注册顺序计算结果，后注册的指标可以使用先注册指标的字段）
+METRIC_PLUGINS = {}
+# 当前启用的指标类（按注册顺序）
+ACTIVE_METRICS = []
+
+# 通用词法切分：标识符/关键字、数字、字符串占位、多字符运算符、单字符运算符
+TOKEN_PATTERN = re.compile(
+    r'[A-Za-z_]\w*|\d[\w.]*|""|==|!=|<=|>=|&&|\|\||<<|>>|->|=>|\+\+|--|\*\*|//|[-+*/%=<>!&|^~?:.,;()\[\]{}@]'
+)
+
+
+def register_metric(metric_cls):
+    """注册指标插件（类装饰器）"""
+    METRIC_PLUGINS[metric_cls.name] = metric_cls
+    return metric_cls
+
+
+def enable_metrics(names=None):
+    """
+    按名称启用指标（自动包含依赖的指标），names 为空时全部停用
+
+    Returns:
+        list: 启用的指标名（按注册顺序）
+
+    Raises:
+        KeyError: 未注册的指标名
+    """
+    ACTIVE_METRICS[:] = resolve_metrics(names)
+    return [cls.name for cls in ACTIVE_METRICS]
+
+
+def resolve_metrics(names):
+    """
+    解析指标名（包含依赖的指标），不修改全局设置
+
+    Returns:
+        list: 指标类（按注册顺序）
+
+    Raises:
+        KeyError: 未注册的指标名
+    """
+    wanted = set()
+    pending = list(names or [])
+    while pending:
+        name = pending.pop()
+        if name not in wanted:
+            wanted.add(name)
+            pending.extend(METRIC_PLUGINS[name].requires)
+    return [cls for name, cls in METRIC_PLUGINS.items() if name in wanted]
+
+
+def active_metric_names():
+    """当前启用的指标名"""
+    return [cls.name for cls in ACTIVE_METRICS]
+
+
+def active_metric_fields():
+    """当前启用的指标写入文件统计的字段"""
+    return [field for cls in ACTIVE_METRICS for field in cls.fields]
+
+
+class Metric:
+    """
+    指标插件基类
+
+    子类声明 name、fields（写入文件统计的字段）、events（订阅的事件）和 __slots__，
+    按需实现 on_line / on_tokens，并在 result 中返回字段值。
+    """
+    __slots__ = ()
+    name = None
+    fields = ()
+    events = ()
+    requires = ()
+
+    def __init__(self, lang_name):
+        pass
+
+    def on_line(self, kind, line, stripped):
+        pass
+
+    def on_tokens(self, tokens):
+        pass
+
+    def result(self, stats):
+        return {}
+
+
+class MetricScan:
+    """单个文件的指标扫描：持有各指标的累加器，把事件派发给订阅者"""
+    __slots__ = ('metrics', 'line_handlers', 'token_handlers')
+
+    def __init__(self, lang_name, metric_classes):
+        self.metrics = [cls(lang_name) for cls in metric_classes]
+        self.line_handlers = [m.on_line for m in self.metrics if 'line' in m.events]
+        self.token_handlers = [m.on_tokens for m in self.metrics if 'token' in m.events]
+
+    def line(self, kind, line, stripped):
+        for handler in self.line_handlers:
+            handler(kind, line, stripped)
+
+    def code_tokens(self, clean_line):
+        """派发一行（已去掉字符串和注释）的词法单元"""
+        tokens = TOKEN_PATTERN.findall(clean_line)
+        for handler in self.token_handlers:
+            handler(tokens)
+
+    def finish(self, stats):
+        """依次计算各指标并写入文件统计"""
+        for metric in self.metrics:
+            stats.update(metric.result(stats))
+
+
+def start_metric_scan(lang_name, metric_names=None):
+    """
+    为文件创建指标扫描，没有启用任何指标时返回 None（逐行扫描无额外开销）
+
+    metric_names 为会话启用的指标名（已包含依赖），不传时使用全局启用的指标
+    """
+    metric_classes = ACTIVE_METRICS if metric_names is None else [METRIC_PLUGINS[name] for name in metric_names]
+    return MetricScan(lang_name, metric_classes) if metric_classes else None
+
+
+# ---------------------------------------------------------------------------
+# 内置指标
+
+# 按运算符计的关键字（其余标识符按操作数计）
+HALSTEAD_KEYWORDS = frozenset(
+    'if else elif for foreach while do switch case default break continue return try catch except '
+    'finally throw throws raise new delete class struct interface def function func fn let var const '
+    'import from in is not and or yield await async lambda with as goto match when pass'.split()
+)
+
+# 认知复杂度：结构语句（行首）及是否受嵌套加成
+COGNITIVE_STRUCTURE = re.compile(
+    r'(?:\}\s*)?(else\s+if|elif|if|else|for|foreach|while|do|switch|match|catch|except|rescue)\b'
+)
+COGNITIVE_NESTED = frozenset({'if', 'for', 'foreach', 'while', 'do', 'switch', 'match', 'catch', 'except', 'rescue'})
+COGNITIVE_BOOLEAN = re.compile(r'&&|\|\||\band\b|\bor\b')
+
+
+@register_metric
+class HalsteadMetric(Metric):
+    """Halstead 体积：(N1 + N2) × log2(n1 + n2)"""
+    __slots__ = ('operators', 'operands', 'total_operators', 'total_operands')
+    name = 'halstead'
+    fields = ('halstead_volume',)
+    events = ('token',)
+
+    def __init__(self, lang_name):
+        self.operators = set()
+        self.operands = set()
+        self.total_operators = 0
+        self.total_operands = 0
+
+    def on_tokens(self, tokens):
+        for token in tokens:
+            first = token[0]
+            if ((first.isalpha() or first == '_') and token not in HALSTEAD_KEYWORDS) or first.isdigit() or first == '"':
+                self.operands.add(token)
+                self.total_operands += 1
+            else:
+                self.operators.add(token)
+                self.total_operators += 1
+
+    def result(self, stats):
+        vocabulary = len(self.operators) + len(self.operands)
+        length = self.total_operators + self.total_operands
+        volume = length * math.log2(vocabulary) if vocabulary > 1 else 0.0
+        return {'halstead_volume': round(volume, 1)}
+
+
+@register_metric
+class CognitiveMetric(Metric):
+    """
+    认知复杂度（文本近似）
+
+    每个分支/循环结构 +1，并按缩进层级附加嵌套加成（else/elif 不加成）；
+    含布尔运算符序列的行 +1。
+    """
+    __slots__ = ('score',)
+    name = 'cognitive'
+    fields = ('cognitive_complexity',)
+    events = ('line',)
+
+    def __init__(self, lang_name):
+        self.score = 0
+
+    def on_line(self, kind, line, stripped):
+        if kind != 'code':
+            return
+        match = COGNITIVE_STRUCTURE.match(stripped)
+        if match:
+            self.score += 1
+            if match.group(1) in COGNITIVE_NESTED:
+                expanded = line.expandtabs(4)
+                self.score += max(0, (len(expanded) - len(expanded.lstrip())) // 4 - 1)
+        if COGNITIVE_BOOLEAN.search(stripped):
+            self.score += 1
+
+    def result(self, stats):
+        return {'cognitive_complexity': self.score}
+
+
+@register_metric
+class MaintainabilityMetric(Metric):
+    """可维护性指数（0~100）：(171 - 5.2 ln V - 0.23 CC - 16.2 ln LOC) × 100 / 171"""
+    __slots__ = ()
+    name = 'mi'
+    fields = ('maintainability_index',)
+    requires = ('halstead',)
+
+    def result(self, stats):
+        volume = stats.get('halstead_volume', 0)
+        loc = stats['code']
+        if volume <= 0 or loc <= 0:
+            return {'maintainability_index': 100.0}
+        raw = 171 - 5.2 * math.log(volume) - 0.23 * stats['complexity'] - 16.2 * math.log(loc)
+        return {'maintainability_index': round(max(0.0, raw * 100 / 171), 1)}
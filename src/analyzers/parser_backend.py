@@ -0,0 +1,252 @@
+"""
+可插拔的语法解析后端
+
+Python 之外的语言默认使用 CC_PATTERNS 关键字正则逐行估算复杂度、
+LANG_EXTRACTORS 正则定位函数边界，注释和字符串中的关键字会被误计。
+本模块定义解析后端接口：安装了 tree-sitter 语法库时，一次原生解析即可得到
+文件级圈复杂度、嵌套深度以及每个函数的边界、复杂度和嵌套；
+未安装时 get_parser_backend 返回 None，调用方回退到原有的正则路径。
+
+可通过环境变量 TYPELINEAS_PARSER=regex 强制使用正则路径。
+"""
+import os
+import importlib
+
+
+# 语言名 -> tree-sitter 语法名
+GRAMMAR_NAMES = {
+    'JavaScript': 'javascript', 'React': 'javascript',
+    'TypeScript': 'typescript', 'React TS': 'tsx',
+    'Java': 'java', 'C': 'c', 'C++': 'cpp', 'C/C++ Header': 'cpp', 'C++ Header': 'cpp',
+    'C#': 'c_sharp', 'Go': 'go', 'Rust': 'rust', 'Kotlin': 'kotlin', 'Kotlin Script': 'kotlin',
+    'PHP': 'php', 'Lua': 'lua', 'Ruby': 'ruby',
+}
+
+# 语法名 -> 独立语法包中的 language 函数名（默认为 language）
+GRAMMAR_ENTRY_POINTS = {
+    'typescript': ('tree_sitter_typescript', 'language_typescript'),
+    'tsx': ('tree_sitter_typescript', 'language_tsx'),
+    'php': ('tree_sitter_php', 'language_php'),
+}
+
+# 函数定义节点
+FUNCTION_NODE_TYPES = {
+    'function_declaration', 'function_definition', 'function_item', 'method_declaration',
+    'method_definition', 'constructor_declaration', 'generator_function_declaration',
+    'arrow_function', 'function_expression', 'method', 'singleton_method',
+}
+
+# 判定节点：每个 +1 圈复杂度
+DECISION_NODE_TYPES = {
+    'if_statement', 'if_expression', 'elif_clause', 'elseif_statement', 'if_let_expression',
+    'for_statement', 'for_in_statement', 'enhanced_for_statement', 'for_expression',
+    'for_range_loop', 'foreach_statement', 'while_statement', 'while_expression',
+    'loop_expression', 'do_statement', 'repeat_statement',
+    'switch_case', 'case_statement', 'switch_section', 'expression_case', 'type_case',
+    'communication_case', 'match_arm', 'when_entry', 'catch_clause', 'rescue',
+    'conditional_expression', 'ternary_expression',
+}
+
+# 增加嵌套层级的控制结构
+NESTING_NODE_TYPES = {
+    'if_statement', 'if_expression', 'if_let_expression', 'for_statement', 'for_in_statement',
+    'enhanced_for_statement', 'for_expression', 'for_range_loop', 'foreach_statement',
+    'while_statement', 'while_expression', 'loop_expression', 'do_statement', 'repeat_statement',
+    'switch_statement', 'switch_expression', 'expression_switch_statement', 'type_switch_statement',
+    'select_statement', 'match_expression', 'when_expression', 'try_statement', 'try_expression',
+}
+
+# 可能包含逻辑运算符的二元表达式节点
+BINARY_NODE_TYPES = {'binary_expression', 'logical_expression', 'binary_operator', 'boolean_operator'}
+LOGICAL_OPERATORS = {'&&', '||', 'and', 'or', '??'}
+
+# 不需要深入遍历的叶子类节点（注释、字符串）
+SKIP_NODE_TYPES = {
+    'comment', 'line_comment', 'block_comment', 'string', 'string_literal', 'template_string',
+    'raw_string_literal', 'interpreted_string_literal', 'char_literal', 'character_literal',
+}
+
+# 函数名可能所在的声明器节点
+DECLARATOR_NAME_TYPES = {'identifier', 'field_identifier', 'qualified_identifier', 'destructor_name', 'operator_name'}
+
+
+class ParserBackend:
+    """语法解析后端接口"""
+    name = 'base'
+
+    def supports(self, lang_name):
+        """是否能解析该语言"""
+        return False
+
+    def parse(self, content, lang_name):
+        """
+        解析源码
+
+        Returns:
+            dict: complexity（文件级圈复杂度）、max_nesting（最大嵌套层级）、
+                  functions（[{name, line, end_line, length, complexity, nesting}]）；
+                  解析失败返回 None
+        """
+        return None
+
+
+def node_text(node):
+    """获取节点源码文本"""
+    return node.text.decode('utf-8', errors='ignore') if node is not None and node.text else ''
+
+
+def function_name(node):
+    """提取函数节点的名称；匿名函数取其被赋值的变量/属性名，无名时返回 None"""
+    name_node = node.child_by_field_name('name')
+    if name_node is not None:
+        return node_text(name_node)
+
+    # C/C++：名称嵌套在 declarator 链中
+    declarator = node.child_by_field_name('declarator')
+    while declarator is not None and declarator.type not in DECLARATOR_NAME_TYPES:
+        declarator = declarator.child_by_field_name('declarator')
+    if declarator is not None:
+        return node_text(declarator)
+
+    # 匿名函数：const foo = () => {} / foo: function() {} / obj.foo = function() {}
+    parent = node.parent
+    if parent is not None:
+        for field in ('name', 'key', 'left'):
+            target = parent.child_by_field_name(field)
+            if target is not None and target.id != node.id:
+                return node_text(target)
+    return None
+
+
+def is_logical_operation(node):
+    """二元表达式是否为逻辑运算（&& || and or）"""
+    return any(not child.is_named and child.type in LOGICAL_OPERATORS for child in node.children)
+
+
+def is_else_if(node):
+    """else if 链中的 if 不额外增加嵌套层级"""
+    parent = node.parent
+    return (node.type in ('if_statement', 'if_expression') and parent is not None
+            and parent.type in ('else_clause', 'if_statement', 'if_expression'))
+
+
+class TreeSitterBackend(ParserBackend):
+    """基于 tree-sitter 的原生解析后端（可选依赖）"""
+    name = 'tree-sitter'
+
+    def __init__(self):
+        self._parsers = {}
+
+    def _load_parser(self, grammar):
+        """加载语法解析器：优先独立语法包 tree_sitter_<lang>，其次语法合集包"""
+        try:
+            from tree_sitter import Language, Parser
+        except ImportError:
+            return None
+        module_name, entry = GRAMMAR_ENTRY_POINTS.get(grammar, (f'tree_sitter_{grammar}', 'language'))
+        try:
+            module = importlib.import_module(module_name)
+            language = Language(getattr(module, entry)())
+            try:
+                return Parser(language)
+            except TypeError:
+                parser = Parser()
+                parser.set_language(language)
+                return parser
+        except:
+            pass
+        for bundle in ('tree_sitter_language_pack', 'tree_sitter_languages'):
+            try:
+                return importlib.import_module(bundle).get_parser(grammar)
+            except:
+                continue
+        return None
+
+    def _get_parser(self, lang_name):
+        grammar = GRAMMAR_NAMES.get(lang_name)
+        if not grammar:
+            return None
+        if grammar not in self._parsers:
+            self._parsers[grammar] = self._load_parser(grammar)
+        return self._parsers[grammar]
+
+    def supports(self, lang_name):
+        return self._get_parser(lang_name) is not None
+
+    def parse(self, content, lang_name):
+        parser = self._get_parser(lang_name)
+        if parser is None:
+            return None
+        try:
+            tree = parser.parse(content.encode('utf-8'))
+        except:
+            return None
+
+        complexity = 1
+        max_nesting = 0
+        functions = []
+        # 显式栈迭代遍历：(节点, 当前嵌套层级, 所属函数下标)
+        stack = [(tree.root_node, 0, -1)]
+        while stack:
+            node, depth, owner = stack.pop()
+            node_type = node.type
+            if node_type in SKIP_NODE_TYPES:
+                continue
+
+            if node_type in FUNCTION_NODE_TYPES:
+                name = function_name(node)
+                if name:
+                    start_line = node.start_point[0] + 1
+                    end_line = node.end_point[0] + 1
+                    functions.append({
+                        'name': name, 'line': start_line, 'end_line': end_line,
+                        'length': end_line - start_line, 'complexity': 1, 'nesting': 0,
+                    })
+                    owner = len(functions) - 1
+                    depth = 0
+            elif node_type in DECISION_NODE_TYPES or (node_type in BINARY_NODE_TYPES and is_logical_operation(node)):
+                complexity += 1
+                if owner >= 0:
+                    functions[owner]['complexity'] += 1
+
+            if node_type in NESTING_NODE_TYPES and not is_else_if(node):
+                depth += 1
+                max_nesting = max(max_nesting, depth)
+                if owner >= 0 and depth > functions[owner]['nesting']:
+                    functions[owner]['nesting'] = depth
+
+            for child in reversed(node.named_children):
+                stack.append((child, depth, owner))
+
+        functions.sort(key=lambda f: f['line'])
+        return {'complexity': complexity, 'max_nesting': max_nesting, 'functions': functions}
+
+
+# 已注册的解析后端，按优先级排列
+PARSER_BACKENDS = [TreeSitterBackend()]
+
+
+def register_parser_backend(backend, first=True):
+    """注册自定义解析后端（默认优先于已有后端）"""
+    if first:
+        PARSER_BACKENDS.insert(0, backend)
+    else:
+        PARSER_BACKENDS.append(backend)
+
+
+def get_parser_backend(lang_name):
+    """获取能解析该语言的后端，没有可用后端时返回 None（调用方回退到正则路径）"""
+    if os.environ.get('TYPELINEAS_PARSER', '').lower() == 'regex':
+        return None
+    for backend in PARSER_BACKENDS:
+        if backend.supports(lang_name):
+            return backend
+    return None
+
+
+def parse_with_backend(content, lang_name):
+    """使用可用的原生后端解析源码，不可用或解析失败时返回 None"""
+    backend = get_parser_backend(lang_name)
+    if backend is None:
+        return None
+    return backend.parse(content, lang_name)
@@ -0,0 +1,145 @@
+"""
+预读 I/O 层
+
+网络文件系统（NFS 等）上逐个 stat()/open() 的往返延迟会让扫描大部分时间都在等 I/O。
+本模块用线程池提前并发读取后续文件的内容，与 CPU 密集的分析阶段重叠：
+- 结果严格按输入顺序返回，输出与串行读取一致
+- 在途文件数有上限；读取线程打开文件后按 fstat 大小预留字节，已预留但尚未被消费
+  （含正在读取）的字节数有上限，避免慢速文件系统上大量读取同时在途时预读占满内存。
+  stat 在读取线程中完成，元数据往返与其他文件的读取并发，不在消费方线程中串行等待
+- 超出单文件字节预算的文件不预读，交给分析阶段的流式路径处理
+
+读取函数可以替换（例如注入带延迟的读取函数模拟慢速文件系统）。
+"""
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from src.analyzers.file_budget import FILE_BUDGET
+
+
+# 默认预读线程数和在途字节上限
+PREFETCH_THREADS = 8
+PREFETCH_MAX_BYTES = 64 * 1024 * 1024
+
+
+def read_file_for_analysis(file_path, reserve=None, max_bytes=None):
+    """
+    读取单个文件（在线程池中执行）
+
+    Args:
+        reserve: 预留字节的回调，读取前以文件大小调用（见 ByteReservations）
+        max_bytes: 单文件字节预算，None 使用全局预算
+
+    Returns:
+        bytes: 文件内容；超出字节预算或读取失败时返回 None（由分析阶段自行处理）
+    """
+    limit = FILE_BUDGET['bytes'] if max_bytes is None else max_bytes
+    try:
+        with open(file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if limit and size > limit:
+                return None
+            if reserve is not None:
+                reserve(size)
+            return f.read()
+    except OSError:
+        return None
+
+
+class ByteReservations:
+    """
+    读取线程按提交顺序预留字节
+
+    第 seq 个文件要等前面的文件都完成预留，并且已预留未消费的字节数加上本文件不超过上限
+    （没有任何预留时，超出上限的单个文件也放行）。消费方按顺序释放，线程池按提交顺序开始任务，
+    因此最早未消费的文件总能完成预留，不会死锁。
+    """
+    __slots__ = ('limit', 'reserved', 'next_seq', 'closed', 'cond')
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.reserved = 0
+        self.next_seq = 0
+        self.closed = False
+        self.cond = threading.Condition()
+
+    def acquire(self, seq, size):
+        with self.cond:
+            self.cond.wait_for(lambda: self.closed or (
+                self.next_seq == seq and (self.reserved == 0 or self.reserved + size <= self.limit)))
+            self.reserved += size
+            self.next_seq += 1
+            self.cond.notify_all()
+
+    def release(self, size):
+        with self.cond:
+            self.reserved -= size
+            self.cond.notify_all()
+
+    def close(self):
+        """消费方提前结束：放行所有等待中的读取线程"""
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+
+def _prefetch_task(reader, reservations, seq, path):
+    """读取任务：返回 (内容, 预留字节数)；读取函数没有预留（跳过或失败）时也要按顺序登记"""
+    reserved = []
+
+    def reserve(size):
+        if not reserved:
+            reservations.acquire(seq, size)
+            reserved.append(size)
+
+    try:
+        data = reader(path, reserve)
+    finally:
+        reserve(0)
+    return data, reserved[0]
+
+
+def prefetch_files(items, threads=PREFETCH_THREADS, max_bytes=PREFETCH_MAX_BYTES, reader=read_file_for_analysis):
+    """
+    按顺序产出 (item, 文件内容)，后台线程提前读取后续文件
+
+    Args:
+        items: 可迭代的 (路径, ...) 元组，第一个元素为文件路径
+        threads: 预读线程数，<= 0 时在当前线程中顺序读取
+        max_bytes: 已预留但尚未被消费的字节上限（没有其他预留时超出上限的单个文件仍会读取）
+        reader: 读取函数 (path, reserve) -> bytes 或 None，读取内容前以文件大小调用 reserve
+    """
+    if threads <= 0:
+        for item in items:
+            yield item, reader(item[0], None)
+        return
+
+    items = iter(items)
+    window = deque()  # [(item, future)]，按输入顺序
+    max_pending = threads * 4
+    reservations = ByteReservations(max_bytes)
+    seq = 0
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        try:
+            while True:
+                # 补充预读窗口：在途文件数有上限，字节数由读取线程预留时限制
+                while len(window) < max_pending:
+                    item = next(items, None)
+                    if item is None:
+                        break
+                    window.append((item, pool.submit(_prefetch_task, reader, reservations, seq, item[0])))
+                    seq += 1
+                if not window:
+                    break
+                item, future = window.popleft()
+                data, size = future.result()
+                yield item, data
+                # 消费方取下一个文件时才释放：上一个文件的内容此前仍在使用
+                reservations.release(size)
+        finally:
+            # 提前结束（生成器关闭或异常）：撤销未开始的读取，放行等待预留的线程
+            for _, future in window:
+                future.cancel()
+            reservations.close()
@@ -2,118 +2,280 @@
 Python AST 复杂度分析器
 
 使用 AST 精确计算 Python 文件的圈复杂度。
+一次显式栈迭代遍历，按 type(node) 查表分派，同时收集文件级指标
+（圈复杂度、import、docstring）、函数级指标（行号、长度、复杂度、控制结构嵌套、参数个数）
+和语法层面的代码异味位置（裸 except、print 调用、魔法数字），不受字符串和注释干扰。
+相同内容的文件可复用按内容哈希缓存的语法树和分析结果。
 """
 import ast
+import hashlib
+from collections import OrderedDict
 
 
-class ComplexityVisitor(ast.NodeVisitor):
-    """遍历 Python AST 计算圈复杂度、import 数量和 docstring 数量"""
-    
-    def __init__(self):
-        self.complexity = 1
-        self.imports = 0
-        self.docstrings = 0
-
-    def visit_If(self, node): 
-        self.complexity += 1
-        self.generic_visit(node)
-    
-    def visit_For(self, node): 
-        self.complexity += 1
-        self.generic_visit(node)
-    
-    def visit_AsyncFor(self, node): 
-        self.complexity += 1
-        self.generic_visit(node)
-    
-    def visit_While(self, node): 
-        self.complexity += 1
-        self.generic_visit(node)
-    
-    def visit_Try(self, node): 
-        self.complexity += len(node.handlers)
-        self.generic_visit(node)
-    
-    def visit_FunctionDef(self, node): 
-        if ast.get_docstring(node): 
-            self.docstrings += 1
-        self.generic_visit(node)
-    
-    def visit_AsyncFunctionDef(self, node):
-        if ast.get_docstring(node): 
-            self.docstrings += 1
-        self.generic_visit(node)
-    
-    def visit_ClassDef(self, node):
-        if ast.get_docstring(node): 
-            self.docstrings += 1
-        self.generic_visit(node)
-    
-    def visit_Import(self, node): 
-        self.imports += len(node.names)
-        self.generic_visit(node)
-    
-    def visit_ImportFrom(self, node): 
-        self.imports += len(node.names)
-        self.generic_visit(node)
-    
-    def visit_BoolOp(self, node): 
-        self.complexity += (len(node.values) - 1)
-        self.generic_visit(node)
-    
-    # Python 3.10+ match/case 
-    def visit_Match(self, node):
-        # 每个 match 独立计算：≤3 case 基础 +1，>3 case 每个 +0.5
-        case_count = len(node.cases)
-        if case_count <= 3:
-            self.complexity += 1
-        else:
-            self.complexity += case_count * 0.5
-        self.generic_visit(node)
-    
-    # 三元表达式 x = a if b else c
-    def visit_IfExp(self, node):
-        self.complexity += 1
-        self.generic_visit(node)
-    
-    # 推导式：隐含循环和条件
-    def visit_ListComp(self, node):
-        # 每个 for 子句 +1，每个 if 过滤 +1
-        for generator in node.generators:
-            self.complexity += 1 + len(generator.ifs)
-        self.generic_visit(node)
-    
-    def visit_SetComp(self, node):
-        for generator in node.generators:
-            self.complexity += 1 + len(generator.ifs)
-        self.generic_visit(node)
-    
-    def visit_DictComp(self, node):
-        for generator in node.generators:
-            self.complexity += 1 + len(generator.ifs)
-        self.generic_visit(node)
-    
-    def visit_GeneratorExp(self, node):
-        for generator in node.generators:
-            self.complexity += 1 + len(generator.ifs)
-        self.generic_visit(node)
-
-
-def analyze_python_ast(file_path):
+# 缓存容量：语法树占用内存较大，分析结果很小
+AST_TREE_CACHE_SIZE = 64
+AST_RESULT_CACHE_SIZE = 4096
+
+_tree_cache = OrderedDict()
+_result_cache = OrderedDict()
+_fields_cache = {}
+
+
+def _one(node):
+    return 1
+
+
+def _try_cc(node):
+    return len(node.handlers)
+
+
+def _bool_op_cc(node):
+    return len(node.values) - 1
+
+
+def _match_cc(node):
+    # 每个 match 独立计算：≤3 case 基础 +1，>3 case 每个 +0.5
+    case_count = len(node.cases)
+    return 1 if case_count <= 3 else case_count * 0.5
+
+
+def _comprehension_cc(node):
+    # 推导式：每个 for 子句 +1，每个 if 过滤 +1
+    return sum(1 + len(generator.ifs) for generator in node.generators)
+
+
+# 圈复杂度分派表：节点类型 -> 复杂度增量
+COMPLEXITY_HANDLERS = {
+    ast.If: _one, ast.For: _one, ast.AsyncFor: _one, ast.While: _one,
+    ast.IfExp: _one,  # 三元表达式 x = a if b else c
+    ast.Try: _try_cc,
+    ast.BoolOp: _bool_op_cc,
+    ast.ListComp: _comprehension_cc, ast.SetComp: _comprehension_cc,
+    ast.DictComp: _comprehension_cc, ast.GeneratorExp: _comprehension_cc,
+}
+if hasattr(ast, 'Match'):  # Python 3.10+ match/case
+    COMPLEXITY_HANDLERS[ast.Match] = _match_cc
+
+AST_FUNCTION_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+# 增加控制结构嵌套层级的语句
+AST_NESTING_TYPES = {ast.If, ast.For, ast.AsyncFor, ast.While, ast.Try, ast.With, ast.AsyncWith}
+if hasattr(ast, 'Match'):
+    AST_NESTING_TYPES.add(ast.Match)
+if hasattr(ast, 'TryStar'):
+    AST_NESTING_TYPES.add(ast.TryStar)
+
+# 需要检查代码异味的节点类型
+AST_SMELL_TYPES = {ast.ExceptHandler, ast.Call, ast.Constant, ast.Assign, ast.AnnAssign}
+# 绝对值不小于此值的数字字面量视为魔法数字（与文本扫描的"两位及以上数字"一致）
+MAGIC_NUMBER_MIN = 10
+# 不计入参数个数的首个参数
+IMPLICIT_PARAMS = {'self', 'cls'}
+
+# 遍历时跳过的字段（上下文标记不含子节点）
+SKIP_FIELDS = {'ctx', 'type_comment'}
+
+
+def _child_fields(node_type):
+    """获取节点类型需要遍历的字段（按类型缓存）"""
+    fields = _fields_cache.get(node_type)
+    if fields is None:
+        fields = tuple(f for f in node_type._fields if f not in SKIP_FIELDS)
+        _fields_cache[node_type] = fields
+    return fields
+
+
+def _import_targets(node):
+    """提取 import 目标：相对导入保留前导点号；from a import b 记为 a.b，解析时可回退到 a"""
+    if type(node) is ast.Import:
+        return [alias.name for alias in node.names]
+    base = '.' * node.level + (node.module or '')
+    sep = '.' if node.module else ''
+    targets = [base + sep + alias.name for alias in node.names if alias.name != '*']
+    if any(alias.name == '*' for alias in node.names):
+        targets.append(base)
+    return targets
+
+
+def _param_count(args):
+    """函数参数个数（含 *args/**kwargs，不含 self/cls）"""
+    positional = args.posonlyargs + args.args
+    count = len(positional) + len(args.kwonlyargs) + (args.vararg is not None) + (args.kwarg is not None)
+    if positional and positional[0].arg in IMPLICIT_PARAMS:
+        count -= 1
+    return count
+
+
+def _named_constant(node):
+    """赋值给全大写名称的数字字面量（命名常量的定义本身不是魔法数字），返回该字面量节点"""
+    targets = node.targets if type(node) is ast.Assign else [node.target]
+    if not all(type(target) is ast.Name and target.id.isupper() for target in targets):
+        return None
+    value = node.value
+    if type(value) is ast.UnaryOp and type(value.op) is ast.USub:
+        value = value.operand
+    return value if type(value) is ast.Constant else None
+
+
+def run_ast_engine(tree):
+    """
+    单次迭代遍历 AST，收集文件级和函数级指标
+
+    Returns:
+        dict: complexity、imports、docstrings、import_targets、
+              functions（[{name, line, end_line, length, complexity, nesting, params}]，按行号排序）、
+              smells（bare_except / print_debug / magic_number -> 行号列表）
+    """
+    complexity = 1
+    imports = 0
+    docstrings = 1 if ast.get_docstring(tree) else 0
+    import_targets = []
+    functions = []
+    smells = {'bare_except': [], 'print_debug': [], 'magic_number': []}
+    named_constants = set()
+    handlers = COMPLEXITY_HANDLERS
+
+    # 显式栈：(节点, 所属函数下标, 当前函数内的控制结构嵌套层级)
+    stack = [(tree, -1, 0)]
+    while stack:
+        node, owner, depth = stack.pop()
+        node_type = type(node)
+
+        handler = handlers.get(node_type)
+        if handler is not None:
+            increment = handler(node)
+            complexity += increment
+            if owner >= 0:
+                functions[owner]['complexity'] += increment
+        elif node_type in AST_FUNCTION_TYPES:
+            if ast.get_docstring(node):
+                docstrings += 1
+            end_line = getattr(node, 'end_lineno', None) or node.lineno
+            functions.append({
+                'name': node.name, 'line': node.lineno, 'end_line': end_line,
+                'length': end_line - node.lineno, 'complexity': 1, 'nesting': 0,
+                'params': _param_count(node.args),
+            })
+            owner = len(functions) - 1
+            depth = 0
+        elif node_type is ast.ClassDef:
+            if ast.get_docstring(node):
+                docstrings += 1
+        elif node_type is ast.Import or node_type is ast.ImportFrom:
+            imports += len(node.names)
+            import_targets.extend(_import_targets(node))
+        elif node_type in AST_SMELL_TYPES:
+            if node_type is ast.Constant:
+                value = node.value
+                if ((type(value) is int or type(value) is float) and abs(value) >= MAGIC_NUMBER_MIN
+                        and id(node) not in named_constants):
+                    smells['magic_number'].append(node.lineno)
+            elif node_type is ast.Call:
+                func = node.func
+                if type(func) is ast.Name and func.id == 'print':
+                    smells['print_debug'].append(node.lineno)
+            elif node_type is ast.ExceptHandler:
+                if node.type is None:
+                    smells['bare_except'].append(node.lineno)
+            else:
+                constant = _named_constant(node)
+                if constant is not None:
+                    named_constants.add(id(constant))
+
+        if node_type in AST_NESTING_TYPES:
+            depth += 1
+            if owner >= 0 and depth > functions[owner]['nesting']:
+                functions[owner]['nesting'] = depth
+
+        children = []
+        for field in _child_fields(node_type):
+            value = getattr(node, field, None)
+            if type(value) is list:
+                for item in value:
+                    if isinstance(item, ast.AST):
+                        children.append((item, owner, depth))
+            elif isinstance(value, ast.AST):
+                children.append((value, owner, depth))
+        # elif 链不额外增加嵌套
+        if node_type is ast.If and len(node.orelse) == 1 and type(node.orelse[0]) is ast.If:
+            children[-1] = (node.orelse[0], owner, depth - 1)
+        children.reverse()
+        stack.extend(children)
+
+    for func in functions:
+        func['complexity'] = int(func['complexity'] + 0.5)
+    functions.sort(key=lambda f: f['line'])
+    for lines in smells.values():
+        lines.sort()
+    return {
+        'complexity': int(complexity + 0.5),  # 向上取整
+        'imports': imports,
+        'docstrings': docstrings,
+        'import_targets': import_targets,
+        'functions': functions,
+        'smells': smells,
+    }
+
+
+def _content_key(content):
+    return hashlib.blake2b(content.encode('utf-8', errors='surrogatepass'), digest_size=16).digest()
+
+
+def _cache_put(cache, key, value, max_size):
+    cache[key] = value
+    if len(cache) > max_size:
+        cache.popitem(last=False)
+
+
+def parse_python_source(content, filename='<unknown>'):
+    """直接调用 compile 生成 AST（PyCF_ONLY_AST，不继承调用方的 __future__ 标志）"""
+    return compile(content, filename, 'exec', ast.PyCF_ONLY_AST, dont_inherit=True)
+
+
+def parse_python_cached(content, filename='<unknown>'):
+    """按内容哈希复用已解析的语法树（LRU）"""
+    key = _content_key(content)
+    tree = _tree_cache.get(key)
+    if tree is None:
+        tree = parse_python_source(content, filename)
+        _cache_put(_tree_cache, key, tree, AST_TREE_CACHE_SIZE)
+    else:
+        _tree_cache.move_to_end(key)
+    return tree
+
+
+def analyze_python_source(content, filename='<unknown>', reuse_tree=False):
+    """
+    分析 Python 源码，结果按内容哈希缓存
+
+    Args:
+        content: 源码文本
+        filename: 用于语法错误信息的文件名
+        reuse_tree: 是否把语法树放入 LRU 缓存供后续复用
+
+    Returns:
+        dict: 同 run_ast_engine，另含 success 字段；解析失败时为 {'success': False}
+    """
+    key = _content_key(content)
+    result = _result_cache.get(key)
+    if result is not None:
+        _result_cache.move_to_end(key)
+        return result
+    try:
+        tree = parse_python_cached(content, filename) if reuse_tree else parse_python_source(content, filename)
+        result = run_ast_engine(tree)
+        result['success'] = True
+    except:
+        result = {'success': False}
+    _cache_put(_result_cache, key, result, AST_RESULT_CACHE_SIZE)
+    return result
+
+
+def analyze_python_ast(file_path, reuse_tree=False):
     """使用 AST 精确分析 Python 文件的复杂度"""
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
-        tree = ast.parse(content)
-        visitor = ComplexityVisitor()
-        if ast.get_docstring(tree):
-            visitor.docstrings += 1
-        visitor.visit(tree)
-        return {
-            'success': True, 
-            'complexity': int(visitor.complexity + 0.5),  # 向上取整
-            'imports': visitor.imports, 
-            'docstrings': visitor.docstrings
-        }
     except:
         return {'success': False}
+    return analyze_python_source(content, file_path, reuse_tree=reuse_tree)
@@ -6,9 +6,19 @@
 """
 import os
 import re
+import hashlib
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
 
 from src.config.colors import Colors
 from src.config.i18n import t
+from src.analyzers.python_ast import analyze_python_source
+from src.analyzers.byte_prefilter import decode_source_lines
+from src.analyzers.parser_backend import parse_with_backend
+from src.analyzers.interval_index import FunctionIntervalIndex
+from src.analyzers.file_budget import FILE_BUDGET, start_deadline, deadline_passed
+from src.analyzers.smell_rules import SMELL_RULES, match_rule_literals, rules_generation
+from src.analyzers.scheduler import create_worker_pool
 
 
 # 问题诊断阈值
@@ -20,6 +30,7 @@ THRESHOLDS = {
     'low_comment_ratio': 0.05,
     'long_function': 50,        # 函数超过此行数
     'long_line': 120,           # 行超过此字符数
+    'long_param_list': 6,       # 参数超过此个数（Python 语法树，不含 self/cls）
 }
 
 # 启发式代码模式检测
@@ -86,6 +97,33 @@ CODE_SMELLS = {
     },
 }
 
+# 异味预过滤触发字面量：对应异味正则能够匹配的必要条件
+# 文件中不出现触发字面量的异味不会运行完整正则
+SMELL_TRIGGERS = {
+    'deep_nesting': r'^(?:\t{5}|[ ]{20})',
+    'magic_number': r'\d',
+    'long_param_list': r'def|function|func|public|private|protected',
+    'duplicate_string': r'["\']',
+    'print_debug': r'(?i:print|console\.log|var_dump|dd)',
+    'todo_fixme': r'(?i:todo|fixme|xxx|hack|bug)',
+    'bare_except': r'except',
+    'hardcoded_path': r':\\|/(?:home|usr|var|etc|opt|tmp)/',
+    'commented_code': r'#|//',
+}
+_smell_prefilter_cache = {}
+
+# 热点函数记录阈值：行数或圈复杂度超过其一
+HOTSPOT_MIN_LENGTH = 30
+HOTSPOT_MIN_COMPLEXITY = 10
+# 热点函数的复杂度关键字
+HOTSPOT_KEYWORDS = re.compile(r'\b(if|else|elif|for|while|switch|case|catch|except|try|and|or|&&|\|\|)\b')
+
+# Python 文件由语法树直接给出的异味（不再运行对应的文本正则）
+PY_AST_SMELLS = ('bare_except', 'print_debug', 'magic_number', 'long_param_list')
+
+# 函数定义行（Python 风格，用于异味扫描中的函数范围）
+PY_FUNCTION_PATTERN = re.compile(r'^(    )*def\s+(\w+)\s*\(', re.MULTILINE)
+
 # 多语言函数/类提取模式（用命名捕获组提取函数名）
 LANG_EXTRACTORS = {
     'Python': {
@@ -197,21 +235,35 @@ REFACTOR_SUGGESTIONS = {
 }
 
 
-def analyze_function_complexity(file_path, lang_name):
+def read_source_text(file_path, data=None):
+    """
+    读取源码文本（忽略非法 UTF-8 字节，通用换行转换）
+
+    Args:
+        data: 内存中的文件内容（归档 / git 输入的虚拟路径无法从磁盘打开），为 None 时读取文件
+    """
+    if data is not None:
+        return ''.join(decode_source_lines(data))
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        return f.read()
+
+
+def analyze_function_complexity(file_path, lang_name, content=None):
     """
     分析文件中各函数/类的复杂度热点
     
     Args:
         file_path: 文件路径
         lang_name: 语言名称
+        content: 已读取的源码文本，为 None 时读取文件
         
     Returns:
         dict: 包含 functions 和 classes 的复杂度分析结果
     """
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-            lines = content.split('\n')
+        if content is None:
+            content = read_source_text(file_path)
+        lines = content.split('\n')
     except:
         return {'functions': [], 'classes': []}
     
@@ -223,18 +275,39 @@ def analyze_function_complexity(file_path, lang_name):
                 extractor = LANG_EXTRACTORS.get('JavaScript' if 'React' in lang_name else key)
                 break
     
-    if not extractor:
+    # Python 复用 AST 引擎的函数级指标（按内容哈希缓存，通常不会重复解析）；
+    # 其他语言有原生解析后端时，函数边界、复杂度和嵌套直接取自语法树
+    if lang_name == 'Python':
+        py_result = analyze_python_source(content, file_path)
+        native = py_result if py_result['success'] else None
+    else:
+        native = parse_with_backend(content, lang_name)
+    
+    if not extractor and not native:
         return {'functions': [], 'classes': []}
+    extractor = extractor or {}
     
     result = {'functions': [], 'classes': []}
+    if native:
+        result['functions'] = [
+            {key: func[key] for key in ('name', 'line', 'length', 'complexity', 'nesting')}
+            for func in native['functions'] if func['length'] > HOTSPOT_MIN_LENGTH or func['complexity'] > HOTSPOT_MIN_COMPLEXITY
+        ]
+    
+    # 行起始偏移和复杂度关键字位置：函数所在行号、任意行区间的关键字数都用二分查找得到
+    line_starts = build_line_starts(lines)
     
-    # 复杂度关键字模式
-    complexity_keywords = re.compile(r'\b(if|else|elif|for|while|switch|case|catch|except|try|and|or|&&|\|\|)\b')
+    def keywords_in_lines(first_line, last_line):
+        """第 first_line 到 last_line 行（含）中的复杂度关键字数"""
+        lo = line_starts[first_line - 1]
+        hi = line_starts[last_line] if last_line < len(line_starts) else len(content) + 1
+        return bisect_left(keyword_positions, hi) - bisect_left(keyword_positions, lo)
     
     # 提取函数
-    func_pattern = extractor.get('function')
+    func_pattern = extractor.get('function') if not native else None
     if func_pattern:
         func_matches = list(func_pattern.finditer(content))
+        keyword_positions = [m.start() for m in HOTSPOT_KEYWORDS.finditer(content)]
         
         for i, match in enumerate(func_matches):
             # 获取函数名（优先从命名捕获组获取）
@@ -248,7 +321,7 @@ def analyze_function_complexity(file_path, lang_name):
                 continue
             
             start_pos = match.start()
-            start_line = content[:start_pos].count('\n') + 1
+            start_line = bisect_right(line_starts, start_pos)
             
             # 估算函数结束位置
             if extractor.get('indent_based'):
@@ -273,12 +346,18 @@ def analyze_function_complexity(file_path, lang_name):
                     scan_end = func_matches[i + 1].start()
                 else:
                     scan_end = len(content)
+                end_line = bisect_right(line_starts, scan_end)  # 默认用扫描上界
+                
+                # 廉价上界：函数不会越过扫描天花板，其行数和关键字数都不超过到天花板为止的整段；
+                # 上界都达不到记录阈值的函数（如大量短小的 getter/setter）直接跳过大括号扫描
+                if (end_line - start_line <= HOTSPOT_MIN_LENGTH
+                        and keywords_in_lines(start_line, end_line) + 1 <= HOTSPOT_MIN_COMPLEXITY):
+                    continue
                 
                 brace_count = 0
                 in_string = False
                 string_char = None
                 escaped = False
-                end_line = content[:scan_end].count('\n') + 1  # 默认用扫描上界
                 
                 for char_idx in range(match.start(), scan_end):
                     char = content[char_idx]
@@ -311,15 +390,13 @@ def analyze_function_complexity(file_path, lang_name):
                         brace_count -= 1
                         if brace_count == 0:
                             # 找到函数结束位置
-                            end_line = content[:char_idx + 1].count('\n') + 1
+                            end_line = bisect_right(line_starts, char_idx)
                             break
             
             func_len = end_line - start_line
-            func_body = '\n'.join(lines[start_line-1:end_line])
             
-            # 计算函数内复杂度
-            cc_matches = complexity_keywords.findall(func_body)
-            func_cc = len(cc_matches) + 1
+            # 计算函数内复杂度（关键字不跨行，按整行区间计数与在函数体文本上匹配一致）
+            func_cc = keywords_in_lines(start_line, end_line) + 1
             
             # 计算最大嵌套（简化）
             max_indent = 0
@@ -328,7 +405,7 @@ def analyze_function_complexity(file_path, lang_name):
                     indent_level = (len(line) - len(line.lstrip())) // 4
                     max_indent = max(max_indent, indent_level)
             
-            if func_len > 30 or func_cc > 10:  # 只记录可能有问题的函数
+            if func_len > HOTSPOT_MIN_LENGTH or func_cc > HOTSPOT_MIN_COMPLEXITY:  # 只记录可能有问题的函数
                 result['functions'].append({
                     'name': func_name,
                     'line': start_line,
@@ -344,7 +421,7 @@ def analyze_function_complexity(file_path, lang_name):
         for match in class_matches:
             groups = [g for g in match.groups() if g and not g.isspace()]
             class_name = groups[-1] if groups else 'unknown'
-            start_line = content[:match.start()].count('\n') + 1
+            start_line = bisect_right(line_starts, match.start())
             result['classes'].append({
                 'name': class_name,
                 'line': start_line,
@@ -375,75 +452,153 @@ def merge_line_ranges(line_nums):
     return ranges
 
 
-def find_function_for_line(line_num, func_ranges):
-    """根据行号查找所属函数名"""
-    for func_name, start, end in func_ranges:
-        if start <= line_num <= end:
-            return func_name
-    return None
+def build_line_starts(lines):
+    """计算每行起始偏移（行号 n 对应下标 n-1），用于二分查找匹配位置所在行"""
+    return list(accumulate((len(line) + 1 for line in lines[:-1]), initial=0))
 
 
-def get_function_ranges(content):
+def line_at(line_starts, pos):
+    """将字符偏移转换为行号（从 1 开始）"""
+    return bisect_right(line_starts, pos)
+
+
+def get_function_ranges(content, line_starts=None):
     """获取文件中所有函数的行号范围"""
-    lines = content.split('\n')
-    func_pattern = re.compile(r'^(    )*def\s+(\w+)\s*\(', re.MULTILINE)
-    func_matches = list(func_pattern.finditer(content))
+    if line_starts is None:
+        line_starts = build_line_starts(content.split('\n'))
+    func_matches = list(PY_FUNCTION_PATTERN.finditer(content))
     
     ranges = []
     for i, match in enumerate(func_matches):
         func_name = match.group(2)
-        start_line = content[:match.start()].count('\n') + 1
+        start_line = line_at(line_starts, match.start())
         if i + 1 < len(func_matches):
-            end_line = content[:func_matches[i+1].start()].count('\n')
+            end_line = line_at(line_starts, func_matches[i+1].start()) - 1
         else:
-            end_line = len(lines)
+            end_line = len(line_starts)
         ranges.append((func_name, start_line, end_line))
     return ranges
 
 
-def scan_code_smells(file_path):
+def get_smell_prefilter(smell_keys):
+    """获取指定异味集合的合并预过滤模式（按集合缓存编译结果）"""
+    cache_key = frozenset(smell_keys)
+    pattern = _smell_prefilter_cache.get(cache_key)
+    if pattern is None:
+        # 每种异味一个命名组，包在零宽前瞻中，使同一位置的多种触发字面量互不吞并
+        alternatives = [f'(?=(?P<{key}>{SMELL_TRIGGERS[key]}))' for key in CODE_SMELLS if key in cache_key]
+        pattern = re.compile('|'.join(alternatives), re.MULTILINE)
+        _smell_prefilter_cache[cache_key] = pattern
+    return pattern
+
+
+def prefilter_smells(content, exclude=()):
+    """
+    字面量预过滤：一次遍历找出文件中可能存在的异味种类
+
+    每发现一种异味的触发字面量，就将其从合并模式中移除并从当前位置继续搜索，
+    因此总扫描量约为一遍文件；未出现触发字面量的异味无需运行完整正则。
+    exclude 中的异味由其他途径检测，不参与预过滤。
+    """
+    remaining = {key for key, info in CODE_SMELLS.items()
+                 if not info.get('skip') and info.get('pattern') and key not in exclude}
+    present = set()
+    pos = 0
+    while remaining:
+        match = get_smell_prefilter(remaining).search(content, pos)
+        if not match:
+            break
+        present.add(match.lastgroup)
+        remaining.discard(match.lastgroup)
+        pos = match.start()
+    return present
+
+
+def python_ast_smells(content, file_path):
+    """
+    从 Python 语法树获取异味位置和函数范围（复用 AST 引擎按内容缓存的结果）
+
+    Returns:
+        tuple: (异味 -> 行号列表, 函数范围列表)；语法错误时返回 None
+    """
+    py_result = analyze_python_source(content, file_path)
+    if not py_result['success']:
+        return None
+    smell_lines = dict(py_result['smells'])
+    functions = py_result['functions']
+    smell_lines['long_param_list'] = [f['line'] for f in functions if f['params'] > THRESHOLDS['long_param_list']]
+    return smell_lines, [(f['name'], f['line'], f['end_line']) for f in functions]
+
+
+def scan_code_smells(file_path, deadline=None, lang_name=None, content=None):
     """
     启发式扫描代码异味
     
+    先用合并的字面量预过滤确定可能存在的异味，只对这些异味运行完整正则验证；
+    行号通过预先计算的行起始偏移二分查找，函数范围只计算一次，
+    同时供深度嵌套归属和过长函数检测使用。
+    Python 文件的裸 except、print、魔法数字、过长参数列表和函数范围直接取自语法树。
+    内置异味之后运行适用于该语言的自定义规则。
+    
     Args:
         file_path: 文件路径
+        deadline: 耗时预算的截止时间，超过后不再扫描剩余的异味类型
+        lang_name: 语言名称
+        content: 已读取的源码文本，为 None 时读取文件
         
     Returns:
         list: 检测到的代码异味列表 [(smell_name, count, line_samples)]
     """
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-            lines = content.split('\n')
+        if content is None:
+            content = read_source_text(file_path)
+        lines = content.split('\n')
     except:
         return []
     
     smells = []
+    line_starts = build_line_starts(lines)
+    
+    ast_smells = python_ast_smells(content, file_path) if lang_name == 'Python' else None
+    if ast_smells:
+        ast_lines, func_ranges = ast_smells
+        present = prefilter_smells(content, exclude=PY_AST_SMELLS) | {k for k in PY_AST_SMELLS if ast_lines[k]}
+    else:
+        ast_lines, func_ranges = {}, get_function_ranges(content, line_starts)
+        present = prefilter_smells(content)
     
-    # 获取函数范围（用于深度嵌套的函数定位）
-    func_ranges = get_function_ranges(content)
+    # 函数区间索引（用于深度嵌套的函数定位和过长函数检测）
+    func_index = FunctionIntervalIndex(func_ranges)
     
     # 检测各种代码异味
     for smell_key, smell_info in CODE_SMELLS.items():
-        # 跳过标记了 skip 的项或没有 pattern 的项
-        if smell_info.get('skip') or not smell_info.get('pattern'):
+        if smell_key not in present:
+            continue
+        if smell_key in ast_lines:
+            smells.append({
+                'key': smell_key,
+                'name': smell_info['name'],
+                'count': len(ast_lines[smell_key]),
+                'lines': ast_lines[smell_key][:5],
+                'all_lines': ast_lines[smell_key],
+                'suggestion': smell_info.get('suggestion', ''),
+            })
             continue
+        if deadline_passed(deadline):
+            break
         pattern = smell_info['pattern']
         matches = list(pattern.finditer(content))
         
         if matches:
             # 深度嵌套特殊处理：按函数分组并合并行号
             if smell_key == 'deep_nesting':
-                all_line_nums = []
-                for match in matches:
-                    line_num = content[:match.start()].count('\n') + 1
-                    all_line_nums.append(line_num)
+                all_line_nums = [line_at(line_starts, match.start()) for match in matches]
                 
                 # 按函数分组
                 func_groups = {}
                 global_lines = []
                 for ln in all_line_nums:
-                    func_name = find_function_for_line(ln, func_ranges)
+                    func_name = func_index.name_at(ln)
                     if func_name:
                         func_groups.setdefault(func_name, []).append(ln)
                     else:
@@ -463,25 +618,24 @@ def scan_code_smells(file_path):
                     'name': smell_info['name'],
                     'count': len(matches),
                     'lines': all_line_nums[:5],  # 保留原始行号用于兼容
+                    'all_lines': all_line_nums,
                     'formatted_lines': formatted_lines[:5],  # 新增格式化的位置
                     'suggestion': smell_info.get('suggestion', ''),
                 })
             else:
                 # 普通代码异味处理
-                line_nums = []
-                for match in matches[:5]:
-                    start = match.start()
-                    line_num = content[:start].count('\n') + 1
-                    line_nums.append(line_num)
-                
+                line_nums = [line_at(line_starts, match.start()) for match in matches]
                 smells.append({
                     'key': smell_key,
                     'name': smell_info['name'],
                     'count': len(matches),
-                    'lines': line_nums,
+                    'lines': line_nums[:5],
+                    'all_lines': line_nums,
                     'suggestion': smell_info.get('suggestion', ''),
                 })
     
+    smells.extend(scan_rule_smells(content, lines, line_starts, lang_name, deadline))
+    
     # 检测长行
     long_lines = [(i+1, len(line)) for i, line in enumerate(lines) if len(line) > THRESHOLDS['long_line']]
     if long_lines:
@@ -490,22 +644,16 @@ def scan_code_smells(file_path):
             'name': f'过长代码行 (>{THRESHOLDS["long_line"]}字符)',
             'count': len(long_lines),
             'lines': [ln for ln, _ in long_lines[:5]],
+            'all_lines': [ln for ln, _ in long_lines],
             'suggestion': '拆分或格式化',
         })
     
-    # 检测函数长度
-    func_pattern = re.compile(r'^(    )*def\s+(\w+)\s*\(', re.MULTILINE)
-    func_matches = list(func_pattern.finditer(content))
+    # 检测函数长度（复用函数范围）
     long_funcs = []
-    for i, match in enumerate(func_matches):
-        start_line = content[:match.start()].count('\n') + 1
-        if i + 1 < len(func_matches):
-            end_line = content[:func_matches[i+1].start()].count('\n')
-        else:
-            end_line = len(lines)
+    for func_name, start_line, end_line in func_index.ranges:
         func_len = end_line - start_line
         if func_len > THRESHOLDS['long_function']:
-            long_funcs.append((match.group(2), start_line, func_len))
+            long_funcs.append((func_name, start_line, func_len))
     
     if long_funcs:
         smells.append({
@@ -513,6 +661,7 @@ def scan_code_smells(file_path):
             'name': f'过长函数 (>{THRESHOLDS["long_function"]}行)',
             'count': len(long_funcs),
             'lines': [ln for _, ln, _ in long_funcs[:3]],
+            'all_lines': [ln for _, ln, _ in long_funcs],
             'suggestion': '拆分为多个小函数',
             'details': [(name, length) for name, _, length in long_funcs[:3]],
         })
@@ -520,6 +669,60 @@ def scan_code_smells(file_path):
     return smells
 
 
+def scan_rule_smells(content, lines, line_starts, lang_name, deadline=None):
+    """
+    运行自定义异味规则（见 smell_rules）
+    
+    一次字面量扫描确定出现过触发字面量的规则；行级规则只在字面量所在行上运行完整正则，
+    文件级规则和无字面量的规则在整个文件上运行。
+    
+    Returns:
+        list: 与内置异味相同结构的检测结果（按规则注册顺序）
+    """
+    hits = match_rule_literals(content, lang_name)
+    smells = []
+    for key, rule in SMELL_RULES.items():
+        if key not in hits:
+            continue
+        if deadline_passed(deadline):
+            break
+        pattern = rule['pattern']
+        positions = hits[key]
+        if positions is None or rule['scope'] == 'file':
+            line_nums = [line_at(line_starts, match.start()) for match in pattern.finditer(content)]
+        else:
+            line_nums = []
+            for ln in sorted({line_at(line_starts, pos) for pos in positions}):
+                line_nums.extend([ln] * sum(1 for _ in pattern.finditer(lines[ln - 1])))
+        if line_nums:
+            smells.append({
+                'key': key,
+                'name': rule['name'],
+                'count': len(line_nums),
+                'lines': line_nums[:5],
+                'all_lines': line_nums,
+                'suggestion': rule['suggestion'],
+            })
+    return smells
+
+
+def count_smells_by_function(smells, functions):
+    """
+    统计每个热点函数体内的异味数量
+    
+    Returns:
+        list: 与 functions 对齐的异味计数（函数级异味 long_function 不计入）
+    """
+    index = FunctionIntervalIndex((f['name'], f['line'], f['line'] + f['length']) for f in functions)
+    counts = [0] * len(functions)
+    for smell in smells:
+        if smell['key'] == 'long_function':
+            continue
+        for i, count in enumerate(index.count_by_function(smell.get('all_lines', smell['lines']))):
+            counts[i] += count
+    return counts
+
+
 def diagnose_file(stats):
     """诊断单个文件的统计问题"""
     problems = []
@@ -553,8 +756,162 @@ def diagnose_file(stats):
     return problems
 
 
-def generate_report(stats, include_smells=True):
-    """生成单个文件的重构建议报告"""
+EMPTY_ADVICE = {'hotspots': {'functions': [], 'classes': []}, 'smells': [], 'truncated': False}
+
+
+class AdviceStore:
+    """
+    重构建议结果缓存：控制台输出和报告导出共用，每个文件只扫描一次
+
+    由分析会话（或批量扫描）持有，不同会话互不影响。每个路径只保留最近一次的结果，
+    并记录其对应的 (内容标识, 耗时预算, 规则版本)：文件被修改（大小或修改时间变化）、
+    预算或自定义规则变化后，旧结果不再返回。
+    归档和 git 输入的虚拟路径无法从磁盘读取，其内容由 add_sources 登记，以内容哈希作为标识。
+    """
+    __slots__ = ('entries', 'max_ms', 'sources')
+
+    def __init__(self, max_ms=None):
+        self.entries = {}
+        # None 表示使用全局预算
+        self.max_ms = max_ms
+        # 虚拟路径 -> (内容, 内容哈希)
+        self.sources = {}
+
+    def budget_ms(self):
+        return FILE_BUDGET['ms'] if self.max_ms is None else self.max_ms
+
+    def add_sources(self, buffers):
+        """登记内存中的文件内容（虚拟路径 -> bytes）"""
+        for path, data in buffers.items():
+            self.sources[path] = (data, hashlib.blake2b(data, digest_size=16).digest())
+
+    def source(self, path):
+        """登记的文件内容，磁盘文件返回 None"""
+        entry = self.sources.get(path)
+        return entry[0] if entry is not None else None
+
+    def version(self, path):
+        """缓存条目的版本：文件无法访问时返回 None（不缓存）"""
+        entry = self.sources.get(path)
+        if entry is not None:
+            return (len(entry[0]), entry[1], self.budget_ms(), rules_generation())
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns, self.budget_ms(), rules_generation())
+
+    def get(self, path, version):
+        entry = self.entries.get(path)
+        if entry is not None and version is not None and entry[0] == version:
+            return entry[1]
+        return None
+
+    def put(self, path, version, advice):
+        if version is not None:
+            self.entries[path] = (version, advice)
+
+    def clear(self):
+        """清空缓存和登记的文件内容（批量扫描切换仓库时调用）"""
+        self.entries.clear()
+        self.sources.clear()
+
+
+def needs_advice(stats, problems):
+    """廉价过滤：Shit Score 过低且没有统计问题的文件不输出建议，无需扫描源码"""
+    return stats['shit_score'] >= 5 or bool(problems)
+
+
+def compute_file_advice(file_path, lang_name, max_ms=None, data=None):
+    """
+    扫描文件的热点函数和代码异味
+    
+    Args:
+        data: 内存中的文件内容（归档 / git 输入），为 None 时读取文件
+
+    Returns:
+        dict: hotspots、smells，以及 truncated（超出耗时预算，异味扫描不完整）
+    """
+    deadline = start_deadline(max_ms)
+    content = read_source_text(file_path, data) if data is not None else None
+    hotspots = analyze_function_complexity(file_path, lang_name, content)
+    smells = scan_code_smells(file_path, deadline, lang_name, content)
+    return {'hotspots': hotspots, 'smells': smells, 'truncated': deadline_passed(deadline)}
+
+
+def get_file_advice(stats, store):
+    """获取文件的热点函数和代码异味（同一缓存中每个文件只扫描一次）"""
+    if stats.get('tier', 'full') != 'full':
+        # 超出预算降级的文件不做源码扫描
+        return EMPTY_ADVICE
+    path = stats['path']
+    version = store.version(path)
+    advice = store.get(path, version)
+    if advice is None:
+        advice = compute_file_advice(path, stats.get('lang', 'Python'), store.budget_ms(), store.source(path))
+        store.put(path, version, advice)
+    return advice
+
+
+def _advice_task(task):
+    """进程池任务包装（必须是模块级函数才能被 pickle）"""
+    file_path, lang_name, max_ms, data = task
+    return compute_file_advice(file_path, lang_name, max_ms, data)
+
+
+def iter_file_advice(stats_list, jobs=1, pool=None, store=None):
+    """
+    按输入顺序逐个产出 (stats, advice)
+    
+    Args:
+        stats_list: 需要生成建议的文件统计列表
+        jobs: 进程数，<= 1 时串行执行；并行时结果仍按输入顺序流式返回，
+              调用方可以在前面的文件完成后立即输出，不必等待全部完成
+        pool: 调用方共享的进程池（批量扫描多个仓库时复用），不传时按 jobs 临时创建
+        store: 结果缓存（AdviceStore），不传时只在本次调用内有效
+    """
+    if store is None:
+        store = AdviceStore()
+    pending = {}
+    for s in stats_list:
+        path = s['path']
+        if s.get('tier', 'full') == 'full' and path not in pending:
+            version = store.version(path)
+            if store.get(path, version) is None:
+                pending[path] = (s.get('lang', 'Python'), version)
+    if len(pending) <= 1 or (pool is None and jobs <= 1):
+        for stats in stats_list:
+            yield stats, get_file_advice(stats, store)
+        return
+    
+    # 预算（以及归档 / git 输入的文件内容）随任务传入，子进程不依赖继承的全局设置
+    max_ms = store.budget_ms()
+    tasks = [(path, lang_name, max_ms, store.source(path)) for path, (lang_name, _) in pending.items()]
+    # 小块分发：保证按顺序输出时前面的结果能尽早返回
+    chunksize = max(1, len(tasks) // (max(1, jobs) * 16))
+    if pool is not None:
+        yield from _ordered_advice(stats_list, pending, pool.map(_advice_task, tasks, chunksize=chunksize), store)
+        return
+    with create_worker_pool(jobs) as own_pool:
+        yield from _ordered_advice(stats_list, pending, own_pool.map(_advice_task, tasks, chunksize=chunksize), store)
+
+
+def _ordered_advice(stats_list, pending, results, store):
+    """按输入顺序合并进程池结果与已缓存的建议（pending 中的路径按提交顺序各取一次结果）"""
+    computed = {}
+    for stats in stats_list:
+        path = stats['path']
+        if path in pending:
+            if path not in computed:
+                computed[path] = next(results)
+                store.put(path, pending[path][1], computed[path])
+            yield stats, computed[path]
+        else:
+            yield stats, get_file_advice(stats, store)
+
+
+def generate_report(stats, include_smells=True, store=None):
+    """生成单个文件的重构建议报告（store 为会话的重构建议缓存）"""
     problems = diagnose_file(stats)
     lines = []
     
@@ -567,16 +924,20 @@ def generate_report(stats, include_smells=True):
             lines.append(f"    {Colors.CYAN}{suggestion}{Colors.ENDC}")
     
     # 函数级复杂度热点
-    lang_name = stats.get('lang', 'Python')
-    hotspots = analyze_function_complexity(stats['path'], lang_name)
+    advice = get_file_advice(stats, store if store is not None else AdviceStore())
+    hotspots = advice['hotspots']
+    smells = advice['smells'] if include_smells else []
+    top_funcs = hotspots['functions'][:3]  # 最多显示3个
+    smell_counts = count_smells_by_function(smells, top_funcs)
     
     if hotspots['functions']:
         lines.append(f"\n  {Colors.FAIL}▼ 复杂度热点函数:{Colors.ENDC}")
-        for func in hotspots['functions'][:3]:  # 最多显示3个
+        for func, smell_count in zip(top_funcs, smell_counts):
             cc_color = Colors.FAIL if func['complexity'] > 15 else Colors.WARNING
+            smell_note = f", 异味{smell_count}处" if smell_count else ''
             lines.append(
                 f"    {cc_color}🔥 {func['name']}(){Colors.ENDC} "
-                f"[L{func['line']}] CC={func['complexity']}, {func['length']}行, 嵌套{func['nesting']}层"
+                f"[L{func['line']}] CC={func['complexity']}, {func['length']}行, 嵌套{func['nesting']}层{smell_note}"
             )
             # 针对具体问题给建议
             if func['complexity'] > 20:
@@ -586,9 +947,11 @@ def generate_report(stats, include_smells=True):
             elif func['nesting'] > 4:
                 lines.append(f"      {Colors.CYAN}└ 使用 Guard Clauses 提前返回{Colors.ENDC}")
     
+    if include_smells and advice['truncated']:
+        lines.append(f"\n  {Colors.WARNING}⏱ {t('advice_truncated')}{Colors.ENDC}")
+    
     # 代码异味扫描
     if include_smells:
-        smells = scan_code_smells(stats['path'])
         if smells:
             lines.append(f"\n  {Colors.PURPLE}▼ 代码异味检测:{Colors.ENDC}")
             for smell in smells[:3]:  # 最多显示3种异味
@@ -613,13 +976,13 @@ def generate_report(stats, include_smells=True):
     return '\n'.join(lines) if lines else None
 
 
-def print_refactor_advice(top_files, root_dir):
-    """打印 Top N 文件的重构建议"""
+def print_refactor_advice(top_files, root_dir, store=None):
+    """打印 Top N 文件的重构建议（store 为会话的重构建议缓存，报告导出时复用）"""
     print(f"\n{Colors.PURPLE}{Colors.BOLD}=== {t('refactor_advisor')} ==={Colors.ENDC}")
     
     has_advice = False
     for stats in top_files[:5]:
-        report = generate_report(stats, include_smells=True)
+        report = generate_report(stats, include_smells=True, store=store)
         if report:
             has_advice = True
             rel_path = os.path.relpath(stats['path'], root_dir)
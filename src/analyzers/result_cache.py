@@ -0,0 +1,46 @@
+"""
+跨运行的结果缓存
+
+以 JSON 文件形式保存可复用的中间结果（如依赖图），按项目根目录区分。
+缓存目录默认为 ~/.cache/typelineas，可用环境变量 TYPELINEAS_CACHE_DIR 覆盖。
+缓存读写失败时静默降级为不使用缓存，不影响分析结果。
+"""
+import os
+import json
+import hashlib
+
+
+def get_cache_dir():
+    """获取缓存目录路径"""
+    return os.environ.get('TYPELINEAS_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'typelineas')
+
+
+def cache_file_path(root_dir, name):
+    """计算指定项目、指定缓存名对应的缓存文件路径"""
+    root_key = hashlib.blake2b(os.path.abspath(root_dir).encode('utf-8'), digest_size=8).hexdigest()
+    return os.path.join(get_cache_dir(), f"{name}-{root_key}.json")
+
+
+def load_cache(root_dir, name):
+    """读取缓存，不存在或损坏时返回 None"""
+    try:
+        with open(cache_file_path(root_dir, name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except:
+        return None
+
+
+def save_cache(root_dir, name, data):
+    """写入缓存（先写临时文件再原子替换，避免并发运行读到半截文件）"""
+    path = cache_file_path(root_dir, name)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+    except:
+        try:
+            os.remove(tmp_path)
+        except:
+            pass
@@ -0,0 +1,186 @@
+"""
+抽样估算
+
+超大仓库只需要近似的项目代码质量指数和分语言统计时，
+按（语言, 文件大小量级）分层抽样分析一部分文件，再外推全量结果：
+- 各语言的行数、代码、注释、耦合等总量：分层总量估计（N_h × 样本均值）
+- 项目代码质量指数（按代码行加权的平均分）：分层比率估计
+
+误差按分层抽样方差（含有限总体校正）给出 95% 置信区间。
+"""
+import os
+import math
+import random
+from collections import defaultdict
+
+from src.config.colors import Colors
+from src.config.i18n import t
+from src.analyzers.file_analyzer import analyze_file, iter_source_files
+from src.analyzers.prefetch_io import prefetch_files
+from src.reporters.table_render import pad_to_width
+
+
+# 95% 置信区间的正态分位数
+CONFIDENCE_Z = 1.96
+# 每层至少抽取的文件数（少于此数的层全部分析）
+MIN_STRATUM_SAMPLE = 2
+# 分语言汇总的指标
+SAMPLE_METRICS = ('total', 'code', 'comments', 'imports', 'boilerplate', 'cc')
+
+
+def size_bucket(size_bytes):
+    """文件大小量级（按 2 的幂分档）"""
+    return max(0, size_bytes).bit_length()
+
+
+def stratified_sample(candidates, fraction, seed=0):
+    """
+    按（语言, 大小量级）分层抽样
+
+    Args:
+        candidates: [(路径, lang_info, 文件大小)]
+        fraction: 抽样比例
+        seed: 随机种子（保证结果可复现）
+
+    Returns:
+        dict: 层键 -> (层内文件总数, 抽中的候选列表)
+    """
+    strata = defaultdict(list)
+    for candidate in candidates:
+        strata[(candidate[1][0], size_bucket(candidate[2]))].append(candidate)
+
+    rng = random.Random(seed)
+    sampled = {}
+    for key in sorted(strata):
+        members = strata[key]
+        n = min(len(members), max(MIN_STRATUM_SAMPLE, int(round(len(members) * fraction))))
+        sampled[key] = (len(members), rng.sample(members, n))
+    return sampled
+
+
+def _stratum_variance(values, population):
+    """分层总量估计在单层内的方差贡献：N² (1 - n/N) s² / n"""
+    n = len(values)
+    if n < 2 or n >= population:
+        return 0.0
+    mean = sum(values) / n
+    s2 = sum((v - mean) ** 2 for v in values) / (n - 1)
+    return population * population * (1 - n / population) * s2 / n
+
+
+def _file_metrics(stats):
+    """单个文件参与汇总的指标，被预过滤跳过的文件计为 0"""
+    if stats['prefilter'] == 'binary' or stats['tier'] == 'skipped':
+        return None
+    return {
+        'total': stats['total'], 'code': stats['code'], 'comments': stats['comments'],
+        'imports': stats['imports'], 'boilerplate': stats['boilerplate'], 'cc': stats['complexity'],
+    }
+
+
+def estimate_project(candidates, fraction, seed=0):
+    """
+    抽样分析并外推项目统计
+
+    Returns:
+        dict: languages（语言 -> {files, 各指标: (估计值, 置信半径)}）、
+              index（(质量指数估计, 置信半径) 或 None）、sampled、population
+    """
+    sampled = stratified_sample(candidates, fraction, seed)
+    lang_totals = defaultdict(lambda: defaultdict(float))
+    lang_variances = defaultdict(lambda: defaultdict(float))
+    lang_files = defaultdict(float)
+    index_strata = []
+    sampled_count = 0
+
+    # 全部样本只做一次预读（一个线程池，层与层之间不排空），结果再按层归类
+    strata = list(sampled.items())
+    items = [(path, lang_info, idx) for idx, (_, (_, members)) in enumerate(strata) for path, lang_info, _ in members]
+    analyzed = [[] for _ in strata]
+    for (path, lang_info, idx), data in prefetch_files(items):
+        analyzed[idx].append(analyze_file(path, lang_info, data))
+
+    for ((lang_name, _), (population, members)), stratum_stats in zip(strata, analyzed):
+        sampled_count += len(members)
+        per_metric = defaultdict(list)
+        kept = 0
+        weighted, weights = [], []
+        for stats in stratum_stats:
+            metrics = _file_metrics(stats)
+            eligible = metrics is not None and stats['coder_score'] >= 0 and not stats['is_exempt']
+            weighted.append(stats['coder_score'] * stats['code'] if eligible else 0)
+            weights.append(stats['code'] if eligible else 0)
+            if metrics is None:
+                metrics = dict.fromkeys(SAMPLE_METRICS, 0)
+            else:
+                kept += 1
+            for key in SAMPLE_METRICS:
+                per_metric[key].append(metrics[key])
+
+        scale = population / len(members)
+        lang_files[lang_name] += kept * scale
+        for key in SAMPLE_METRICS:
+            lang_totals[lang_name][key] += sum(per_metric[key]) * scale
+            lang_variances[lang_name][key] += _stratum_variance(per_metric[key], population)
+        index_strata.append((population, weighted, weights))
+
+    languages = {}
+    for lang_name, totals in lang_totals.items():
+        languages[lang_name] = {'files': int(round(lang_files[lang_name]))}
+        for key in SAMPLE_METRICS:
+            languages[lang_name][key] = (totals[key], CONFIDENCE_Z * math.sqrt(lang_variances[lang_name][key]))
+
+    # 比率估计：R = Σ N_h ȳ_h / Σ N_h x̄_h，方差用残差 d = y - R x 线性化
+    y_hat = sum(p * sum(w) / len(w) for p, w, _ in index_strata)
+    x_hat = sum(p * sum(x) / len(x) for p, _, x in index_strata)
+    index = None
+    if x_hat > 0:
+        ratio = y_hat / x_hat
+        variance = sum(
+            _stratum_variance([y - ratio * x for y, x in zip(w, xs)], p) for p, w, xs in index_strata
+        ) / (x_hat * x_hat)
+        index = (ratio, CONFIDENCE_Z * math.sqrt(variance))
+
+    return {'languages': languages, 'index': index, 'sampled': sampled_count, 'population': len(candidates)}
+
+
+def collect_candidates(root_dir):
+    """遍历目录，收集待分析文件及其大小（只读取 stat 信息）"""
+    candidates = []
+    for path, lang_info in iter_source_files(root_dir):
+        try:
+            candidates.append((path, lang_info, os.path.getsize(path)))
+        except OSError:
+            continue
+    return candidates
+
+
+def format_estimate(value, margin):
+    """格式化为 估计值±置信半径"""
+    return f"{int(round(value))}±{int(round(margin))}" if margin >= 0.5 else str(int(round(value)))
+
+
+def print_sample_estimate(estimate):
+    """打印抽样估算结果"""
+    col_widths = [12, 8, 16, 16, 16, 12, 8]
+    print(f"{Colors.CYAN}{t('sample_mode')}: {t('sampled_files')} {estimate['sampled']} / {estimate['population']} "
+          f"({t('confidence_interval')}){Colors.ENDC}")
+    print("-" * 96)
+    headers = [t('language'), t('files'), t('lines'), t('code'), t('comments'), t('coupling'), t('avg_cc')]
+    print(' '.join(pad_to_width(h, w) for h, w in zip(headers, col_widths)))
+    print("-" * 96)
+    languages = estimate['languages']
+    grand = {'total': 0.0, 'boilerplate': 0.0}
+    for lang_name, s in sorted(languages.items(), key=lambda x: x[1]['code'][0], reverse=True):
+        avg_cc = f"{s['cc'][0] / s['files']:.1f}" if s['files'] > 0 and s['cc'][0] > 0 else "-"
+        row = [lang_name, s['files']] + [format_estimate(*s[k]) for k in ('total', 'code', 'comments', 'imports')] + [avg_cc]
+        print(f"{Colors.BOLD}{pad_to_width(row[0], col_widths[0])}{Colors.ENDC} " + ' '.join(pad_to_width(row[i], col_widths[i]) for i in range(1, len(row))))
+        grand['total'] += s['total'][0]
+        grand['boilerplate'] += s['boilerplate'][0]
+    print("-" * 96)
+    if estimate['index']:
+        score, margin = estimate['index']
+        low, high = max(0, score - margin), min(100, score + margin)
+        print(f"{t('project_coder_index')}: {int(score)} / 100 ({t('confidence_interval')}: {low:.1f} ~ {high:.1f})")
+    if grand['total'] > 0:
+        print(f"{t('total_lines')}: ~{int(round(grand['total']))} | {t('boilerplate')}: {(grand['boilerplate'] / grand['total'] * 100):.1f}%")
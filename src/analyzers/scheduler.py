@@ -0,0 +1,221 @@
+"""
+并行任务调度
+
+并行扫描的总耗时取决于最后完成的那个进程：如果一个 80 MB 的生成文件最后才被领取，
+其余进程早已空闲。本模块按预估耗时调度：
+- 预估耗时来自遍历时的文件大小；上次运行记录过耗时的文件改用历史耗时（换算为字节当量）
+- 任务从大到小分发，分批大小随剩余工作量递减（guided scheduling）：
+  大文件单独成批尽早开始，小文件合并成批减少进程间通信，收尾阶段批次越来越小
+- 默认进程数取可用 CPU（亲和性和 cgroup CPU 配额）与 cgroup 内存上限可容纳进程数的较小值
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from src.analyzers.file_budget import FILE_BUDGET, set_file_budget
+from src.analyzers.result_cache import load_cache, save_cache
+from src.analyzers.metrics import enable_metrics, active_metric_names
+from src.analyzers.smell_rules import SMELL_RULES, set_smell_rules
+
+
+# 每个进程平均领取的批次数（越大收尾越均衡，进程间通信越多）
+CHUNKS_PER_WORKER = 8
+# 单批最多文件数
+MAX_CHUNK_FILES = 256
+# 单个分析进程的基础内存和按单文件字节预算估算的峰值倍数
+WORKER_BASE_MEMORY = 64 * 1024 * 1024
+WORKER_MEMORY_FACTOR = 8
+# cgroup 中表示"不限制"的内存上限下界
+CGROUP_UNLIMITED = 1 << 60
+# cgroup 文件系统挂载点
+CGROUP_ROOT = '/sys/fs/cgroup'
+
+TIMINGS_CACHE_NAME = 'timings'
+
+
+def _read_first_line(path):
+    try:
+        with open(path, 'r') as f:
+            return f.readline().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit(root=None):
+    """
+    cgroup CPU 配额折算的 CPU 数（v2 cpu.max / v1 cfs_quota_us），不限制时返回 None
+
+    Args:
+        root: cgroup 挂载点，None 使用 CGROUP_ROOT
+    """
+    root = CGROUP_ROOT if root is None else root
+    line = _read_first_line(os.path.join(root, 'cpu.max'))
+    if line:
+        quota, _, period = line.partition(' ')
+    else:
+        quota = _read_first_line(os.path.join(root, 'cpu', 'cpu.cfs_quota_us'))
+        period = _read_first_line(os.path.join(root, 'cpu', 'cpu.cfs_period_us'))
+    try:
+        quota, period = int(quota), int(period)
+    except (TypeError, ValueError):
+        return None  # 'max' 或无法读取
+    if quota <= 0 or period <= 0:
+        return None
+    return max(1, -(-quota // period))
+
+
+def cgroup_memory_limit(root=None):
+    """cgroup 内存上限字节数（v2 memory.max / v1 limit_in_bytes），不限制时返回 None"""
+    root = CGROUP_ROOT if root is None else root
+    for path in (os.path.join(root, 'memory.max'), os.path.join(root, 'memory', 'memory.limit_in_bytes')):
+        line = _read_first_line(path)
+        if line and line.isdigit():
+            limit = int(line)
+            return limit if limit < CGROUP_UNLIMITED else None
+    return None
+
+
+def available_cpus():
+    """当前进程可用的 CPU 数"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = cgroup_cpu_limit()
+    return min(cpus, quota) if quota else cpus
+
+
+def worker_memory_estimate():
+    """单个分析进程的峰值内存估算（随单文件字节预算变化）"""
+    return max(WORKER_BASE_MEMORY, FILE_BUDGET['bytes'] * WORKER_MEMORY_FACTOR)
+
+
+def default_jobs():
+    """默认并行进程数：可用 CPU 与内存上限可容纳进程数的较小值"""
+    jobs = available_cpus()
+    memory = cgroup_memory_limit()
+    if memory:
+        jobs = min(jobs, memory // worker_memory_estimate())
+    return max(1, jobs)
+
+
+def init_worker(max_bytes, max_lines, max_ms, metric_names, smell_rules):
+    """分析进程初始化：同步单文件预算、启用的扩展指标和自定义异味规则"""
+    set_file_budget(max_bytes, max_lines, max_ms)
+    enable_metrics(metric_names)
+    set_smell_rules(smell_rules)
+
+
+def create_worker_pool(jobs, budget=None, metrics=None):
+    """
+    创建分析进程池，单文件预算、扩展指标和自定义规则通过初始化函数传给子进程，不依赖继承的全局设置
+
+    Args:
+        budget / metrics: 分析会话的预算和启用的指标名，None 使用全局设置
+    """
+    budget = FILE_BUDGET if budget is None else budget
+    metrics = active_metric_names() if metrics is None else metrics
+    return ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                               initargs=(budget['bytes'], budget['lines'], budget['ms'],
+                                         list(metrics), list(SMELL_RULES.values())))
+
+
+def estimate_costs(sizes, past_ms=None):
+    """
+    预估各任务耗时（字节当量）
+
+    Args:
+        sizes: 文件字节数
+        past_ms: 与 sizes 对齐的历史耗时（毫秒），没有记录的为 None
+
+    Returns:
+        list: 预估耗时；有历史耗时的文件按本次运行已知文件的平均吞吐换算为字节当量
+    """
+    if not past_ms:
+        return list(sizes)
+    known_bytes = known_ms = 0
+    for size, ms in zip(sizes, past_ms):
+        if ms is not None:
+            known_bytes += size
+            known_ms += ms
+    if known_ms <= 0:
+        return list(sizes)
+    bytes_per_ms = known_bytes / known_ms
+    return [ms * bytes_per_ms if ms is not None else size for size, ms in zip(sizes, past_ms)]
+
+
+def plan_chunks(costs, jobs):
+    """
+    从大到小划分批次，批次目标大小为 剩余工作量 / (进程数 × CHUNKS_PER_WORKER)
+
+    Returns:
+        list: 批次列表（每批为任务下标列表），按分发顺序排列
+    """
+    order = sorted(range(len(costs)), key=lambda i: costs[i], reverse=True)
+    remaining = sum(costs)
+    divisor = max(1, jobs) * CHUNKS_PER_WORKER
+    chunks = []
+    current, current_cost = [], 0
+    target = remaining / divisor
+    for i in order:
+        current.append(i)
+        current_cost += costs[i]
+        if current_cost >= target or len(current) >= MAX_CHUNK_FILES:
+            chunks.append(current)
+            remaining -= current_cost
+            target = remaining / divisor
+            current, current_cost = [], 0
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _run_chunk(args):
+    """进程池任务：依次执行一批任务，返回 [(结果, 耗时毫秒)]"""
+    fn, items = args
+    results = []
+    for item in items:
+        start = time.perf_counter()
+        result = fn(item)
+        results.append((result, (time.perf_counter() - start) * 1000))
+    return results
+
+
+def scheduled_map(fn, items, costs, pool, jobs):
+    """
+    按预估耗时调度执行 fn(item)
+
+    Args:
+        fn: 模块级函数（需要可被 pickle）
+        costs: 与 items 对齐的预估耗时
+        pool: 进程池
+
+    Returns:
+        tuple: (按 items 顺序的结果列表, 各任务实际耗时毫秒)
+    """
+    chunks = plan_chunks(costs, jobs)
+    # 进程池按提交顺序分发，先提交的大任务先开始
+    futures = [pool.submit(_run_chunk, (fn, [items[i] for i in chunk])) for chunk in chunks]
+    results = [None] * len(items)
+    elapsed = [0.0] * len(items)
+    for chunk, future in zip(chunks, futures):
+        for i, (result, ms) in zip(chunk, future.result()):
+            results[i] = result
+            elapsed[i] = ms
+    return results, elapsed
+
+
+def file_costs(root_dir, paths, sizes):
+    """按文件大小和该项目上次记录的耗时预估各文件的分析耗时"""
+    timings = load_cache(root_dir, TIMINGS_CACHE_NAME) or {}
+    if not timings:
+        return list(sizes)
+    past_ms = [timings.get(os.path.relpath(p, root_dir)) for p in paths]
+    return estimate_costs(sizes, past_ms)
+
+
+def record_timings(root_dir, paths, elapsed):
+    """记录本次运行各文件的分析耗时，供下次调度使用"""
+    save_cache(root_dir, TIMINGS_CACHE_NAME, {
+        os.path.relpath(p, root_dir): round(ms, 2) for p, ms in zip(paths, elapsed)
+    })
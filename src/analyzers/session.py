@@ -0,0 +1,181 @@
+"""
+可嵌入的分析会话
+
+供其他 Python 程序在进程内直接调用（无需启动子进程、解析命令行）：
+
+    from src import Analyzer
+    analyzer = Analyzer()
+    stats = analyzer.analyze_buffer(source_text, 'Python')
+    result = analyzer.scan_tree('/path/to/project')
+
+语言定义和正则表在模块导入时只编译一次，同一个会话可以反复分析任意多个文件或文本，
+所有方法只返回结构化结果，不输出任何内容。命令行入口也基于本会话实现。
+"""
+import os
+from collections import defaultdict
+
+from src.config.constants import LANG_DEFINITIONS
+from src.analyzers.file_analyzer import analyze_file, iter_source_files
+from src.analyzers.file_budget import resolve_file_budget
+from src.analyzers.prefetch_io import PREFETCH_THREADS
+from src.analyzers.metrics import resolve_metrics, active_metric_names
+from src.analyzers.scheduler import create_worker_pool, file_costs, scheduled_map, record_timings
+from src.analyzers.input_sources import open_input_source
+from src.analyzers.refactor_advisor import AdviceStore
+from src.analyzers.dependency_graph import apply_coupling_metrics
+
+
+def project_index_parts(all_stats):
+    """项目代码质量指数的分子和分母（加权分数和、代码行数和），可跨分片相加"""
+    weighted = weight = 0
+    for s in all_stats:
+        if s['coder_score'] >= 0 and not s['is_exempt']:
+            weighted += s['coder_score'] * s['code']
+            weight += s['code']
+    return weighted, weight
+
+
+def analyze_file_task(task):
+    """进程池任务包装（必须是模块级函数才能被 pickle）"""
+    file_path, lang_info = task
+    return analyze_file(file_path, lang_info)
+
+
+def compute_project_index(all_stats=None, parts=None):
+    """项目代码质量指数：按代码行加权的 Coder Score 平均值，无可评分文件时返回 None"""
+    weighted, weight = parts if parts is not None else project_index_parts(all_stats)
+    return int(weighted / weight) if weight > 0 else None
+
+
+def summarize_languages(all_stats):
+    """按语言汇总文件数、行数、代码、注释、耦合和复杂度"""
+    summary = defaultdict(lambda: {'files': 0, 'total': 0, 'code': 0, 'comments': 0, 'imports': 0, 'boilerplate': 0, 'cc': 0})
+    for s in all_stats:
+        lang_summary = summary[s['lang']]
+        lang_summary['files'] += 1
+        for k in ['total', 'code', 'comments', 'boilerplate', 'imports']:
+            lang_summary[k] += s[k]
+        lang_summary['cc'] += s['complexity']
+    return summary
+
+
+class Analyzer:
+    """可复用的分析会话"""
+
+    def __init__(self, io_threads=PREFETCH_THREADS, max_bytes=None, max_lines=None, max_ms=None, use_cache=True,
+                 jobs=1, metrics=None):
+        """
+        Args:
+            io_threads: 扫描目录时的预读线程数，0 表示不预读
+            jobs: 扫描目录时的分析进程数，<= 1 时在当前进程中分析
+            metrics: 启用的扩展指标名列表（如 ['cognitive', 'mi']），None 沿用当前全局设置
+            max_bytes / max_lines / max_ms: 单文件预算（None 沿用当前全局设置，0 不限制）
+            use_cache: 是否使用依赖图的磁盘缓存
+
+        预算和指标在创建时确定并保存在会话中，不修改全局设置，多个会话互不影响。
+
+        Raises:
+            KeyError: 未注册的指标名
+        """
+        self.budget = resolve_file_budget(max_bytes, max_lines, max_ms)
+        self.metrics = active_metric_names() if metrics is None else [cls.name for cls in resolve_metrics(metrics)]
+        self.io_threads = io_threads
+        self.use_cache = use_cache
+        self.jobs = jobs
+        # 本会话的重构建议缓存（控制台输出与报告导出共用）
+        self.advice_store = AdviceStore(max_ms=self.budget['ms'])
+        # 语言名 / 扩展名 -> lang_info
+        self.languages = {}
+        for ext, lang_info in LANG_DEFINITIONS.items():
+            self.languages.setdefault(lang_info[0].lower(), lang_info)
+            self.languages[ext] = lang_info
+
+    def lang_info_for(self, lang):
+        """按语言名（如 'Python'）或扩展名（如 'py'）查找语言定义，未知语言返回 None"""
+        return self.languages.get(lang.lower().lstrip('.')) if lang else None
+
+    def analyze_path(self, path, lang=None):
+        """
+        分析单个文件
+
+        Args:
+            lang: 语言名或扩展名，不传时按文件扩展名识别
+
+        Returns:
+            dict: 文件统计；无法识别语言时返回 None
+        """
+        if lang is None:
+            lang = path.split('.')[-1] if '.' in os.path.basename(path) else ''
+        lang_info = self.lang_info_for(lang)
+        return analyze_file(path, lang_info, None, self.budget, self.metrics) if lang_info else None
+
+    def analyze_buffer(self, text, lang, path='<buffer>'):
+        """
+        分析内存中的源码（str 或 bytes）
+
+        Returns:
+            dict: 文件统计；未知语言返回 None
+        """
+        lang_info = self.lang_info_for(lang)
+        if not lang_info:
+            return None
+        data = text.encode('utf-8') if isinstance(text, str) else text
+        return analyze_file(path, lang_info, data, self.budget, self.metrics)
+
+    def _scan_parallel(self, root):
+        """多进程分析目录（按预估耗时调度），返回与遍历顺序一致的文件统计列表"""
+        tasks, sizes = [], []
+        for file_path, lang_info in iter_source_files(root):
+            try:
+                sizes.append(os.path.getsize(file_path))
+            except OSError:
+                sizes.append(0)
+            tasks.append((file_path, lang_info))
+        paths = [task[0] for task in tasks]
+        with create_worker_pool(self.jobs, self.budget, self.metrics) as pool:
+            results, elapsed = scheduled_map(analyze_file_task, tasks, file_costs(root, paths, sizes), pool, self.jobs)
+        record_timings(root, paths, elapsed)
+        return results
+
+    def scan_tree(self, root, git_rev=None):
+        """
+        扫描目录、归档文件或 git 版本
+
+        Returns:
+            dict: root（报告用的根路径）、files（文件统计列表，已去掉二进制和被跳过的文件）、
+                  languages（按语言汇总）、project_index（项目代码质量指数或 None）、
+                  prefilter_counts / tier_counts（预过滤和预算降级计数）、graph（依赖图摘要）、
+                  source（输入源 (路径, git 版本)，见 input_sources.load_source_buffers）
+        """
+        source = (root, git_rev)
+        if self.jobs > 1 and not git_rev and os.path.isdir(root):
+            analyzed = self._scan_parallel(root)
+        else:
+            root, source_files = open_input_source(root, git_rev=git_rev, io_threads=self.io_threads,
+                                                  max_file_bytes=self.budget['bytes'])
+            analyzed = (analyze_file(file_path, lang_info, data, self.budget, self.metrics)
+                        for (file_path, lang_info), data in source_files)
+        all_stats = []
+        prefilter_counts = defaultdict(int)
+        tier_counts = defaultdict(int)
+        for stats in analyzed:
+            prefilter_counts[stats['prefilter']] += 1
+            tier_counts[stats['tier']] += 1
+            if stats['prefilter'] == 'binary' or stats['tier'] == 'skipped':
+                continue
+            all_stats.append(stats)
+
+        # 项目指数和分语言汇总基于文件自身的评分；依赖图随后按真实耦合重新计算 Shit Score
+        languages = summarize_languages(all_stats)
+        project_index = compute_project_index(all_stats)
+        graph = apply_coupling_metrics(all_stats, root, use_cache=self.use_cache)
+        return {
+            'root': root,
+            'files': all_stats,
+            'languages': dict(languages),
+            'project_index': project_index,
+            'prefilter_counts': dict(prefilter_counts),
+            'tier_counts': dict(tier_counts),
+            'graph': graph,
+            'source': source,
+        }
@@ -0,0 +1,226 @@
+"""
+跨机器分片扫描
+
+单台机器放不下的超大仓库，可以拆到 N 台机器上各扫描一个分片（--shard i/N），
+每个分片输出一个部分结果文件，最后用 merge 子命令合并，输出与单机扫描完全一致：
+- 分片划分是确定性的：每台机器都遍历同一棵目录树（只读 stat 信息），
+  小文件按相对路径的稳定哈希分配，大文件按从大到小依次分给当前字节数最少的分片
+- 部分结果保存耦合计算之前的文件统计（带单机遍历序号）和可相加的分语言汇总、
+  计数与项目指数的分子分母；依赖图只依赖各文件的 import 目标，在合并时统一构建
+
+归档文件和 git 版本没有预先可知的文件大小，只按路径哈希划分。
+"""
+import os
+import json
+import hashlib
+
+from src.analyzers.file_analyzer import analyze_file, iter_source_files
+from src.analyzers.prefetch_io import PREFETCH_THREADS, prefetch_files
+from src.analyzers.input_sources import open_input_source
+from src.analyzers.dependency_graph import apply_coupling_metrics
+from src.analyzers.session import summarize_languages, project_index_parts, compute_project_index
+
+
+PARTIAL_FORMAT = 'typelineas-partial'
+PARTIAL_VERSION = 1
+# 不小于此字节数的文件参与按大小均衡，其余按路径哈希
+SHARD_LARGE_FILE = 64 * 1024
+# 分语言汇总中可相加的字段
+SUMMARY_FIELDS = ('files', 'total', 'code', 'comments', 'imports', 'boilerplate', 'cc')
+
+
+def parse_shard_spec(spec):
+    """解析 i/N（i 从 1 开始），返回从 0 开始的 (分片序号, 分片数)，格式错误返回 None"""
+    try:
+        index, count = (int(x) for x in spec.split('/'))
+    except ValueError:
+        return None
+    return (index - 1, count) if 1 <= index <= count else None
+
+
+def path_hash(rel_path):
+    """跨机器、跨进程稳定的路径哈希（内置 hash() 每个进程随机化，不能使用）"""
+    return int.from_bytes(hashlib.blake2b(rel_path.encode('utf-8', 'surrogateescape'), digest_size=8).digest(), 'big')
+
+
+def assign_shards(rel_paths, sizes, count):
+    """
+    为每个文件分配分片
+
+    Args:
+        rel_paths: 相对路径列表（'/' 分隔）
+        sizes: 与之对齐的文件字节数，None 表示只按路径哈希分配
+        count: 分片数
+
+    Returns:
+        list: 与 rel_paths 对齐的分片序号
+    """
+    shards = [path_hash(p) % count for p in rel_paths]
+    if sizes is None:
+        return shards
+
+    loads = [0] * count
+    large = []
+    for i, size in enumerate(sizes):
+        if size >= SHARD_LARGE_FILE:
+            large.append(i)
+        else:
+            loads[shards[i]] += size
+    # 大文件从大到小分给当前负载最小的分片（同样大小按路径排序，保证各机器结果一致）
+    for i in sorted(large, key=lambda i: (-sizes[i], rel_paths[i])):
+        target = min(range(count), key=loads.__getitem__)
+        shards[i] = target
+        loads[target] += sizes[i]
+    return shards
+
+
+def _rel_path(path, root):
+    return os.path.relpath(path, root).replace(os.sep, '/')
+
+
+def _shard_items(root, git_rev, shard_index, shard_count, io_threads, seen):
+    """
+    产出本分片的 (单机遍历序号, 路径, lang_info, 文件内容)，seen['files'] 累计候选文件总数
+
+    Returns:
+        tuple: (报告用的根路径, 迭代器)
+    """
+    if git_rev or not os.path.isdir(root):
+        label, source = open_input_source(root, git_rev=git_rev, io_threads=io_threads)
+
+        def stream():
+            for seq, ((path, lang_info), data) in enumerate(source):
+                seen['files'] = seq + 1
+                if path_hash(_rel_path(path, label)) % shard_count == shard_index:
+                    yield seq, path, lang_info, data
+        return label, stream()
+
+    candidates = []
+    for path, lang_info in iter_source_files(root):
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        candidates.append((path, lang_info, size))
+    seen['files'] = len(candidates)
+    shards = assign_shards([_rel_path(c[0], root) for c in candidates], [c[2] for c in candidates], shard_count)
+    selected = [(c[0], c[1], seq) for seq, (c, s) in enumerate(zip(candidates, shards)) if s == shard_index]
+    mine = ((seq, path, lang_info, data)
+            for (path, lang_info, seq), data in prefetch_files(selected, threads=io_threads))
+    return root, mine
+
+
+def scan_shard(root, shard_index, shard_count, git_rev=None, io_threads=PREFETCH_THREADS):
+    """
+    扫描一个分片，返回可写入部分结果文件的 dict
+    """
+    seen = {'files': 0}
+    label, items = _shard_items(root, git_rev, shard_index, shard_count, io_threads, seen)
+    kept = []
+    files = []
+    prefilter_counts = {}
+    tier_counts = {}
+    for seq, path, lang_info, data in items:
+        stats = analyze_file(path, lang_info, data)
+        prefilter_counts[stats['prefilter']] = prefilter_counts.get(stats['prefilter'], 0) + 1
+        tier_counts[stats['tier']] = tier_counts.get(stats['tier'], 0) + 1
+        if stats['prefilter'] == 'binary' or stats['tier'] == 'skipped':
+            continue
+        kept.append(stats)
+        record = dict(stats, path=_rel_path(path, label))
+        record['seq'] = seq
+        files.append(record)
+
+    return {
+        'format': PARTIAL_FORMAT,
+        'version': PARTIAL_VERSION,
+        'root': label,
+        # 输入源（目录 / 归档路径和 git 版本），合并后生成重构建议和克隆检测时重新读取源码
+        'source': [root, git_rev],
+        'shard': shard_index,
+        'count': shard_count,
+        'total_files': seen['files'],
+        'files': files,
+        'languages': dict(summarize_languages(kept)),
+        'prefilter_counts': prefilter_counts,
+        'tier_counts': tier_counts,
+        'index_parts': list(project_index_parts(kept)),
+    }
+
+
+def write_partial(path, partial):
+    """写入部分结果文件（紧凑 JSON）"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(partial, f, ensure_ascii=False, separators=(',', ':'))
+
+
+def load_partial(path):
+    """读取部分结果文件"""
+    with open(path, 'r', encoding='utf-8') as f:
+        partial = json.load(f)
+    if partial.get('format') != PARTIAL_FORMAT or partial.get('version') != PARTIAL_VERSION:
+        raise ValueError(f"{path}: not a TypeLineas partial result")
+    return partial
+
+
+def _sum_counts(dicts):
+    merged = {}
+    for d in dicts:
+        for key, value in d.items():
+            merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def merge_partials(partials, root=None, use_cache=True):
+    """
+    合并全部分片的部分结果
+
+    Args:
+        root: 报告用的根路径，不传时使用分片记录的根路径（合并机器上的检出目录不同时需要指定）；
+              指定时源码从该目录读取，否则从分片记录的输入源读取
+
+    Returns:
+        dict: 与 Analyzer.scan_tree 相同结构的结果
+
+    Raises:
+        ValueError: 分片缺失、重复或来自不同的划分
+    """
+    if not partials:
+        raise ValueError("no partial results")
+    count = partials[0]['count']
+    total_files = partials[0]['total_files']
+    indices = sorted(p['shard'] for p in partials)
+    if indices != list(range(count)) or any(p['count'] != count or p['total_files'] != total_files for p in partials):
+        raise ValueError(f"shards {[i + 1 for i in indices]} of {count}, expected 1..{count}")
+
+    source = (root, None) if root else tuple(partials[0].get('source') or (partials[0]['root'], None))
+    root = root or partials[0]['root']
+    records = sorted((r for p in partials for r in p['files']), key=lambda r: r['seq'])
+    all_stats = []
+    for record in records:
+        stats = dict(record, path=os.path.join(root, record['path'].replace('/', os.sep)))
+        del stats['seq']
+        all_stats.append(stats)
+
+    # 分语言汇总按语言在单机遍历中首次出现的顺序合并（同代码量的语言排序与单机一致）
+    languages = {}
+    for stats in all_stats:
+        if stats['lang'] not in languages:
+            languages[stats['lang']] = dict.fromkeys(SUMMARY_FIELDS, 0)
+    for p in partials:
+        for lang_name, lang_summary in p['languages'].items():
+            for key in SUMMARY_FIELDS:
+                languages[lang_name][key] += lang_summary[key]
+
+    index_parts = (sum(p['index_parts'][0] for p in partials), sum(p['index_parts'][1] for p in partials))
+    graph = apply_coupling_metrics(all_stats, root, use_cache=use_cache)
+    return {
+        'root': root,
+        'files': all_stats,
+        'languages': languages,
+        'project_index': compute_project_index(parts=index_parts),
+        'prefilter_counts': _sum_counts(p['prefilter_counts'] for p in partials),
+        'tier_counts': _sum_counts(p['tier_counts'] for p in partials),
+        'graph': graph,
+        'source': source,
+    }
@@ -0,0 +1,210 @@
+"""
+自定义异味规则插件
+
+团队自定义的检查（禁用 API、遗留日志调用……）注册为规则，与内置 CODE_SMELLS 一起输出。
+每条规则声明适用语言和触发字面量（规则能够匹配的必要条件，出现其一即可）：
+- 每种语言把适用规则的全部字面量合并成一个前缀树正则，一次扫描找出所有字面量出现的位置
+  （忽略大小写的字面量单独合并，另做一次扫描）
+- 只有字面量出现过的规则才运行完整正则；行级规则（默认）只在字面量所在的行上运行，
+  文件级规则（可跨行匹配）在整个文件上运行
+因此规则数量增加时，每个文件的代价仍接近一次扫描加上真正可能命中的规则。
+没有声明字面量的规则每个文件都运行完整正则。
+
+规则用 register_smell_rule 注册，或用 load_smell_rules 从 JSON 文件加载（命令行 --rules）。
+"""
+import re
+import json
+
+
+# 已注册的规则：key -> 规则 dict（按注册顺序输出）
+SMELL_RULES = {}
+# 规则作用范围
+RULE_SCOPES = ('line', 'file')
+# 按语言缓存的字面量匹配器，规则变化时清空
+_rule_matcher_cache = {}
+# 规则版本号：每次注册或替换规则时递增，缓存的重构建议据此判断是否过期
+_rule_state = {'generation': 0}
+
+
+def register_smell_rule(key, pattern, literals=(), name=None, suggestion='', languages=None,
+                        ignore_case=False, scope='line'):
+    """
+    注册自定义异味规则（同名规则会被替换）
+
+    Args:
+        key: 规则标识
+        pattern: 完整正则（字符串或已编译模式）
+        literals: 触发字面量，规则正则的每个匹配都必须包含其中之一
+        name: 报告中显示的名称，默认为 key
+        suggestion: 重构建议
+        languages: 适用语言名列表，None 表示全部语言
+        ignore_case: 字面量（以及字符串形式的 pattern）忽略大小写
+        scope: 'line' 在字面量所在行上匹配，'file' 在整个文件上匹配
+
+    Returns:
+        dict: 注册的规则
+
+    Raises:
+        ValueError: 参数无效或正则无法编译
+    """
+    if scope not in RULE_SCOPES:
+        raise ValueError(f"{key}: scope must be one of {', '.join(RULE_SCOPES)}")
+    if isinstance(literals, str):
+        literals = (literals,)
+    if not all(isinstance(lit, str) and lit for lit in literals):
+        raise ValueError(f"{key}: literals must be non-empty strings")
+    if isinstance(pattern, str):
+        try:
+            pattern = re.compile(pattern, re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+        except re.error as e:
+            raise ValueError(f"{key}: {e}") from None
+    rule = {
+        'key': key,
+        'pattern': pattern,
+        'literals': tuple(dict.fromkeys(literals)),
+        'name': name or key,
+        'suggestion': suggestion,
+        'languages': frozenset(languages) if languages else None,
+        'ignore_case': ignore_case,
+        'scope': scope,
+    }
+    SMELL_RULES[key] = rule
+    _rules_changed()
+    return rule
+
+
+def set_smell_rules(rules):
+    """替换全部已注册规则（进程池子进程初始化时同步主进程的规则）"""
+    SMELL_RULES.clear()
+    SMELL_RULES.update((rule['key'], rule) for rule in rules)
+    _rules_changed()
+
+
+def sync_smell_rules(rules):
+    """与给定规则不一致时替换全部规则（执行器子进程中的任务随任务同步规则；一致时不重建匹配器）"""
+    rules = list(rules)
+    if list(SMELL_RULES.values()) != rules:
+        set_smell_rules(rules)
+
+
+def _rules_changed():
+    _rule_matcher_cache.clear()
+    _rule_state['generation'] += 1
+
+
+def rules_generation():
+    """当前规则版本号（规则集合变化后递增）"""
+    return _rule_state['generation']
+
+
+def load_smell_rules(path):
+    """
+    从 JSON 文件加载规则：列表，每项为 register_smell_rule 的关键字参数
+
+    Returns:
+        int: 加载的规则数
+
+    Raises:
+        OSError: 文件无法读取
+        ValueError: 格式错误或规则无效
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        specs = json.load(f)
+    if not isinstance(specs, list):
+        raise ValueError(f"{path}: expected a list of rules")
+    for spec in specs:
+        try:
+            register_smell_rule(**spec)
+        except TypeError as e:
+            raise ValueError(f"{path}: {e}") from None
+    return len(specs)
+
+
+def literal_trie_pattern(literals):
+    """
+    把字面量合并为前缀树形式的正则
+
+    每个位置的匹配代价只与字面量长度有关，与字面量个数无关；
+    可选分支贪婪匹配，同一位置总是匹配最长的字面量。
+    """
+    trie = {}
+    for literal in literals:
+        node = trie
+        for ch in literal:
+            node = node.setdefault(ch, {})
+        node[''] = None
+
+    def emit(node):
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            return f'(?:{body})?'
+        return body
+
+    return emit(trie)
+
+
+def _literal_pass(entries, ignore_case):
+    """一组字面量的扫描：(前缀树模式, 匹配文本 -> 该位置触发的规则 key, 是否忽略大小写)"""
+    by_text = {}
+    for literal, key in entries:
+        by_text.setdefault(literal.lower() if ignore_case else literal, []).append(key)
+    pattern = re.compile(literal_trie_pattern(by_text), re.IGNORECASE if ignore_case else 0)
+    # 同一位置较短的字面量是最长匹配的前缀，按匹配文本预先列出
+    prefixes = {text: [key for end in range(1, len(text) + 1) for key in by_text.get(text[:end], ())]
+                for text in by_text}
+    return pattern, prefixes, ignore_case
+
+
+def get_rule_matcher(lang_name):
+    """
+    获取（并缓存）某种语言的字面量匹配器
+
+    区分大小写的字面量合并为一次扫描；忽略大小写的字面量（正则引擎不能快速跳过不可能的位置，
+    扫描较慢）只在存在这类规则时另做一次扫描。
+
+    Returns:
+        tuple: (字面量扫描列表, 无字面量的规则 key 列表)；该语言没有适用规则时返回 None
+    """
+    if lang_name in _rule_matcher_cache:
+        return _rule_matcher_cache[lang_name]
+    rules = [rule for rule in SMELL_RULES.values()
+             if rule['languages'] is None or lang_name in rule['languages']]
+    matcher = None
+    if rules:
+        passes = []
+        for ignore_case in (False, True):
+            entries = [(literal, rule['key']) for rule in rules if rule['ignore_case'] == ignore_case
+                       for literal in rule['literals']]
+            if entries:
+                passes.append(_literal_pass(entries, ignore_case))
+        matcher = (passes, [rule['key'] for rule in rules if not rule['literals']])
+    _rule_matcher_cache[lang_name] = matcher
+    return matcher
+
+
+def match_rule_literals(content, lang_name):
+    """
+    扫描找出各规则触发字面量在文件中的出现位置
+
+    每次匹配后从下一个字符继续搜索，重叠的字面量不会被前一个匹配吞掉。
+
+    Returns:
+        dict: 规则 key -> 字面量出现位置列表（无字面量的规则为 None），未出现的规则不在其中
+    """
+    matcher = get_rule_matcher(lang_name)
+    if matcher is None:
+        return {}
+    passes, unconditional = matcher
+    hits = dict.fromkeys(unconditional)
+    for pattern, prefixes, ignore_case in passes:
+        match = pattern.search(content)
+        while match:
+            pos = match.start()
+            text = match.group()
+            for key in prefixes.get(text.lower() if ignore_case else text, ()):
+                hits.setdefault(key, []).append(pos)
+            match = pattern.search(content, pos + 1)
+    return hits
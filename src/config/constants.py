@@ -51,6 +51,20 @@ IMPORT_PATTERNS = {
     'PHP': re.compile(r'^\s*(require|include|use)\s+'),
 }
 
+# 从 import 语句中提取依赖目标（模块名或路径），用于构建依赖图
+IMPORT_TARGET_PATTERNS = {
+    'JavaScript': re.compile(r'(?:\bfrom\s+|\brequire\s*\(\s*|^\s*import\s+)["\']([^"\']+)["\']'),
+    'TypeScript': re.compile(r'(?:\bfrom\s+|\brequire\s*\(\s*|^\s*import\s+)["\']([^"\']+)["\']'),
+    'Java': re.compile(r'^\s*import\s+(?:static\s+)?([\w.]+)'),
+    'C': re.compile(r'^\s*#include\s*"([^"]+)"'),
+    'C++': re.compile(r'^\s*#include\s*"([^"]+)"'),
+    'Go': re.compile(r'"([^"]+)"'),
+    'Rust': re.compile(r'^\s*(?:pub\s+)?(?:use\s+([\w:]+)|mod\s+(\w+)\s*;)'),
+    'Kotlin': re.compile(r'^\s*import\s+([\w.]+)'),
+    'Kotlin Script': re.compile(r'^\s*import\s+([\w.]+)'),
+    'PHP': re.compile(r'^\s*(?:(?:require|include)(?:_once)?\s*\(?\s*["\']([^"\']+)["\']|use\s+([\w\\]+))'),
+}
+
 # 圈复杂度关键字匹配
 CC_PATTERNS = {
     'C-Family': re.compile(r'\b(if|else|for|while|switch|case|catch|try)\b|&&|\|\|'),
@@ -86,6 +100,24 @@ SCRIPT_END = re.compile(r'</script\s*>', re.IGNORECASE)
 # 字符串字面量匹配（用于在计算复杂度时剔除字符串内容）
 STRING_LITERAL = re.compile(r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'')
 
+# 依赖图中视为"包入口"的文件名（去扩展名），解析时代表其所在目录
+PACKAGE_ENTRY_STEMS = {'__init__', 'index', 'mod'}
+
+# 字节级预过滤：二进制嗅探长度、压缩文件判定（平均行长）、自动生成文件头部标记
+BINARY_SNIFF_BYTES = 8192
+MINIFIED_AVG_LINE_LENGTH = 300
+MINIFIED_MIN_BYTES = 2048
+GENERATED_HEADER_BYTES = 2048
+GENERATED_MARKERS = (
+    b'@generated', b'do not edit', b'code generated by', b'auto-generated',
+    b'autogenerated', b'this file was automatically generated',
+)
+
+# 单文件预算默认值：字节数、行数、单阶段耗时（毫秒），0 表示不限制
+FILE_BUDGET_DEFAULTS = {'bytes': 16 * 1024 * 1024, 'lines': 200000, 'ms': 10000}
+# 逐行处理时每隔多少行检查一次耗时
+BUDGET_CHECK_INTERVAL = 4096
+
 # 默认忽略的目录
 DEFAULT_IGNORES = {'.git', 'node_modules', 'venv', '.venv', '__pycache__', 'dist', 'build', '.next', '.nuxt', 'migrations'}
 
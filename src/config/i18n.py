@@ -123,6 +123,74 @@ TEXTS = {
     'delete_or_vcs': {'zh': '删除或使用版本控制', 'en': 'Delete or use version control'},
     'split_or_format': {'zh': '拆分或格式化', 'en': 'Split or format'},
     'split_to_functions': {'zh': '拆分为多个小函数', 'en': 'Split into smaller functions'},
+    
+    # 字节级预过滤
+    'prefiltered_files': {'zh': '预过滤 (跳过/仅统计行数)', 'en': 'Prefiltered (skipped / line counts only)'},
+    'prefilter_binary': {'zh': '二进制', 'en': 'binary'},
+    'prefilter_minified': {'zh': '压缩', 'en': 'minified'},
+    'prefilter_generated': {'zh': '自动生成', 'en': 'generated'},
+    
+    # 单文件预算
+    'over_budget_files': {'zh': '超出单文件预算 (已降级)', 'en': 'Over per-file budget (degraded)'},
+    'analysis_tier': {'zh': '分析层级', 'en': 'Analysis Tier'},
+    'tier_regex': {'zh': '仅正则估算', 'en': 'regex only'},
+    'tier_lines': {'zh': '仅统计行数', 'en': 'line counts only'},
+    'tier_skipped': {'zh': '跳过', 'en': 'skipped'},
+    'advice_truncated': {'zh': '超出耗时预算，代码异味扫描不完整', 'en': 'Over time budget, code smell scan is incomplete'},
+    
+    # 抽样估算
+    'sample_mode': {'zh': '抽样估算', 'en': 'Sampled estimate'},
+    'sampled_files': {'zh': '抽样文件', 'en': 'sampled files'},
+    'confidence_interval': {'zh': '95% 置信区间', 'en': '95% confidence interval'},
+    
+    # 批量扫描
+    'batch_scan': {'zh': '批量扫描', 'en': 'Batch scan'},
+    'repositories': {'zh': '个仓库', 'en': 'repositories'},
+    'repository': {'zh': '仓库', 'en': 'Repository'},
+    'max_shit_score': {'zh': '最高屎山分', 'en': 'Max Shit Score'},
+    'report_file': {'zh': '报告', 'en': 'Report'},
+    'batch_summary': {'zh': '跨仓库汇总', 'en': 'Cross-repo Summary'},
+    
+    # 分片扫描
+    'shard': {'zh': '分片', 'en': 'Shard'},
+    'shard_written': {'zh': '分片结果已写入', 'en': 'Partial result written to'},
+    'merging_shards': {'zh': '合并分片结果', 'en': 'Merging partial results'},
+    'input_invalid': {'zh': '无法读取输入', 'en': 'Cannot read input'},
+    'source_unavailable': {'zh': '无法读取源码（重构建议和克隆检测需要）', 'en': 'Cannot read sources for advice and clone detection'},
+    'shard_invalid': {'zh': '分片参数无效（应为 i/N，1 <= i <= N）', 'en': 'Invalid shard spec (expected i/N with 1 <= i <= N)'},
+    'shard_incomplete': {'zh': '分片结果不完整或不一致', 'en': 'Partial results are incomplete or inconsistent'},
+    
+    # 扩展指标
+    'extra_metrics': {'zh': '扩展指标', 'en': 'Extra Metrics'},
+    'metric_mean': {'zh': '文件均值', 'en': 'mean per file'},
+    
+    # 自定义异味规则
+    'rules_invalid': {'zh': '自定义规则文件无效', 'en': 'Invalid custom rules file'},
+    
+    # SQLite 导出
+    'sqlite_rows': {'zh': '写入行数', 'en': 'Rows written'},
+    'sqlite_views': {'zh': '常用查询视图', 'en': 'Canned query views'},
+    
+    # 变更 × 复杂度热点
+    'churn_hotspots': {'zh': '🔥 变更 × 复杂度热点 (按修改频率加权)', 'en': '🔥 CHURN × COMPLEXITY HOTSPOTS (weighted by change frequency)'},
+    'churn_history': {'zh': 'git 历史', 'en': 'git history'},
+    'commits': {'zh': '次提交', 'en': 'commits'},
+    'churn_unavailable': {'zh': '无法读取 git 历史（不是 git 仓库或 git 不可用），跳过变更热点分析', 'en': 'git history unavailable (not a git repository or git missing), churn hotspots skipped'},
+    
+    # 依赖图
+    'dependency_graph': {'zh': '依赖图', 'en': 'Dependency Graph'},
+    'modules': {'zh': '模块', 'en': 'modules'},
+    'dependencies': {'zh': '依赖', 'en': 'dependencies'},
+    'import_cycles': {'zh': '循环依赖', 'en': 'Import Cycles'},
+    'largest_cycle': {'zh': '最大环', 'en': 'largest'},
+    
+    # 克隆检测
+    'clone_detection': {'zh': '🧬 跨文件重复代码 (克隆检测)', 'en': '🧬 DUPLICATE CODE (Cross-file Clones)'},
+    'clone_location_a': {'zh': '位置 A', 'en': 'Location A'},
+    'clone_location_b': {'zh': '位置 B', 'en': 'Location B'},
+    'clone_pairs': {'zh': '克隆对', 'en': 'Clone Pairs'},
+    'duplicated_lines': {'zh': '重复行数', 'en': 'Duplicated Lines'},
+    'no_clones': {'zh': '✨ 未发现明显的重复代码', 'en': '✨ No significant duplicate code found'},
 }
 
 
@@ -1,57 +1,54 @@
 """
 报告导出器
 
-将分析结果导出为 CSV 或 Markdown 格式的报告文件。
+将分析结果导出为 CSV、Markdown 格式的报告文件或 SQLite 数据库。
 支持中英文本地化。
 """
 import os
 import csv
-import unicodedata
 
 from src.config.colors import Colors
 from src.config.i18n import t
 from src.analyzers.refactor_advisor import (
-    diagnose_file, analyze_function_complexity, scan_code_smells,
-    REFACTOR_SUGGESTIONS
+    diagnose_file, needs_advice, iter_file_advice,
+    count_smells_by_function, REFACTOR_SUGGESTIONS
 )
+from src.analyzers.metrics import active_metric_fields
+from src.analyzers.churn import CHURN_FIELDS
+from src.reporters.table_render import render_markdown_table
+from src.reporters.sqlite_export import CANNED_QUERIES, is_sqlite_report, export_sqlite
 
 
-def str_width(s):
-    """计算字符串显示宽度（考虑中文字符占2格）"""
-    width = 0
-    for char in s:
-        if unicodedata.east_asian_width(char) in ('F', 'W'):
-            width += 2
-        else:
-            width += 1
-    return width
-
-
-def pad_to_width(s, width, align='left'):
-    """将字符串填充到指定显示宽度"""
-    current = str_width(s)
-    padding = width - current
-    if padding <= 0:
-        return s
-    if align == 'right':
-        return ' ' * padding + s
-    return s + ' ' * padding
-
-
-def export_report(all_stats, filename, root_dir, include_advice=False):
-    """导出分析报告到 CSV 或 Markdown 格式"""
+def export_report(all_stats, filename, root_dir, include_advice=False, jobs=1, pool=None, store=None):
+    """
+    导出分析报告到 CSV、Markdown 格式或 SQLite 数据库（.sqlite / .sqlite3 / .db）
+    
+    Args:
+        jobs: 生成重构建议的进程数，<= 1 时串行执行
+        pool: 共享的进程池（批量扫描时复用）
+        store: 会话的重构建议缓存（AdviceStore），与控制台输出共用
+    """
     try:
-        if filename.endswith('.csv'):
+        if is_sqlite_report(filename):
+            counts = export_sqlite(all_stats, filename, root_dir, include_advice=include_advice,
+                                   jobs=jobs, pool=pool, store=store)
+            print(f"{t('sqlite_rows')}: " + ' | '.join(f"{table} {count}" for table, count in counts.items()))
+            print(f"{t('sqlite_views')}: {', '.join(CANNED_QUERIES)}")
+        elif filename.endswith('.csv'):
             with open(filename, 'w', newline='', encoding='utf-8-sig') as csvfile:
                 fieldnames = [t('file_path'), t('language'), t('shit_score'), t('coder_score'), 
-                              t('complexity'), 'Type', t('lines'), t('code'), t('comments'), t('imports')]
+                              t('complexity'), 'Type', t('lines'), t('code'), t('comments'), t('imports'), 'Tier']
+                metric_fields = active_metric_fields()
+                if any('hotspot_score' in s for s in all_stats):
+                    metric_fields += CHURN_FIELDS
+                fieldnames += metric_fields
                 writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
                 writer.writeheader()
                 for s in sorted(all_stats, key=lambda x: x['shit_score'], reverse=True):
                     comp_str = f"{s['complexity']}" if s['complexity'] > 0 else f"{s['max_nesting']}"
                     comp_type = "AST" if s['ast_success'] else ("Regex" if s['complexity'] > 0 else "Depth")
                     c_score = str(s['coder_score']) if s['coder_score'] >= 0 else '--'
-                    writer.writerow({
+                    row = {
                         t('file_path'): os.path.relpath(s['path'], root_dir),
                         t('language'): s['lang'],
                         t('shit_score'): s['shit_score'],
@@ -61,8 +58,12 @@ def export_report(all_stats, filename, root_dir, include_advice=False):
                         t('lines'): s['total'],
                         t('code'): s['code'],
                         t('comments'): s['comments'],
-                        t('imports'): s['imports']
-                    })
+                        t('imports'): s['imports'],
+                        'Tier': s.get('tier', 'full')
+                    }
+                    for field in metric_fields:
+                        row[field] = s.get(field, '')
+                    writer.writerow(row)
         else:
             # Markdown 格式
             headers = [t('file_path'), t('language'), t('shit_score'), t('coder_score'), t('complexity'), t('lines'), t('imports')]
@@ -83,56 +84,55 @@ def export_report(all_stats, filename, root_dir, include_advice=False):
                     str(s['imports'])
                 ])
 
-            # 计算每列宽度
-            widths = [str_width(h) for h in headers]
-            for row in rows:
-                for i, val in enumerate(row):
-                    widths[i] = max(widths[i], str_width(val))
-
             with open(filename, 'w', encoding='utf-8') as f:
                 f.write(f"# {t('code_quality_report')}\n\n{t('generated_by')}\n\n")
                 
                 # 统计表格
                 f.write(f"## {t('file_analysis')}\n\n")
-                header_line = "| " + " | ".join(pad_to_width(h, w) for h, w in zip(headers, widths)) + " |\n"
-                f.write(header_line)
-                sep_parts = []
-                for i, w in enumerate(widths):
-                    if i < 2:
-                        sep_parts.append("-" * w)
-                    else:
-                        sep_parts.append("-" * (w-1) + ":")
-                f.write("| " + " | ".join(sep_parts) + " |\n")
-                for row in rows:
-                    parts = []
-                    for i, (val, w) in enumerate(zip(row, widths)):
-                        if i < 2:
-                            parts.append(pad_to_width(val, w, 'left'))
-                        else:
-                            parts.append(pad_to_width(val, w, 'right'))
-                    f.write("| " + " | ".join(parts) + " |\n")
+                f.writelines(render_markdown_table(headers, rows, ['left', 'left'] + ['right'] * (len(headers) - 2)))
+                
+                # 超出单文件预算被降级的文件，注明实际分析层级
+                degraded = [s for s in sorted_stats if s.get('tier', 'full') != 'full']
+                if degraded:
+                    f.write(f"\n### {t('over_budget_files')}\n\n")
+                    for s in degraded:
+                        f.write(f"- `{os.path.relpath(s['path'], root_dir)}`: {t('tier_' + s['tier'])}\n")
+                
+                # 变更 × 复杂度热点（--churn）
+                churned = sorted((s for s in sorted_stats if 'hotspot_score' in s and not s['is_exempt']),
+                                 key=lambda s: s['hotspot_score'], reverse=True)
+                if churned:
+                    f.write(f"\n## {t('churn_hotspots')}\n\n")
+                    churn_rows = [[f"`{os.path.relpath(s['path'], root_dir)}`", str(s['hotspot_score']), str(s['shit_score']),
+                                   str(s['churn_commits']), str(s['churn_authors']), str(s['churn_lines'])]
+                                  for s in churned[:20]]
+                    f.writelines(render_markdown_table(
+                        [t('file_path'), 'Hotspot', t('shit_score'), 'Commits', 'Authors', 'Churn'],
+                        churn_rows, ['left'] + ['right'] * 5))
                 
                 # 重构建议部分
                 if include_advice:
                     f.write(f"\n---\n\n## {t('refactor_advisor')}\n\n")
                     
-                    # 对所有有问题的文件生成建议
-                    for stats in sorted_stats:
+                    # 先用廉价的统计指标过滤，只扫描会输出建议的文件
+                    candidates = [stats for stats in sorted_stats if needs_advice(stats, diagnose_file(stats))]
+                    
+                    # 对所有有问题的文件生成建议（可并行计算，按排序顺序逐个写出）
+                    for stats, advice in iter_file_advice(candidates, jobs=jobs, pool=pool, store=store):
                         problems = diagnose_file(stats)
-                        hotspots = analyze_function_complexity(stats['path'], stats.get('lang', 'Python'))
-                        smells = scan_code_smells(stats['path'])
+                        hotspots, smells = advice['hotspots'], advice['smells']
                         
                         # 跳过没有问题的文件
                         if not problems and not hotspots['functions'] and not smells:
                             continue
-                        if stats['shit_score'] < 5 and not problems:
-                            continue
                         
                         rel_path = os.path.relpath(stats['path'], root_dir)
                         f.write(f"### 📄 `{rel_path}`\n\n")
                         f.write(f"**{t('shit_score')}:** {stats['shit_score']} | ")
                         f.write(f"**{t('complexity')}:** {stats['complexity']} | ")
                         f.write(f"**{t('lines')}:** {stats['total']}\n\n")
+                        if advice['truncated']:
+                            f.write(f"> ⏱ {t('advice_truncated')}\n\n")
                         
                         # 问题诊断
                         if problems:
@@ -149,34 +149,22 @@ def export_report(all_stats, filename, root_dir, include_advice=False):
                         # 函数级热点（最多5个）
                         if hotspots['functions']:
                             f.write(f"#### {t('complexity_hotspots')}\n\n")
-                            func_headers = [t('function_name'), t('line_no'), 'CC', t('lines'), t('nesting')]
+                            func_headers = [t('function_name'), t('line_no'), 'CC', t('lines'), t('nesting'), t('code_smells')]
                             
                             # 构建行数据
                             func_rows = []
-                            for func in hotspots['functions'][:5]:
+                            top_funcs = hotspots['functions'][:5]
+                            for func, smell_count in zip(top_funcs, count_smells_by_function(smells, top_funcs)):
                                 func_rows.append([
                                     f"`{func['name']}()`",
                                     f"L{func['line']}",
                                     str(func['complexity']),
                                     str(func['length']),
-                                    str(func['nesting'])
+                                    str(func['nesting']),
+                                    str(smell_count)
                                 ])
                             
-                            # 计算列宽
-                            func_widths = [str_width(h) for h in func_headers]
-                            for row in func_rows:
-                                for i, val in enumerate(row):
-                                    func_widths[i] = max(func_widths[i], str_width(val))
-                            
-                            # 写表头
-                            f.write("| " + " | ".join(pad_to_width(h, w) for h, w in zip(func_headers, func_widths)) + " |\n")
-                            # 写分隔符
-                            sep_parts = ["-" * w if i == 0 else "-" * (w-1) + ":" for i, w in enumerate(func_widths)]
-                            f.write("| " + " | ".join(sep_parts) + " |\n")
-                            # 写数据行
-                            for row in func_rows:
-                                parts = [pad_to_width(val, w, 'left' if i == 0 else 'right') for i, (val, w) in enumerate(zip(row, func_widths))]
-                                f.write("| " + " | ".join(parts) + " |\n")
+                            f.writelines(render_markdown_table(func_headers, func_rows, ['left'] + ['right'] * (len(func_headers) - 1)))
                             f.write("\n")
                         
                         # 代码异味（最多5个）
@@ -0,0 +1,252 @@
+"""
+SQLite 报告导出
+
+--report results.sqlite（或 .db）把文件统计、函数级热点和代码异味写入规范化的表，
+百万行级别的结果可以直接用 SQL 查询（表格软件打开大 CSV 会卡死）：
+- 同一个数据库可以多次导出，每次导出一条 scans 记录，文件记录关联到所属扫描，便于对比历次扫描
+- 语言、目录、异味类型存入字典表，明细表只存编号
+- 全部写入在一个事务中完成，每张表一次 executemany；记录编号在插入前分配，子表无需回查
+- 批量写入之后再建索引（路径、语言、分数、目录），并以视图形式附带常用查询
+"""
+import os
+import time
+import sqlite3
+
+from src.analyzers.refactor_advisor import diagnose_file, needs_advice, iter_file_advice
+from src.analyzers.metrics import active_metric_fields
+from src.analyzers.churn import CHURN_FIELDS
+
+
+SQLITE_SUFFIXES = ('.sqlite', '.sqlite3', '.db')
+
+SQLITE_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS scans (
+        id INTEGER PRIMARY KEY,
+        root TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        files INTEGER NOT NULL
+    )""",
+    "CREATE TABLE IF NOT EXISTS languages (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+    "CREATE TABLE IF NOT EXISTS directories (id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE)",
+    """CREATE TABLE IF NOT EXISTS files (
+        id INTEGER PRIMARY KEY,
+        scan_id INTEGER NOT NULL REFERENCES scans(id),
+        directory_id INTEGER NOT NULL REFERENCES directories(id),
+        language_id INTEGER NOT NULL REFERENCES languages(id),
+        path TEXT NOT NULL,
+        shit_score REAL NOT NULL,
+        coder_score INTEGER,
+        complexity INTEGER NOT NULL,
+        max_nesting INTEGER NOT NULL,
+        ast INTEGER NOT NULL,
+        total_lines INTEGER NOT NULL,
+        code_lines INTEGER NOT NULL,
+        comment_lines INTEGER NOT NULL,
+        imports INTEGER NOT NULL,
+        tier TEXT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS file_metrics (
+        file_id INTEGER NOT NULL REFERENCES files(id),
+        name TEXT NOT NULL,
+        value REAL,
+        PRIMARY KEY (file_id, name)
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS functions (
+        id INTEGER PRIMARY KEY,
+        file_id INTEGER NOT NULL REFERENCES files(id),
+        name TEXT NOT NULL,
+        line INTEGER NOT NULL,
+        length INTEGER NOT NULL,
+        complexity INTEGER NOT NULL,
+        nesting INTEGER NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS smell_types (
+        id INTEGER PRIMARY KEY,
+        key TEXT NOT NULL UNIQUE,
+        name TEXT NOT NULL,
+        suggestion TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS smells (
+        file_id INTEGER NOT NULL REFERENCES files(id),
+        smell_type_id INTEGER NOT NULL REFERENCES smell_types(id),
+        line INTEGER NOT NULL
+    )""",
+)
+
+SQLITE_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_files_path ON files(path)",
+    "CREATE INDEX IF NOT EXISTS idx_files_language ON files(language_id)",
+    "CREATE INDEX IF NOT EXISTS idx_files_score ON files(shit_score)",
+    "CREATE INDEX IF NOT EXISTS idx_files_directory ON files(directory_id)",
+    "CREATE INDEX IF NOT EXISTS idx_files_scan ON files(scan_id)",
+    "CREATE INDEX IF NOT EXISTS idx_functions_file ON functions(file_id)",
+    "CREATE INDEX IF NOT EXISTS idx_functions_complexity ON functions(complexity)",
+    "CREATE INDEX IF NOT EXISTS idx_smells_file ON smells(file_id)",
+    "CREATE INDEX IF NOT EXISTS idx_smells_type ON smells(smell_type_id)",
+)
+
+# 常用查询，以视图写入数据库（SELECT * FROM <视图名>）；除 language_trends 外均只看最近一次扫描
+LATEST_SCAN = "(SELECT MAX(id) FROM scans)"
+CANNED_QUERIES = {
+    'latest_files': f"""
+        SELECT f.id, f.path, d.path AS directory, l.name AS language, f.shit_score, f.coder_score,
+               f.complexity, f.max_nesting, f.total_lines, f.code_lines, f.comment_lines, f.imports, f.tier
+        FROM files f JOIN directories d ON d.id = f.directory_id JOIN languages l ON l.id = f.language_id
+        WHERE f.scan_id = {LATEST_SCAN}""",
+    # 每个目录复杂度最高的 5 个函数
+    'worst_functions_by_directory': f"""
+        SELECT directory, file, function, line, complexity, length, nesting, rank FROM (
+            SELECT d.path AS directory, f.path AS file, fn.name AS function, fn.line, fn.complexity,
+                   fn.length, fn.nesting,
+                   ROW_NUMBER() OVER (PARTITION BY f.directory_id ORDER BY fn.complexity DESC, fn.length DESC) AS rank
+            FROM functions fn JOIN files f ON f.id = fn.file_id JOIN directories d ON d.id = f.directory_id
+            WHERE f.scan_id = {LATEST_SCAN}
+        ) WHERE rank <= 5 ORDER BY directory, rank""",
+    'directory_summary': f"""
+        SELECT d.path AS directory, COUNT(*) AS files, SUM(f.code_lines) AS code_lines,
+               ROUND(AVG(f.shit_score), 1) AS avg_shit_score, MAX(f.shit_score) AS max_shit_score
+        FROM files f JOIN directories d ON d.id = f.directory_id
+        WHERE f.scan_id = {LATEST_SCAN}
+        GROUP BY d.id ORDER BY avg_shit_score DESC""",
+    # 历次扫描中各语言的规模和质量变化
+    'language_trends': """
+        SELECT s.id AS scan_id, s.created_at, l.name AS language, COUNT(*) AS files,
+               SUM(f.code_lines) AS code_lines, ROUND(AVG(f.complexity), 1) AS avg_complexity,
+               ROUND(AVG(f.shit_score), 1) AS avg_shit_score, MAX(f.shit_score) AS max_shit_score
+        FROM files f JOIN scans s ON s.id = f.scan_id JOIN languages l ON l.id = f.language_id
+        GROUP BY s.id, l.id ORDER BY l.name, s.id""",
+    'smell_summary': f"""
+        SELECT st.key, st.name, COUNT(*) AS occurrences, COUNT(DISTINCT sm.file_id) AS files
+        FROM smells sm JOIN smell_types st ON st.id = sm.smell_type_id JOIN files f ON f.id = sm.file_id
+        WHERE f.scan_id = {LATEST_SCAN}
+        GROUP BY st.id ORDER BY occurrences DESC""",
+}
+# 依赖窗口函数（SQLite 3.25+）的查询，旧版本 SQLite 上跳过
+WINDOW_QUERIES = ('worst_functions_by_directory',)
+
+
+def is_sqlite_report(filename):
+    """是否导出为 SQLite 数据库"""
+    return filename.lower().endswith(SQLITE_SUFFIXES)
+
+
+def _relative_paths(all_stats, root_dir):
+    """相对路径（'/' 分隔）；扫描产出的路径都以根路径为前缀，直接截取，避免逐个 relpath"""
+    prefix = os.path.join(root_dir, '')
+    return [(s['path'][len(prefix):] if s['path'].startswith(prefix) else os.path.relpath(s['path'], root_dir))
+            .replace(os.sep, '/') for s in all_stats]
+
+
+def _next_id(conn, table):
+    return conn.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}").fetchone()[0]
+
+
+def _dictionary_ids(conn, table, column, values):
+    """字典表：返回 值 -> 编号，缺少的值批量插入"""
+    ids = dict(conn.execute(f"SELECT {column}, id FROM {table}"))
+    missing = [value for value in dict.fromkeys(values) if value not in ids]
+    start = _next_id(conn, table)
+    conn.executemany(f"INSERT INTO {table} (id, {column}) VALUES (?, ?)", enumerate(missing, start))
+    ids.update((value, i) for i, value in enumerate(missing, start))
+    return ids
+
+
+def _advice_rows(conn, stats_list, file_ids, jobs, pool, store):
+    """
+    生成函数热点和异味明细（与 Markdown 报告相同的候选文件）
+
+    Returns:
+        tuple: (函数记录, 异味记录)
+    """
+    candidates = [stats for stats in stats_list if needs_advice(stats, diagnose_file(stats))]
+    smell_types = {key: i for key, i in conn.execute("SELECT key, id FROM smell_types")}
+    new_types = []
+    next_type = _next_id(conn, 'smell_types')
+    function_id = _next_id(conn, 'functions')
+    function_rows = []
+    smell_rows = []
+    for stats, advice in iter_file_advice(candidates, jobs=jobs, pool=pool, store=store):
+        file_id = file_ids[id(stats)]
+        for func in advice['hotspots']['functions']:
+            function_rows.append((function_id, file_id, func['name'], func['line'], func['length'],
+                                  func['complexity'], func['nesting']))
+            function_id += 1
+        for smell in advice['smells']:
+            type_id = smell_types.get(smell['key'])
+            if type_id is None:
+                type_id = smell_types[smell['key']] = next_type
+                new_types.append((type_id, smell['key'], smell['name'], smell['suggestion']))
+                next_type += 1
+            smell_rows.extend((file_id, type_id, line) for line in smell.get('all_lines', smell['lines']))
+    conn.executemany("INSERT INTO smell_types (id, key, name, suggestion) VALUES (?, ?, ?, ?)", new_types)
+    return function_rows, smell_rows
+
+
+def export_sqlite(all_stats, filename, root_dir, include_advice=False, jobs=1, pool=None, store=None):
+    """
+    导出到 SQLite 数据库（已存在时追加一次新的扫描）
+
+    Args:
+        include_advice: 同时写入函数热点和代码异味（需要扫描源码）
+        jobs / pool: 生成重构建议的进程数 / 共享进程池
+        store: 会话的重构建议缓存（AdviceStore）
+
+    Returns:
+        dict: 各表写入的行数
+    """
+    conn = sqlite3.connect(filename, isolation_level=None)
+    try:
+        # 使用默认的回滚日志：追加到已有数据库时，中途失败（或进程崩溃）不会损坏之前的扫描
+        conn.execute("BEGIN")
+        for statement in SQLITE_SCHEMA:
+            conn.execute(statement)
+
+        scan_id = conn.execute(
+            "INSERT INTO scans (root, created_at, files) VALUES (?, ?, ?)",
+            (os.path.abspath(root_dir), time.strftime('%Y-%m-%d %H:%M:%S'), len(all_stats))
+        ).lastrowid
+        rel_paths = _relative_paths(all_stats, root_dir)
+        directories = [os.path.dirname(p) for p in rel_paths]
+        language_ids = _dictionary_ids(conn, 'languages', 'name', (s['lang'] for s in all_stats))
+        directory_ids = _dictionary_ids(conn, 'directories', 'path', directories)
+
+        first_file = _next_id(conn, 'files')
+        conn.executemany(
+            "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ((first_file + i, scan_id, directory_ids[directory], language_ids[s['lang']], path,
+              s['shit_score'], s['coder_score'] if s['coder_score'] >= 0 else None, s['complexity'],
+              s['max_nesting'], int(bool(s['ast_success'])), s['total'], s['code'], s['comments'],
+              s['imports'], s.get('tier', 'full'))
+             for i, (s, path, directory) in enumerate(zip(all_stats, rel_paths, directories)))
+        )
+        counts = {'files': len(all_stats)}
+
+        # 扩展指标和变更字段存为 (文件, 名称, 值)
+        extra_fields = active_metric_fields() + list(CHURN_FIELDS)
+        metric_rows = [(first_file + i, field, s[field])
+                       for i, s in enumerate(all_stats) for field in extra_fields if field in s]
+        conn.executemany("INSERT INTO file_metrics VALUES (?, ?, ?)", metric_rows)
+        counts['file_metrics'] = len(metric_rows)
+
+        if include_advice:
+            file_ids = {id(s): first_file + i for i, s in enumerate(all_stats)}
+            function_rows, smell_rows = _advice_rows(conn, all_stats, file_ids, jobs, pool, store)
+            conn.executemany("INSERT INTO functions VALUES (?, ?, ?, ?, ?, ?, ?)", function_rows)
+            conn.executemany("INSERT INTO smells VALUES (?, ?, ?)", smell_rows)
+            counts['functions'] = len(function_rows)
+            counts['smells'] = len(smell_rows)
+
+        for statement in SQLITE_INDEXES:
+            conn.execute(statement)
+        for name, query in CANNED_QUERIES.items():
+            if name in WINDOW_QUERIES and sqlite3.sqlite_version_info < (3, 25, 0):
+                continue
+            conn.execute(f"CREATE VIEW IF NOT EXISTS {name} AS {query}")
+        conn.execute("COMMIT")
+        return counts
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
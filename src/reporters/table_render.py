@@ -0,0 +1,74 @@
+"""
+表格渲染
+
+终端表格和 Markdown 报告共用的显示宽度计算与对齐填充（中日韩全角字符占 2 格）。
+纯 ASCII 字符串直接取长度；其余字符串的宽度按内容缓存，重复出现的单元格只计算一次；
+渲染整张表时每个单元格只测量一次宽度，列宽计算和填充共用测量结果。
+"""
+import unicodedata
+
+
+# 非 ASCII 字符串的显示宽度缓存
+WIDTH_CACHE_SIZE = 65536
+_width_cache = {}
+
+
+def str_width(s):
+    """计算字符串显示宽度（考虑中文字符占2格）"""
+    s = str(s)
+    if s.isascii():
+        return len(s)
+    width = _width_cache.get(s)
+    if width is None:
+        width = 0
+        for char in s:
+            width += 2 if unicodedata.east_asian_width(char) in ('F', 'W') else 1
+        if len(_width_cache) >= WIDTH_CACHE_SIZE:
+            _width_cache.clear()
+        _width_cache[s] = width
+    return width
+
+
+def pad_to_width(s, width, align='left', current=None):
+    """
+    将字符串填充到指定显示宽度
+
+    Args:
+        current: 已知的字符串显示宽度（避免重复测量）
+    """
+    s = str(s)
+    padding = width - (str_width(s) if current is None else current)
+    if padding <= 0:
+        return s
+    if align == 'right':
+        return ' ' * padding + s
+    return s + ' ' * padding
+
+
+def render_markdown_table(headers, rows, aligns):
+    """
+    渲染对齐的 Markdown 表格
+
+    Args:
+        headers: 表头
+        rows: 行数据（字符串列表）
+        aligns: 每列对齐方式 'left' / 'right'，右对齐列的分隔符以 : 结尾
+
+    Returns:
+        list: 表格各行文本（含换行符）
+    """
+    header_widths = [str_width(h) for h in headers]
+    cell_widths = [[str_width(val) for val in row] for row in rows]
+    widths = list(header_widths)
+    for row_widths in cell_widths:
+        for i, w in enumerate(row_widths):
+            if w > widths[i]:
+                widths[i] = w
+
+    lines = ["| " + " | ".join(pad_to_width(h, w, current=c) for h, w, c in zip(headers, widths, header_widths)) + " |\n"]
+    lines.append("| " + " | ".join("-" * w if a == 'left' else "-" * (w - 1) + ":" for w, a in zip(widths, aligns)) + " |\n")
+    for row, row_widths in zip(rows, cell_widths):
+        lines.append("| " + " | ".join(
+            pad_to_width(val, w, a, c) for val, w, a, c in zip(row, widths, aligns, row_widths)
+        ) + " |\n")
+    return lines
@@ -0,0 +1,190 @@
+"""
+测试公共夹具：多语言源码树（含相互 import、深度嵌套、各类异味、大文件、压缩文件和二进制文件）
+"""
+import os
+
+import pytest
+
+
+PY_SERVICE = '''\
+import os
+import json
+from app import models
+from app.util import helpers
+
+
+API_ROOT = "/home/deploy/service"  # 硬编码路径
+
+
+def handle(request, user, session, config, cache, logger, retries):
+    """超过参数阈值的函数"""
+    # TODO: 拆分这个函数
+    try:
+        if request:
+            for item in request.items:
+                if item.kind == 42:
+                    while item.retry < 100:
+                        if item.ok and not item.failed or cache:
+                            print("debug", item)
+                            item.retry += 1
+    except:
+        pass
+    # if legacy: return old_handle(request)
+    return models.save(helpers.clean(request), "duplicated literal value")
+
+
+def render(value):
+    label = "duplicated literal value"
+    return f"{label}: {value * 3600}"
+'''
+
+PY_MODELS = '''\
+from app.util import helpers
+
+
+class Model:
+    def save(self, data):
+        if data is None:
+            return None
+        return helpers.clean(data)
+
+
+def save(data):
+    return Model().save(data)
+'''
+
+PY_HELPERS = '''\
+def clean(data):
+    """去掉空白"""
+    if isinstance(data, str):
+        return data.strip()
+    return data
+'''
+
+JS_WIDGET = '''\
+import { render } from './view.js';
+
+// TODO refactor
+export function widget(a, b, c) {
+    if (a && b) {
+        for (let i = 0; i < 250; i++) {
+            if (c[i] === 8080) {
+                console.log("found", i);
+                while (b > 0) {
+                    b--;
+                }
+            }
+        }
+    }
+    return render("C:\\\\temp\\\\widget", a);
+}
+'''
+
+JS_VIEW = '''\
+export function render(path, value) {
+    // for (const x of value) old code
+    return `${path}:${value}`;
+}
+'''
+
+GO_SERVER = '''\
+package main
+
+import "fmt"
+
+func serve(port int) error {
+\tif port > 1024 {
+\t\tfor i := 0; i < 10; i++ {
+\t\t\tif i%2 == 0 {
+\t\t\t\tfmt.Println("tick", i)
+\t\t\t}
+\t\t}
+\t}
+\treturn nil
+}
+'''
+
+JAVA_SERVICE = '''\
+package app;
+
+public class Service {
+    public int compute(int alpha, int beta, int gamma, int delta, int epsilon, int zeta, int eta, int theta) {
+        int total = 0;
+        if (alpha > 10) {
+            for (int i = 0; i < beta; i++) {
+                if (i % 3 == 0 || gamma > 500) {
+                    System.out.println("value " + i);
+                    total += 9999;
+                }
+            }
+        }
+        return total;
+    }
+}
+'''
+
+C_UTIL = '''\
+#include <stdio.h>
+
+/* FIXME bounds */
+int sum(int *values, int count) {
+    int total = 0;
+    for (int i = 0; i < count; i++) {
+        if (values[i] > 255) {
+            total += values[i];
+        }
+    }
+    return total;
+}
+'''
+
+
+def _large_python(functions=400):
+    """超过 64 KiB 的 Python 文件（参与分片的按大小均衡）"""
+    parts = []
+    for i in range(functions):
+        parts.append(
+            f"def generated_{i}(value):\n"
+            f"    if value > {i + 100}:\n"
+            f"        return value * {i + 7}\n"
+            f"    for step in range(value):\n"
+            f"        if step % 2 == 0:\n"
+            f"            value += step\n"
+            f"    return value\n\n\n"
+        )
+    return ''.join(parts)
+
+
+def write_source_tree(root):
+    """在 root 下写入多语言源码树，返回 root"""
+    files = {
+        'app/service.py': PY_SERVICE,
+        'app/models.py': PY_MODELS,
+        'app/util/helpers.py': PY_HELPERS,
+        'app/generated_tables.py': _large_python(),
+        'web/widget.js': JS_WIDGET,
+        'web/view.js': JS_VIEW,
+        'web/bundle.min.js': 'var a=1;' * 4000 + '\n',
+        'cmd/server.go': GO_SERVER,
+        'java/app/Service.java': JAVA_SERVICE,
+        'native/util.c': C_UTIL,
+    }
+    for rel_path, content in files.items():
+        path = os.path.join(root, *rel_path.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+    with open(os.path.join(root, 'app', 'blob.py'), 'wb') as f:
+        f.write(b'\0\1\2binary' * 100)
+    return root
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """磁盘缓存写到临时目录，测试之间互不影响"""
+    monkeypatch.setenv('TYPELINEAS_CACHE_DIR', str(tmp_path / 'cache'))
+
+
+@pytest.fixture
+def source_tree(tmp_path):
+    return write_source_tree(str(tmp_path / 'project'))
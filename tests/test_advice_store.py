@@ -0,0 +1,87 @@
+"""
+重构建议缓存：由会话持有，文件内容、预算或规则变化后重新扫描
+"""
+import os
+
+import pytest
+
+from src.analyzers import refactor_advisor
+from src.analyzers.session import Analyzer
+from src.analyzers.smell_rules import SMELL_RULES, register_smell_rule, set_smell_rules
+from src.analyzers.refactor_advisor import AdviceStore, get_file_advice, iter_file_advice
+
+
+@pytest.fixture
+def computed(monkeypatch):
+    """记录实际扫描的文件"""
+    calls = []
+    real = refactor_advisor.compute_file_advice
+
+    def counting(file_path, *args, **kwargs):
+        calls.append(file_path)
+        return real(file_path, *args, **kwargs)
+
+    monkeypatch.setattr(refactor_advisor, 'compute_file_advice', counting)
+    return calls
+
+
+@pytest.fixture
+def restore_rules():
+    saved = list(SMELL_RULES.values())
+    yield
+    set_smell_rules(saved)
+
+
+def _service(source_tree):
+    path = os.path.join(source_tree, 'app', 'service.py')
+    return Analyzer(use_cache=False).analyze_path(path)
+
+
+def test_advice_reused_until_file_changes(source_tree, computed):
+    stats = _service(source_tree)
+    store = AdviceStore()
+    first = get_file_advice(stats, store)
+    assert get_file_advice(stats, store) is first
+    assert computed == [stats['path']]
+
+    with open(stats['path'], 'a', encoding='utf-8') as f:
+        f.write('\n\ndef extra(value):\n    # FIXME: new smell\n    return value\n')
+    changed = get_file_advice(stats, store)
+    assert len(computed) == 2
+    todo_count = lambda advice: sum(s['count'] for s in advice['smells'] if s['key'] == 'todo_fixme')
+    assert todo_count(changed) == todo_count(first) + 1
+
+
+def test_rule_change_invalidates_advice(source_tree, computed, restore_rules):
+    stats = _service(source_tree)
+    store = AdviceStore()
+    get_file_advice(stats, store)
+    register_smell_rule('no_models_save', r'models\.save\(', literals=['models.save'])
+    advice = get_file_advice(stats, store)
+    assert len(computed) == 2
+    assert 'no_models_save' in {s['key'] for s in advice['smells']}
+
+
+def test_sessions_have_separate_stores(source_tree, computed):
+    stats = _service(source_tree)
+    first, second = Analyzer(use_cache=False), Analyzer(use_cache=False)
+    get_file_advice(stats, first.advice_store)
+    get_file_advice(stats, second.advice_store)
+    assert len(computed) == 2
+
+    # 预算不同的缓存条目互不复用
+    store = AdviceStore(max_ms=1000)
+    get_file_advice(stats, store)
+    store.max_ms = 2000
+    get_file_advice(stats, store)
+    assert len(computed) == 4
+
+
+def test_iter_file_advice_fills_store(source_tree, computed):
+    analyzer = Analyzer(use_cache=False)
+    stats_list = analyzer.scan_tree(source_tree)['files']
+    streamed = dict((s['path'], advice) for s, advice in iter_file_advice(stats_list, store=analyzer.advice_store))
+    count = len(computed)
+    for stats in stats_list:
+        assert get_file_advice(stats, analyzer.advice_store) == streamed[stats['path']]
+    assert len(computed) == count
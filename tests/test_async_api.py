@@ -0,0 +1,52 @@
+"""
+asyncio 接口：调用方自建的进程池（没有初始化函数）也使用会话的预算、指标和当前的自定义规则
+"""
+import os
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from src.analyzers.session import Analyzer
+from src.analyzers.smell_rules import SMELL_RULES, register_smell_rule, set_smell_rules
+from src.analyzers.async_api import analyze_many, advise_async
+
+
+@pytest.fixture
+def restore_rules():
+    saved = list(SMELL_RULES.values())
+    yield
+    set_smell_rules(saved)
+
+
+@pytest.fixture
+def plain_pool():
+    """不带初始化函数的进程池，子进程先启动，之后主进程注册的规则不会被继承"""
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        pool.submit(os.getpid).result()
+        yield pool
+
+
+def _source_paths(source_tree):
+    return [os.path.join(source_tree, *rel.split('/'))
+            for rel in ('app/service.py', 'app/generated_tables.py', 'web/widget.js')]
+
+
+@pytest.mark.parametrize('use_pool', [False, True])
+def test_analyze_many_uses_session_config(source_tree, plain_pool, use_pool):
+    analyzer = Analyzer(max_lines=100, metrics=['cognitive'])
+    paths = _source_paths(source_tree)
+    results = asyncio.run(analyze_many(paths, executor=plain_pool if use_pool else None, analyzer=analyzer))
+    assert results == [analyzer.analyze_path(path) for path in paths]
+    assert results[1]['tier'] == 'regex'
+    assert all('cognitive_complexity' in stats for stats in results if stats['tier'] == 'full')
+
+
+def test_advise_async_sends_current_rules(source_tree, plain_pool, restore_rules):
+    register_smell_rule('no_models_save', r'models\.save\(', literals=['models.save'])
+    stats = Analyzer().analyze_path(os.path.join(source_tree, 'app', 'service.py'))
+    advice = asyncio.run(advise_async(stats, executor=plain_pool))
+    assert 'no_models_save' in {smell['key'] for smell in advice['smells']}
+    # 同一进程的线程执行器直接共用规则
+    advice = asyncio.run(advise_async(stats))
+    assert 'no_models_save' in {smell['key'] for smell in advice['smells']}
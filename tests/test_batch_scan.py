@@ -0,0 +1,31 @@
+"""
+批量扫描：共享进程池的结果与逐个仓库扫描一致，耗时按仓库记录
+"""
+import os
+import shutil
+
+from src.analyzers import batch_scan
+from src.analyzers.session import Analyzer
+from src.analyzers.scheduler import create_worker_pool
+from src.analyzers.batch_scan import analyze_all_files
+
+
+def test_shared_pool_groups_results_by_repository(source_tree, tmp_path, monkeypatch):
+    other = str(tmp_path / 'other')
+    shutil.copytree(os.path.join(source_tree, 'app'), other)
+    roots = [source_tree, other]
+    recorded = {}
+    monkeypatch.setattr(batch_scan, 'record_timings',
+                        lambda root, paths, elapsed: recorded.setdefault(root, (list(paths), list(elapsed))))
+
+    with create_worker_pool(2) as pool:
+        per_repo = analyze_all_files(roots, jobs=2, pool=pool)
+
+    assert set(recorded) == set(roots)
+    for root_dir, stats_list in zip(roots, per_repo):
+        paths, elapsed = recorded[root_dir]
+        assert all(path.startswith(root_dir + os.sep) for path in paths) and len(paths) == len(elapsed)
+        single = Analyzer(use_cache=False).scan_tree(root_dir)['files']
+        assert sorted(s['path'] for s in stats_list) == sorted(s['path'] for s in single)
+    # 二进制文件不计入结果，但耗时照常记录
+    assert len(recorded[source_tree][0]) == len(per_repo[0]) + 1
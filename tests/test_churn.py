@@ -0,0 +1,127 @@
+"""
+变更索引：git log --numstat -z 输出的流式解析（重命名、二进制文件、分块读取）、半衰期权重和热点排名
+"""
+import io
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from src.analyzers.churn import (
+    iter_nul_records, iter_numstat_commits, build_churn_index, read_churn_index, apply_churn,
+)
+
+
+DAY = 86400
+NEWEST = 1_700_000_000
+
+
+def _log(*commits):
+    """按 git log --numstat -z --format=%x01%at%x00%aE 的格式拼出输出（提交从新到旧）"""
+    out = b''
+    for timestamp, author, changes in commits:
+        out += b'\x01%d\0%s\0\n' % (timestamp, author)
+        for change in changes:
+            if len(change) == 4:
+                added, deleted, old_path, path = change
+                out += b'%s\t%s\t\0%s\0%s\0' % (added, deleted, old_path, path)
+            else:
+                added, deleted, path = change
+                out += b'%s\t%s\t%s\0' % (added, deleted, path)
+    return out
+
+
+HISTORY = _log(
+    (NEWEST, b'b@x', [(b'3', b'1', b'src/b.py', b'src/c.py'), (b'-', b'-', b'logo.png')]),
+    (NEWEST - 90 * DAY, b'a@x', [(b'0', b'0', b'src/a.py', b'src/b.py'), (b'5', b'0', b'README')]),
+    (NEWEST - 180 * DAY, b'a@x', [(b'10', b'2', b'src/a.py'), (b'-', b'-', b'logo.png')]),
+    (NEWEST - 360 * DAY, b'c@x', [(b'1', b'1', b'src/a.py'), (b'7', b'0', b'README')]),
+)
+
+
+class ShortReads(io.RawIOBase):
+    """每次最多返回 n 个字节的流（管道的短读）"""
+
+    def __init__(self, data, n):
+        self.data = data
+        self.pos = 0
+        self.n = n
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        chunk = self.data[self.pos:self.pos + min(self.n, size if size > 0 else self.n)]
+        self.pos += len(chunk)
+        return chunk
+
+
+def test_parse_renames_and_binary_files():
+    commits = list(iter_numstat_commits(io.BytesIO(HISTORY)))
+    assert [(timestamp, author) for timestamp, author, _ in commits] == \
+        [(NEWEST, b'b@x'), (NEWEST - 90 * DAY, b'a@x'), (NEWEST - 180 * DAY, b'a@x'), (NEWEST - 360 * DAY, b'c@x')]
+    assert commits[0][2] == [(b'src/c.py', b'src/b.py', 4), (b'logo.png', None, 0)]
+    assert commits[1][2] == [(b'src/b.py', b'src/a.py', 0), (b'README', None, 5)]
+
+
+@pytest.mark.parametrize('n, chunk_size', [(1, 1), (3, 2), (7, 1 << 20), (len(HISTORY), 5)])
+def test_short_reads_split_records(n, chunk_size):
+    assert list(iter_nul_records(ShortReads(HISTORY, n), chunk_size)) == HISTORY.split(b'\0')[:-1]
+    assert list(iter_numstat_commits(ShortReads(HISTORY, n))) == list(iter_numstat_commits(io.BytesIO(HISTORY)))
+
+
+def test_rename_chain_credits_current_path():
+    index, count = build_churn_index(iter_numstat_commits(io.BytesIO(HISTORY)))
+    assert count == 4
+    # 旧路径 a.py、b.py 上更早的修改都计入当前路径 c.py
+    assert set(index) == {'src/c.py', 'logo.png', 'README'}
+    entry = index['src/c.py']
+    assert (entry.commits, entry.lines, entry.last_time) == (4, 4 + 0 + 12 + 2, NEWEST)
+    assert bin(entry.authors).count('1') == 3
+    assert (index['logo.png'].commits, index['logo.png'].lines) == (2, 0)
+
+
+def test_half_life_weighting():
+    index, _ = build_churn_index(iter_numstat_commits(io.BytesIO(HISTORY)), half_life_days=90)
+    assert index['src/c.py'].weight == pytest.approx(1 + 0.5 + 0.25 + 0.0625)
+    assert index['logo.png'].weight == pytest.approx(1.25)
+    assert index['README'].weight == pytest.approx(0.5 + 0.0625)
+    index, _ = build_churn_index(iter_numstat_commits(io.BytesIO(HISTORY)), half_life_days=180)
+    assert index['README'].weight == pytest.approx(0.5 ** 0.5 + 0.25)
+
+
+def test_empty_history():
+    assert build_churn_index(iter_numstat_commits(io.BytesIO(b''))) == ({}, 0)
+
+
+def _git(repo, *args, when=NEWEST, email='a@x'):
+    env = dict(os.environ, GIT_AUTHOR_DATE=f'{when} +0000', GIT_COMMITTER_DATE=f'{when} +0000',
+               GIT_AUTHOR_NAME='dev', GIT_AUTHOR_EMAIL=email, GIT_COMMITTER_NAME='dev', GIT_COMMITTER_EMAIL=email)
+    subprocess.run(['git', '-C', repo, *args], check=True, env=env, stdout=subprocess.DEVNULL)
+
+
+@pytest.mark.skipif(shutil.which('git') is None, reason='git not available')
+def test_read_churn_index_from_git(tmp_path):
+    repo = str(tmp_path)
+    _git(repo, 'init', '-q')
+    (tmp_path / 'old.py').write_text('a = 1\n')
+    (tmp_path / 'stable.py').write_text('b = 1\n')
+    _git(repo, 'add', '.')
+    _git(repo, 'commit', '-qm', 'first', when=NEWEST - 90 * DAY)
+    (tmp_path / 'old.py').write_text('a = 1\na = 2\n')
+    _git(repo, 'commit', '-qam', 'second', when=NEWEST - 30 * DAY, email='b@x')
+    _git(repo, 'mv', 'old.py', 'new.py')
+    _git(repo, 'commit', '-qm', 'rename')
+
+    index, count = read_churn_index(repo)
+    assert count == 3
+    assert set(index) == {'new.py', 'stable.py'}
+    assert (index['new.py'].commits, index['new.py'].lines) == (3, 2)
+    assert bin(index['new.py'].authors).count('1') == 2
+
+    stats = [{'path': str(tmp_path / name), 'shit_score': 40.0, 'is_exempt': False} for name in ('stable.py', 'new.py')]
+    ranked = apply_churn(stats, repo, index)
+    assert [os.path.basename(s['path']) for s in ranked] == ['new.py', 'stable.py']
+    assert ranked[0]['hotspot_score'] == 40.0 and ranked[0]['churn_commits'] == 3
+    assert read_churn_index(str(tmp_path / 'missing')) is None
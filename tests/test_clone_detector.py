@@ -0,0 +1,59 @@
+"""
+克隆检测：跨文件重复块只报告一次，同文件重叠自匹配和纯符号行不计入
+"""
+import os
+
+from src.config.constants import LANG_DEFINITIONS
+from src.analyzers.clone_detector import CLONE_WINDOW, MIN_CLONE_LINES, detect_clones, normalize_lines
+
+
+PY_INFO = LANG_DEFINITIONS['py']
+
+
+def _write(root, name, lines):
+    path = os.path.join(root, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    return path
+
+
+def _shared_block(n=20):
+    return [f"    total_{i} = compute_{i}(value, {i}) + offset" for i in range(n)]
+
+
+def test_cross_file_block_reported_once(tmp_path):
+    block = _shared_block()
+    a = _write(str(tmp_path), 'a.py', ['def first(value, offset):'] + block + ['    return None'])
+    b = _write(str(tmp_path), 'b.py', ['import os', '', 'def second(value, offset):'] + block)
+    clones = detect_clones([(a, PY_INFO), (b, PY_INFO)])
+    assert len(clones) == 1
+    clone = clones[0]
+    assert (clone['file_a'], clone['file_b']) == (a, b)
+    assert clone['lines'] >= MIN_CLONE_LINES
+    # 指纹只覆盖部分窗口，区间不一定从块首开始，但必须落在块内且两侧对齐
+    assert 2 <= clone['start_a'] and clone['end_a'] <= 21
+    assert clone['start_b'] - clone['start_a'] == 2 and clone['end_b'] - clone['end_a'] == 2
+
+
+def test_periodic_file_has_no_overlapping_self_matches(tmp_path):
+    # 周期大于窗口长度的重复行模式（编码表、测试数据表等）：每个偏移都是重叠的自匹配
+    period = CLONE_WINDOW + 1
+    lines = [f"entry_{i % period} = register(table, {i % period}, flags)" for i in range(12 * period)]
+    path = _write(str(tmp_path), 'table.py', lines)
+    for clone in detect_clones([(path, PY_INFO)]):
+        assert clone['end_a'] < clone['start_b']
+
+
+def test_separate_copies_in_same_file_are_reported(tmp_path):
+    block = _shared_block(12)
+    path = _write(str(tmp_path), 'dup.py', ['def one(value, offset):'] + block
+                  + ['', 'def two(value, offset):'] + block)
+    clones = detect_clones([(path, PY_INFO)])
+    assert len(clones) == 1
+    assert clones[0]['end_a'] < clones[0]['start_b']
+
+
+def test_punctuation_only_lines_are_skipped():
+    lines = ['    "": "",', '    "a": "b",', '}]);', '    key = value', ')']
+    normalized = normalize_lines(lines, 'Python', PY_INFO[1])
+    assert [line_no for line_no, _ in normalized] == [4]
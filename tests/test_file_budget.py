@@ -0,0 +1,53 @@
+"""
+单文件预算：解析阶段超时（解析前或解析后）降级为正则估算
+"""
+import time
+
+import pytest
+
+from src.analyzers import file_analyzer
+from src.analyzers.session import Analyzer
+
+
+PY_SOURCE = ''.join(f"def f{i}(x):\n    if x > {i}:\n        return x\n    return {i}\n\n" for i in range(20))
+GO_SOURCE = 'package main\n\nfunc f(x int) int {\n\tif x > 1 {\n\t\treturn x\n\t}\n\treturn 0\n}\n'
+NATIVE_RESULT = {'complexity': 99, 'max_nesting': 9}
+
+
+def _slow(fn, seconds, calls):
+    def wrapper(*args, **kwargs):
+        calls.append(args)
+        time.sleep(seconds)
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+@pytest.mark.parametrize('delay, tier', [(0, 'full'), (0.05, 'regex')])
+def test_slow_python_parse_falls_back_to_regex(monkeypatch, delay, tier):
+    calls = []
+    monkeypatch.setattr(file_analyzer, 'analyze_python_source',
+                        _slow(file_analyzer.analyze_python_source, delay, calls))
+    stats = Analyzer(max_ms=20).analyze_buffer(PY_SOURCE, 'Python')
+    assert calls and stats['tier'] == tier
+    assert stats['ast_success'] == (tier == 'full')
+    # 降级后逐行扫描照常完成
+    assert stats['total'] == PY_SOURCE.count('\n') and stats['code'] > 0
+
+
+@pytest.mark.parametrize('delay, tier', [(0, 'full'), (0.05, 'regex')])
+def test_slow_native_parse_falls_back_to_regex(monkeypatch, delay, tier):
+    monkeypatch.setattr(file_analyzer, 'parse_with_backend', _slow(lambda content, lang: NATIVE_RESULT, delay, []))
+    stats = Analyzer(max_ms=20, metrics=['cognitive']).analyze_buffer(GO_SOURCE, 'Go')
+    assert stats['tier'] == tier
+    assert (stats['complexity'] == 99) == (tier == 'full')
+    # 正则层级不计算扩展指标
+    assert ('cognitive_complexity' in stats) == (tier == 'full')
+
+
+def test_parse_skipped_when_budget_spent_before_parse(monkeypatch):
+    calls = []
+    monkeypatch.setattr(file_analyzer, 'decode_source_lines', _slow(file_analyzer.decode_source_lines, 0.05, []))
+    monkeypatch.setattr(file_analyzer, 'analyze_python_source',
+                        _slow(file_analyzer.analyze_python_source, 0, calls))
+    stats = Analyzer(max_ms=20).analyze_buffer(PY_SOURCE, 'Python')
+    assert stats['tier'] == 'regex' and not calls
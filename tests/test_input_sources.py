@@ -0,0 +1,167 @@
+"""
+输入源：git 版本与归档读取，无效输入给出错误而不是异常堆栈
+"""
+import os
+import sys
+import shutil
+import tarfile
+import subprocess
+
+import pytest
+
+from src.config.constants import LANG_DEFINITIONS
+from src.analyzers.session import Analyzer
+from src.analyzers.clone_detector import detect_clones
+from src.analyzers.refactor_advisor import iter_file_advice
+from src.analyzers.input_sources import (
+    iter_archive_files, iter_git_tree_files, open_input_source, load_source_buffers,
+)
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+needs_git = pytest.mark.skipif(shutil.which('git') is None, reason='git not available')
+
+
+def _git(repo, *args):
+    subprocess.run(['git', '-C', repo, *args], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+@pytest.fixture
+def cloned_tree(source_tree):
+    """源码树中加一份重复文件，克隆检测有结果可比"""
+    with open(os.path.join(source_tree, 'app', 'service.py'), 'rb') as f:
+        data = f.read()
+    with open(os.path.join(source_tree, 'app', 'service_copy.py'), 'wb') as f:
+        f.write(data)
+    return source_tree
+
+
+@pytest.fixture
+def git_repo(source_tree):
+    _git(source_tree, 'init', '-q')
+    _git(source_tree, 'add', '.')
+    _git(source_tree, '-c', 'user.name=test', '-c', 'user.email=test@example.com', 'commit', '-q', '-m', 'init')
+    return source_tree
+
+
+def _run_cli(*args):
+    return subprocess.run(
+        [sys.executable, '-m', 'src', *args], cwd=REPO_ROOT,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+        env=dict(os.environ, TYPELINEAS_LANG='en'),
+    )
+
+
+@needs_git
+def test_git_tree_matches_checkout(git_repo):
+    label, source = open_input_source(git_repo, git_rev='HEAD')
+    from_git = {os.path.relpath(path, label): data for (path, _), data in source}
+    service = os.path.join('app', 'service.py')
+    with open(os.path.join(git_repo, service), 'rb') as f:
+        assert from_git[service] == f.read()
+    assert len(from_git) == 11
+
+
+@needs_git
+def test_git_tree_bad_rev(git_repo):
+    with pytest.raises(ValueError, match='no-such-rev'):
+        list(iter_git_tree_files(git_repo, 'no-such-rev'))
+
+
+@needs_git
+def test_git_tree_outside_repository(tmp_path):
+    with pytest.raises(ValueError):
+        list(iter_git_tree_files(str(tmp_path), 'HEAD'))
+
+
+def test_archive_matches_directory(source_tree, tmp_path):
+    archive_path = str(tmp_path / 'project.tar.gz')
+    with tarfile.open(archive_path, 'w:gz') as archive:
+        archive.add(source_tree, arcname='project')
+    names = sorted(os.path.relpath(path, archive_path) for (path, _), _ in iter_archive_files(archive_path))
+    assert len(names) == 11 and all(name.startswith('project' + os.sep) for name in names)
+
+
+@pytest.mark.parametrize('name', ['broken.tar.gz', 'broken.zip'])
+def test_corrupt_archive(tmp_path, name):
+    path = tmp_path / name
+    path.write_bytes(b'not an archive')
+    with pytest.raises(ValueError):
+        list(iter_archive_files(str(path)))
+
+
+@needs_git
+@pytest.mark.parametrize('extra', [[], ['--shard', '1/2']])
+def test_cli_reports_bad_rev(git_repo, extra):
+    proc = _run_cli(git_repo, '--git-rev', 'no-such-rev', *extra)
+    assert proc.returncode == 1
+    assert 'Cannot read input' in proc.stdout
+    assert 'Traceback' not in proc.stderr
+
+
+def test_cli_reports_corrupt_archive(tmp_path):
+    path = tmp_path / 'broken.tar.gz'
+    path.write_bytes(b'not an archive')
+    proc = _run_cli(str(path))
+    assert proc.returncode == 1
+    assert 'Cannot read input' in proc.stdout
+
+
+def _tar(source_tree, tmp_path):
+    archive_path = str(tmp_path / 'project.tar.gz')
+    with tarfile.open(archive_path, 'w:gz') as archive:
+        archive.add(source_tree, arcname='.')
+    return archive_path
+
+
+def _advice_and_clones(root, git_rev=None):
+    """按相对路径整理的重构建议和克隆对（归档 / git 输入的源码经 load_source_buffers 读取）"""
+    analyzer = Analyzer(use_cache=False, io_threads=0)
+    result = analyzer.scan_tree(root, git_rev=git_rev)
+    stats_list = result['files']
+    sources = load_source_buffers(*result['source'], [s['path'] for s in stats_list])
+    if sources:
+        analyzer.advice_store.add_sources(sources)
+    rel = lambda path: os.path.relpath(path, result['root'])
+    advice = {rel(s['path']): a for s, a in iter_file_advice(stats_list, store=analyzer.advice_store)}
+    files = [(s['path'], LANG_DEFINITIONS['py']) for s in stats_list if s['lang'] == 'Python']
+    clones = {tuple(sorted([(rel(c['file_a']), c['start_a'], c['end_a']), (rel(c['file_b']), c['start_b'], c['end_b'])]))
+              for c in detect_clones(files, sources=sources)}
+    return advice, clones
+
+
+def test_archive_advice_and_clones_match_directory(cloned_tree, tmp_path):
+    from_dir = _advice_and_clones(cloned_tree)
+    advice, clones = from_dir
+    assert advice[os.path.join('app', 'service.py')]['smells'] and clones
+    assert _advice_and_clones(_tar(cloned_tree, tmp_path)) == from_dir
+
+
+@needs_git
+def test_git_advice_and_clones_match_directory(cloned_tree):
+    _git(cloned_tree, 'init', '-q')
+    _git(cloned_tree, 'add', '.')
+    _git(cloned_tree, '-c', 'user.name=test', '-c', 'user.email=test@example.com', 'commit', '-q', '-m', 'init')
+    assert _advice_and_clones(cloned_tree, git_rev='HEAD') == _advice_and_clones(cloned_tree)
+
+
+def test_cli_advice_from_archive(cloned_tree, tmp_path):
+    from_dir = _run_cli(cloned_tree, '--advice', '--clones')
+    from_archive = _run_cli(_tar(cloned_tree, tmp_path), '--advice', '--clones')
+    assert from_archive.returncode == 0
+    # 输出顺序随遍历顺序变化，只比较重构建议和克隆检测涉及的行集合
+    section = lambda out: set(out[out.index('REFACTOR ADVISOR'):].splitlines())
+    assert 'service_copy.py' in from_archive.stdout
+    assert section(from_archive.stdout) == section(from_dir.stdout)
+
+
+def test_cli_merge_without_sources(source_tree, tmp_path):
+    partial = str(tmp_path / 'shard.json')
+    assert _run_cli(source_tree, '--shard', '1/1', '--partial', partial).returncode == 0
+    shutil.rmtree(source_tree)
+    assert _run_cli('merge', partial).returncode == 0
+    proc = _run_cli('merge', partial, '--advice')
+    assert proc.returncode == 1
+    assert 'Cannot read sources' in proc.stdout
+    assert 'Traceback' not in proc.stderr
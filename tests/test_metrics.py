@@ -0,0 +1,110 @@
+"""
+指标插件：内置指标的已知取值、依赖解析、自定义指标的事件派发（单次逐行扫描）
+"""
+import math
+
+import pytest
+
+from src.analyzers import metrics
+from src.analyzers.session import Analyzer
+from src.analyzers.metrics import METRIC_PLUGINS, Metric, register_metric, resolve_metrics
+
+
+COGNITIVE_SOURCE = '''def f(items, flag):
+    for item in items:
+        if item and flag:
+            while item:
+                item -= 1
+        else:
+            pass
+'''
+
+
+@pytest.fixture
+def analyzer():
+    return Analyzer(metrics=['mi', 'cognitive'], use_cache=False)
+
+
+def test_halstead_volume(analyzer):
+    # 操作数 x a b、运算符 = +：N = 5，n = 5
+    stats = analyzer.analyze_buffer('x = a + b\n', 'Python')
+    assert stats['halstead_volume'] == round(5 * math.log2(5), 1) == 11.6
+
+
+@pytest.mark.parametrize('lang', ['Python', 'JavaScript'])
+def test_cognitive_complexity(analyzer, lang):
+    # for +1；if +1 嵌套 +1、and +1；while +1 嵌套 +2；else +1
+    assert analyzer.analyze_buffer(COGNITIVE_SOURCE, lang)['cognitive_complexity'] == 8
+
+
+def test_maintainability_index(analyzer):
+    stats = analyzer.analyze_buffer(COGNITIVE_SOURCE, 'Python')
+    raw = (171 - 5.2 * math.log(stats['halstead_volume']) - 0.23 * stats['complexity']
+           - 16.2 * math.log(stats['code']))
+    assert stats['maintainability_index'] == round(raw * 100 / 171, 1)
+    # 没有代码时为满分
+    assert analyzer.analyze_buffer('# comment\n', 'Python')['maintainability_index'] == 100.0
+
+
+def test_resolve_metrics():
+    assert [cls.name for cls in resolve_metrics(['mi'])] == ['halstead', 'mi']
+    assert [cls.name for cls in resolve_metrics(['mi', 'cognitive', 'halstead'])] == ['halstead', 'cognitive', 'mi']
+    assert resolve_metrics([]) == resolve_metrics(None) == []
+    with pytest.raises(KeyError):
+        resolve_metrics(['no_such_metric'])
+    with pytest.raises(KeyError):
+        Analyzer(metrics=['no_such_metric'])
+
+
+@pytest.fixture
+def recording_metric():
+    """临时注册的自定义指标：记录收到的行事件和词法事件"""
+
+    @register_metric
+    class RecordingMetric(Metric):
+        __slots__ = ('lines', 'tokens')
+        name = 'recording'
+        fields = ('recorded_lines',)
+        events = ('line', 'token')
+        instances = []
+
+        def __init__(self, lang_name):
+            self.lines = []
+            self.tokens = []
+            self.instances.append(self)
+
+        def on_line(self, kind, line, stripped):
+            self.lines.append(kind)
+
+        def on_tokens(self, tokens):
+            self.tokens.append(tokens)
+
+        def result(self, stats):
+            return {'recorded_lines': len(self.lines)}
+
+    yield RecordingMetric
+    del METRIC_PLUGINS['recording']
+
+
+def test_custom_metric_receives_one_event_per_line(recording_metric):
+    source = '# header\n\nname = "text"  # note\nvalue = name + 1\n'
+    stats = Analyzer(metrics=['recording'], use_cache=False).analyze_buffer(source, 'Python')
+    [metric] = recording_metric.instances
+    assert metric.lines == ['comment', 'blank', 'code', 'code']
+    assert stats['recorded_lines'] == stats['total'] == 4
+    # 字符串和注释在切分前去掉
+    assert metric.tokens == [['name', '=', '""'], ['value', '=', 'name', '+', '1']]
+
+
+def test_line_only_metrics_skip_tokenizing(monkeypatch):
+    calls = []
+    monkeypatch.setattr(metrics.MetricScan, 'code_tokens', lambda self, line: calls.append(line))
+    Analyzer(metrics=['cognitive'], use_cache=False).analyze_buffer(COGNITIVE_SOURCE, 'Python')
+    assert calls == []
+    Analyzer(metrics=['halstead'], use_cache=False).analyze_buffer(COGNITIVE_SOURCE, 'Python')
+    assert len(calls) == COGNITIVE_SOURCE.count('\n')
+
+
+def test_no_metrics_adds_no_fields():
+    stats = Analyzer(metrics=[], use_cache=False).analyze_buffer(COGNITIVE_SOURCE, 'Python')
+    assert not {field for cls in METRIC_PLUGINS.values() for field in cls.fields} & set(stats)
@@ -0,0 +1,132 @@
+"""
+预读 I/O：模拟慢速文件系统（读取和 stat 都有延迟），检查输出顺序、在途文件数和字节数的上限，
+以及 stat 不在消费方线程中执行
+"""
+import os
+import time
+import threading
+
+import pytest
+
+from src.analyzers.prefetch_io import prefetch_files, read_file_for_analysis
+
+
+class SlowFilesystem:
+    """
+    带延迟的读取函数
+
+    记录同时在读的文件数，以及已预留但尚未被消费的文件：它们的字节数之和不应超过
+    预读的字节上限，除非只有一个文件在途。
+    """
+
+    def __init__(self, sizes, delays, max_bytes):
+        self.sizes = sizes
+        self.delays = delays
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.reading = 0
+        self.max_reading = 0
+        self.outstanding = set()
+        self.max_outstanding = 0
+        self.over_budget = []
+
+    def read(self, path, reserve):
+        with self.lock:
+            self.reading += 1
+            self.max_reading = max(self.max_reading, self.reading)
+        time.sleep(self.delays[path])
+        data = read_file_for_analysis(path, lambda size: self.reserved(path, size, reserve))
+        with self.lock:
+            self.reading -= 1
+        return data
+
+    def reserved(self, path, size, reserve):
+        if reserve is not None:
+            reserve(size)
+        with self.lock:
+            self.outstanding.add(path)
+            self.max_outstanding = max(self.max_outstanding, len(self.outstanding))
+            in_flight = sum(self.sizes[p] for p in self.outstanding)
+            if len(self.outstanding) > 1 and in_flight > self.max_bytes:
+                self.over_budget.append(sorted(self.outstanding))
+
+    def consumed(self, path):
+        with self.lock:
+            self.outstanding.discard(path)
+
+
+@pytest.fixture
+def slow_stat(monkeypatch):
+    """stat / fstat 各有延迟（网络文件系统的元数据往返），记录调用所在的线程"""
+    callers = []
+
+    def slow(real):
+        def wrapper(*args, **kwargs):
+            callers.append(threading.current_thread())
+            time.sleep(0.002)
+            return real(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(os, 'stat', slow(os.stat))
+    monkeypatch.setattr(os, 'fstat', slow(os.fstat))
+    return callers
+
+
+def _write_files(root, count=40, large_at=10):
+    """大小不一的文件，其中一个超过测试用的全部字节上限；前面的文件读得慢，后面的先读完"""
+    sizes = {}
+    delays = {}
+    for i in range(count):
+        path = str(root / f'f{i:02d}.py')
+        size = 50_000 if i == large_at else 1000 + (i * 37) % 900
+        with open(path, 'wb') as f:
+            f.write(bytes([65 + i % 26]) * size)
+        sizes[path] = size
+        delays[path] = 0.002 * ((count - i) % 7)
+    return list(sizes), sizes, delays
+
+
+@pytest.mark.parametrize('threads, max_bytes', [(4, 4000), (8, 12_000), (2, 1)])
+def test_prefetch_order_and_bounds(tmp_path, slow_stat, threads, max_bytes):
+    paths, sizes, delays = _write_files(tmp_path)
+    fs = SlowFilesystem(sizes, delays, max_bytes)
+    expected = {}
+    for path in paths:
+        with open(path, 'rb') as f:
+            expected[path] = f.read()
+    slow_stat.clear()
+
+    seen = []
+    for (path,), data in prefetch_files([(p,) for p in paths], threads=threads, max_bytes=max_bytes, reader=fs.read):
+        assert data == expected[path]
+        seen.append(path)
+        time.sleep(0.001)  # 消费方也有耗时，让预读跑到前面
+        fs.consumed(path)
+
+    assert seen == paths
+    assert len(slow_stat) == len(paths)
+    assert threading.main_thread() not in slow_stat
+    assert fs.max_reading <= threads
+    assert fs.max_outstanding <= threads * 4
+    assert fs.over_budget == []
+    if max_bytes == 1:
+        # 每个文件都超过上限：只能逐个预留
+        assert fs.max_outstanding == 1
+    else:
+        assert fs.max_outstanding > 1
+
+
+def test_prefetch_stops_early(tmp_path):
+    paths, sizes, delays = _write_files(tmp_path)
+    fs = SlowFilesystem(sizes, delays, 1)
+    source = prefetch_files([(p,) for p in paths], threads=4, max_bytes=1, reader=fs.read)
+    assert next(source)[0] == (paths[0],)
+    # 等待预留的读取线程被放行，关闭不会卡住
+    source.close()
+
+
+def test_prefetch_without_threads(tmp_path):
+    paths, sizes, delays = _write_files(tmp_path, count=5)
+    fs = SlowFilesystem(sizes, delays, 0)
+    assert [path for (path,), _ in prefetch_files([(p,) for p in paths], threads=0, reader=fs.read)] == paths
+    assert fs.max_reading == 1
@@ -0,0 +1,173 @@
+"""
+Python AST 引擎：与递归 NodeVisitor 参照实现逐文件、逐函数对比复杂度和嵌套层级
+"""
+import os
+import ast
+import glob
+
+import pytest
+
+from src.analyzers.python_ast import run_ast_engine, parse_python_source, analyze_python_source
+
+
+STDLIB_DIR = os.path.dirname(ast.__file__)
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE = '''
+"""模块文档"""
+import os, sys
+from . import sibling
+from pkg.sub import *
+
+
+@decorate(lambda x: x if x else None)
+def outer(a, b=[i for i in range(3) if i]):
+    """文档"""
+    if a and b or not a:
+        for x in a:
+            while x:
+                try:
+                    x -= 1
+                except ValueError:
+                    pass
+                except:
+                    raise
+    elif b:
+        with open(b) as f:
+            pass
+    elif a is None:
+        pass
+    else:
+        if b:
+            pass
+
+    def inner(c):
+        if c:
+            if c > 1:
+                return {k: v for k, v in c.items() if v if k}
+        return c
+
+    class Local:
+        def method(self):
+            return [y for x in a for y in x]
+    return inner
+
+
+async def handler(event):
+    async for item in event:
+        match item:
+            case 1:
+                pass
+            case 2:
+                pass
+            case 3:
+                pass
+            case _:
+                pass
+    async with event:
+        if event:
+            pass
+'''
+
+
+def _increment(node):
+    """参照实现：单个节点的圈复杂度增量"""
+    if isinstance(node, (ast.If, ast.For, ast.AsyncFor, ast.While, ast.IfExp)):
+        return 1
+    if isinstance(node, ast.Try):
+        return len(node.handlers)
+    if isinstance(node, ast.BoolOp):
+        return len(node.values) - 1
+    if isinstance(node, (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)):
+        return sum(1 + len(generator.ifs) for generator in node.generators)
+    if type(node).__name__ == 'Match':
+        return 1 if len(node.cases) <= 3 else len(node.cases) * 0.5
+    return 0
+
+
+NESTING = tuple(getattr(ast, name) for name in ('If', 'For', 'AsyncFor', 'While', 'Try', 'With', 'AsyncWith',
+                                                 'Match', 'TryStar') if hasattr(ast, name))
+
+
+class ReferenceVisitor(ast.NodeVisitor):
+    """递归参照实现：文件级和函数级复杂度、函数内控制结构嵌套（elif 不加层）"""
+
+    def __init__(self):
+        self.complexity = 1
+        self.imports = 0
+        self.functions = []
+        self.current = None
+        self.depth = 0
+
+    def visit(self, node):
+        saved = self.current, self.depth
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            self.current = {'name': node.name, 'line': node.lineno, 'complexity': 1, 'nesting': 0}
+            self.functions.append(self.current)
+            self.depth = 0
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            self.imports += len(node.names)
+        increment = _increment(node)
+        self.complexity += increment
+        if self.current is not None:
+            self.current['complexity'] += increment
+        if isinstance(node, NESTING):
+            self.depth += 1
+            if self.current is not None:
+                self.current['nesting'] = max(self.current['nesting'], self.depth)
+        if isinstance(node, ast.If) and len(node.orelse) == 1 and isinstance(node.orelse[0], ast.If):
+            self.visit(node.test)
+            for child in node.body:
+                self.visit(child)
+            self.depth -= 1
+            self.visit(node.orelse[0])
+        else:
+            self.generic_visit(node)
+        self.current, self.depth = saved
+
+
+def _reference(tree):
+    visitor = ReferenceVisitor()
+    visitor.visit(tree)
+    functions = sorted((f['name'], f['line'], int(f['complexity'] + 0.5), f['nesting']) for f in visitor.functions)
+    return int(visitor.complexity + 0.5), visitor.imports, functions
+
+
+def _engine(tree):
+    result = run_ast_engine(tree)
+    functions = sorted((f['name'], f['line'], f['complexity'], f['nesting']) for f in result['functions'])
+    return result['complexity'], result['imports'], functions
+
+
+def _corpus():
+    """标准库顶层模块（取一部分）和本仓库源码"""
+    paths = sorted(glob.glob(os.path.join(STDLIB_DIR, '*.py')))[::4]
+    paths += sorted(glob.glob(os.path.join(REPO_DIR, 'src', '**', '*.py'), recursive=True))
+    return paths
+
+
+def test_sample_matches_reference():
+    tree = parse_python_source(SAMPLE)
+    assert _engine(tree) == _reference(tree)
+    functions = {name: (complexity, nesting) for name, _, complexity, nesting in _engine(tree)[2]}
+    # if / for / while / try 四层；elif 与 if 同层
+    assert functions['outer'][1] == 4
+    assert functions['inner'] == (6, 2)
+    assert functions['handler'][1] == 2
+
+
+@pytest.mark.parametrize('path', _corpus(), ids=os.path.basename)
+def test_corpus_matches_reference(path):
+    with open(path, encoding='utf-8') as f:
+        content = f.read()
+    tree = parse_python_source(content, path)
+    assert _engine(tree) == _reference(tree)
+
+
+def test_cached_result_matches_fresh_analysis():
+    first = analyze_python_source(SAMPLE, reuse_tree=True)
+    assert first['success']
+    assert analyze_python_source(SAMPLE, reuse_tree=True) is first
+    assert _engine(parse_python_source(SAMPLE)) == (first['complexity'], first['imports'],
+                                                   sorted((f['name'], f['line'], f['complexity'], f['nesting'])
+                                                          for f in first['functions']))
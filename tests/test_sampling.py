@@ -0,0 +1,34 @@
+"""
+抽样估算：全部样本一次预读；全量抽样时估计值等于精确统计，置信半径为 0
+"""
+from src.analyzers import sampling
+from src.analyzers.session import Analyzer
+from src.analyzers.sampling import collect_candidates, estimate_project
+
+
+def test_sampled_files_prefetched_once(source_tree, monkeypatch):
+    calls = []
+    real = sampling.prefetch_files
+
+    def counting(items, *args, **kwargs):
+        items = list(items)
+        calls.append(len(items))
+        return real(items, *args, **kwargs)
+
+    monkeypatch.setattr(sampling, 'prefetch_files', counting)
+    estimate = estimate_project(collect_candidates(source_tree), 0.5)
+    assert calls == [estimate['sampled']]
+
+
+def test_full_sample_matches_exact_scan(source_tree):
+    exact = Analyzer(use_cache=False).scan_tree(source_tree)
+    estimate = estimate_project(collect_candidates(source_tree), 1.0)
+    assert estimate['sampled'] == estimate['population'] == 11
+    assert set(estimate['languages']) == set(exact['languages'])
+    for lang_name, summary in exact['languages'].items():
+        estimated = estimate['languages'][lang_name]
+        assert estimated['files'] == summary['files']
+        for key in ('total', 'code', 'comments', 'imports', 'boilerplate', 'cc'):
+            assert estimated[key] == (summary[key], 0.0), (lang_name, key)
+    index, margin = estimate['index']
+    assert int(index) == exact['project_index'] and margin == 0.0
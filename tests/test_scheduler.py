@@ -0,0 +1,98 @@
+"""
+并行调度：cgroup 配额读取（伪造的 cgroup 目录）、默认进程数、耗时预估、批次划分和调度执行
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.analyzers import scheduler
+from src.analyzers.scheduler import (
+    MAX_CHUNK_FILES, cgroup_cpu_limit, cgroup_memory_limit, default_jobs, worker_memory_estimate,
+    estimate_costs, plan_chunks, scheduled_map,
+)
+
+
+def _cgroup(root, files):
+    for rel, content in files.items():
+        path = os.path.join(root, *rel.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content + '\n')
+    return str(root)
+
+
+@pytest.mark.parametrize('files, cpus', [
+    ({'cpu.max': '200000 100000'}, 2),
+    ({'cpu.max': '150000 100000'}, 2),  # 不足一个 CPU 的配额向上取整
+    ({'cpu.max': '5000 100000'}, 1),
+    ({'cpu.max': 'max 100000'}, None),
+    ({'cpu/cpu.cfs_quota_us': '300000', 'cpu/cpu.cfs_period_us': '100000'}, 3),
+    ({'cpu/cpu.cfs_quota_us': '-1', 'cpu/cpu.cfs_period_us': '100000'}, None),
+    ({}, None),
+])
+def test_cgroup_cpu_limit(tmp_path, files, cpus):
+    assert cgroup_cpu_limit(_cgroup(tmp_path, files)) == cpus
+
+
+@pytest.mark.parametrize('files, limit', [
+    ({'memory.max': '1073741824'}, 1 << 30),
+    ({'memory.max': 'max'}, None),
+    ({'memory/memory.limit_in_bytes': '536870912'}, 1 << 29),
+    ({'memory/memory.limit_in_bytes': '9223372036854771712'}, None),  # v1 的"不限制"
+    ({}, None),
+])
+def test_cgroup_memory_limit(tmp_path, files, limit):
+    assert cgroup_memory_limit(_cgroup(tmp_path, files)) == limit
+
+
+def test_default_jobs_follows_cgroup(tmp_path, monkeypatch):
+    monkeypatch.setattr(os, 'sched_getaffinity', lambda pid: set(range(16)))
+    monkeypatch.setattr(scheduler, 'CGROUP_ROOT', _cgroup(tmp_path, {'cpu.max': '400000 100000'}))
+    assert default_jobs() == 4
+    _cgroup(tmp_path, {'memory.max': str(worker_memory_estimate() * 3)})
+    assert default_jobs() == 3
+    _cgroup(tmp_path, {'memory.max': '1'})
+    assert default_jobs() == 1
+
+
+def test_estimate_costs_converts_past_timings():
+    sizes = [1000, 2000, 3000, 4000]
+    assert estimate_costs(sizes) == sizes
+    assert estimate_costs(sizes, [None] * 4) == sizes
+    # 已知文件平均 (1000 + 2000 + 4000) / (10 + 10 + 20) = 175 字节/毫秒，没有记录的文件仍按大小
+    assert estimate_costs(sizes, [10, 10, None, 20]) == [1750, 1750, 3000, 3500]
+
+
+def test_plan_chunks_largest_first_and_shrinking():
+    costs = [(i * 7919) % 1000 + 1 for i in range(2000)] + [50_000, 80_000]
+    chunks = plan_chunks(costs, jobs=4)
+    flat = [i for chunk in chunks for i in chunk]
+    assert sorted(flat) == list(range(len(costs)))
+    assert [costs[i] for i in flat] == sorted(costs, reverse=True)
+    # 大文件单独成批尽早开始
+    assert chunks[0] == [len(costs) - 1] and chunks[1] == [len(costs) - 2]
+    assert all(len(chunk) <= MAX_CHUNK_FILES for chunk in chunks)
+    # 批次工作量随剩余工作量递减
+    chunk_costs = [sum(costs[i] for i in chunk) for chunk in chunks[2:-1]]
+    assert chunk_costs[0] > chunk_costs[-1]
+
+
+def test_plan_chunks_caps_files_per_chunk():
+    chunks = plan_chunks([1] * 5000, jobs=1)
+    assert max(len(chunk) for chunk in chunks) == MAX_CHUNK_FILES
+    assert sum(len(chunk) for chunk in chunks) == 5000
+    assert plan_chunks([], jobs=4) == []
+
+
+def _square(x):
+    return x * x
+
+
+def test_scheduled_map_preserves_order():
+    items = list(range(300))
+    costs = [(i * 31) % 17 for i in items]
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        results, elapsed = scheduled_map(_square, items, costs, pool, jobs=3)
+    assert results == [i * i for i in items]
+    assert len(elapsed) == len(items) and all(ms >= 0 for ms in elapsed)
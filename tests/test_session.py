@@ -0,0 +1,55 @@
+"""
+分析会话：预算和扩展指标属于会话自身，多个会话互不影响，也不修改全局设置
+"""
+import os
+
+import pytest
+
+from src.analyzers.session import Analyzer
+from src.analyzers.file_budget import FILE_BUDGET
+from src.analyzers.metrics import active_metric_names
+
+
+SOURCE = ''.join(f"def f{i}(x):\n    if x > {i}:\n        return x\n    return {i}\n\n" for i in range(20))
+
+
+def test_sessions_keep_their_own_budget():
+    before = dict(FILE_BUDGET)
+    small = Analyzer(max_lines=10)
+    unlimited = Analyzer(max_lines=0)
+    # 后创建的会话不改变先创建会话的预算
+    assert small.analyze_buffer(SOURCE, 'Python')['tier'] == 'regex'
+    assert unlimited.analyze_buffer(SOURCE, 'Python')['tier'] == 'full'
+    assert small.analyze_buffer(SOURCE, 'Python')['tier'] == 'regex'
+    assert FILE_BUDGET == before
+
+
+def test_sessions_keep_their_own_metrics():
+    with_mi = Analyzer(metrics=['mi'])
+    without = Analyzer(metrics=[])
+    assert with_mi.metrics == ['halstead', 'mi']
+    assert 'maintainability_index' in with_mi.analyze_buffer(SOURCE, 'Python')
+    assert 'maintainability_index' not in without.analyze_buffer(SOURCE, 'Python')
+    assert 'halstead_volume' in with_mi.analyze_buffer(SOURCE, 'Python')
+    assert active_metric_names() == []
+
+
+def test_unknown_metric_rejected():
+    with pytest.raises(KeyError):
+        Analyzer(metrics=['no-such-metric'])
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_scan_tree_uses_session_budget(source_tree, jobs):
+    # 夹具中的大文件超过 64KiB：字节预算更小的会话只统计它的行数
+    result = Analyzer(max_bytes=64 * 1024, use_cache=False, jobs=jobs, metrics=['cognitive']).scan_tree(source_tree)
+    tiers = {os.path.basename(s['path']): s['tier'] for s in result['files']}
+    assert tiers['generated_tables.py'] == 'lines'
+    assert tiers['service.py'] == 'full'
+    assert all('cognitive_complexity' in s for s in result['files']
+               if s['tier'] == 'full' and s['prefilter'] == 'source')
+
+    default = Analyzer(use_cache=False, jobs=jobs).scan_tree(source_tree)
+    tiers = {os.path.basename(s['path']): s['tier'] for s in default['files']}
+    assert tiers['generated_tables.py'] == 'full'
+    assert not any('cognitive_complexity' in s for s in default['files'])
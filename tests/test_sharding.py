@@ -0,0 +1,66 @@
+"""
+分片扫描：合并结果与单机扫描一致；无效的分片参数直接报错退出
+"""
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+from src.analyzers.session import Analyzer
+from src.analyzers.sharding import (
+    SHARD_LARGE_FILE, parse_shard_spec, scan_shard, write_partial, load_partial, merge_partials,
+)
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULT_KEYS = ('root', 'files', 'languages', 'project_index', 'prefilter_counts', 'tier_counts', 'graph')
+
+
+def _normalized(result):
+    """JSON 往返后比较（元组与列表、整数键等差异不影响结论）"""
+    return {key: json.loads(json.dumps(result[key], sort_keys=True, default=str)) for key in RESULT_KEYS}
+
+
+@pytest.mark.parametrize('spec, expected', [
+    ('1/3', (0, 3)), ('3/3', (2, 3)),
+    ('4/3', None), ('0/3', None), ('1/0', None), ('x', None), ('1/2/3', None), ('', None),
+])
+def test_parse_shard_spec(spec, expected):
+    assert parse_shard_spec(spec) == expected
+
+
+@pytest.mark.parametrize('count', [1, 3])
+def test_merged_shards_match_single_node(source_tree, tmp_path, count):
+    assert os.path.getsize(os.path.join(source_tree, 'app', 'generated_tables.py')) >= SHARD_LARGE_FILE
+    single = Analyzer(use_cache=False).scan_tree(source_tree)
+
+    partials = []
+    for index in range(count):
+        path = str(tmp_path / f'shard{index}.json')
+        write_partial(path, scan_shard(source_tree, index, count))
+        partials.append(load_partial(path))
+    assert sum(len(p['files']) for p in partials) == len(single['files'])
+    merged = merge_partials(partials, use_cache=False)
+
+    assert _normalized(merged) == _normalized(single)
+
+
+def test_merge_rejects_missing_shard(source_tree):
+    partials = [scan_shard(source_tree, index, 3) for index in (0, 2)]
+    with pytest.raises(ValueError):
+        merge_partials(partials, use_cache=False)
+
+
+@pytest.mark.parametrize('spec', ['4/3', '0/3', 'x'])
+def test_cli_rejects_invalid_shard_spec(source_tree, tmp_path, spec):
+    partial = tmp_path / 'out.json'
+    proc = subprocess.run(
+        [sys.executable, '-m', 'src', source_tree, '--shard', spec, '--partial', str(partial)],
+        cwd=REPO_ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+        env=dict(os.environ, TYPELINEAS_LANG='en'),
+    )
+    assert proc.returncode == 1
+    assert 'Invalid shard spec' in proc.stdout
+    assert not partial.exists()
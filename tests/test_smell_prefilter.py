@@ -0,0 +1,61 @@
+"""
+异味预过滤的差分测试：预过滤后的扫描结果必须与对全部异味运行完整正则的结果一致
+"""
+import os
+
+import pytest
+
+from src.analyzers import refactor_advisor
+from src.analyzers.file_analyzer import iter_source_files
+from src.analyzers.refactor_advisor import CODE_SMELLS, PY_AST_SMELLS, prefilter_smells, scan_code_smells
+
+
+# 触发字面量的边界情况：大小写、制表符缩进、Windows 路径、十六进制、各语言调试输出
+EDGE_CASES = {
+    'edge/tabs.go': 'package main\n\nfunc f() {\n\t\t\t\t\tif x { fmt.Printf("%d", 4096) }\n}\n',
+    'edge/upper.ts': '// TODO: x\n/* FIXME later */\nconst p = "C:\\\\Users\\\\dev";\nConsole.Log(0xBEEF);\n',
+    'edge/debug.php': '<?php\n// XXX hack\nvar_dump($x);\ndd($y);\n$p = \'/etc/app.conf\';\n',
+    'edge/Main.kt': '// return value\nfun main() {\n    System.out.println("value here")\n    val n = 1.25\n}\n',
+    'edge/lib.rs': '/// doc\n// HACK: temporary\nfn f() -> i32 { let s = "repeated text"; let t = "repeated text"; 77 }\n',
+    'edge/Service.cs': ('public class S {\n    private int Run(int alpha, int beta, int gamma, int delta, '
+                        'int epsilon, int zeta, int eta) { return 0; }\n}\n'),
+    'edge/none.py': 'def f(a, b):\n    return a + b\n',
+    'edge/syntax_error.py': 'def f(:\n    print("x")\n    except:\n        pass\n# if legacy: run()\n',
+    'edge/empty.js': '',
+}
+
+
+def _unfiltered(content, exclude=()):
+    """对照组：不做预过滤，全部异味都运行完整正则"""
+    return {key for key, info in CODE_SMELLS.items()
+            if not info.get('skip') and info.get('pattern') and key not in exclude}
+
+
+@pytest.fixture
+def smell_corpus(source_tree):
+    for rel_path, content in EDGE_CASES.items():
+        path = os.path.join(source_tree, *rel_path.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+    return [(path, lang_info[0]) for path, lang_info in iter_source_files(source_tree)]
+
+
+def test_prefilter_keeps_every_matching_smell(smell_corpus):
+    for path, _ in smell_corpus:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            content = f.read()
+        matching = {key for key in _unfiltered(content) if CODE_SMELLS[key]['pattern'].search(content)}
+        assert matching <= prefilter_smells(content), path
+        assert matching - set(PY_AST_SMELLS) <= prefilter_smells(content, exclude=PY_AST_SMELLS), path
+
+
+def test_prefiltered_scan_matches_unfiltered(smell_corpus, monkeypatch):
+    filtered = {path: scan_code_smells(path, lang_name=lang) for path, lang in smell_corpus}
+    monkeypatch.setattr(refactor_advisor, 'prefilter_smells', _unfiltered)
+    unfiltered = {path: scan_code_smells(path, lang_name=lang) for path, lang in smell_corpus}
+
+    assert filtered == unfiltered
+    found = {smell['key'] for smells in filtered.values() for smell in smells}
+    # 夹具覆盖了全部可预过滤的异味，比较才有意义
+    assert set(_unfiltered('')) <= found
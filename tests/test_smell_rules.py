@@ -0,0 +1,189 @@
+"""
+自定义异味规则的差分测试：字面量匹配器、按字面量调度的规则扫描与逐条运行完整正则的朴素实现一致
+"""
+import re
+import json
+import random
+
+import pytest
+
+from src.analyzers.smell_rules import (
+    SMELL_RULES, register_smell_rule, set_smell_rules, load_smell_rules, match_rule_literals,
+)
+from src.analyzers.refactor_advisor import build_line_starts, scan_rule_smells
+
+
+@pytest.fixture
+def restore_rules():
+    saved = list(SMELL_RULES.values())
+    set_smell_rules([])
+    yield
+    set_smell_rules(saved)
+
+
+# 相互重叠、互为前缀的字面量；同一字面量属于多条规则
+LITERAL_RULES = {
+    'r_ab': (['ab'], False),
+    'r_abc': (['abc', 'bca'], False),
+    'r_prefix': (['a', 'abca'], False),
+    'r_shared': (['ab', 'cc'], False),
+    'r_case': (['Ab', 'CA'], True),
+    'r_case_long': (['abcab'], True),
+}
+
+
+def _random_texts(count=60, seed=7):
+    rng = random.Random(seed)
+    return [''.join(rng.choice('abcAB \n') for _ in range(rng.randint(0, 200))) for _ in range(count)]
+
+
+def _naive_literal_hits(content, lang_name):
+    """对照组：逐条规则、逐个字面量查找全部（可重叠的）出现位置"""
+    hits = set()
+    for key, rule in SMELL_RULES.items():
+        if rule['languages'] is not None and lang_name not in rule['languages']:
+            continue
+        text = content.lower() if rule['ignore_case'] else content
+        for literal in rule['literals']:
+            literal = literal.lower() if rule['ignore_case'] else literal
+            pos = text.find(literal)
+            while pos >= 0:
+                hits.add((key, pos))
+                pos = text.find(literal, pos + 1)
+    return hits
+
+
+def test_literal_matcher_matches_naive_search(restore_rules):
+    for key, (literals, ignore_case) in LITERAL_RULES.items():
+        register_smell_rule(key, re.escape(literals[0]), literals=literals, ignore_case=ignore_case)
+    register_smell_rule('r_go_only', 'bb', literals=['bb'], languages=['Go'])
+    for lang_name in ('Python', 'Go'):
+        for content in _random_texts():
+            hits = match_rule_literals(content, lang_name)
+            assert {(key, pos) for key, positions in hits.items() for pos in positions} == \
+                _naive_literal_hits(content, lang_name), content
+
+
+def test_rules_without_literals_always_run(restore_rules):
+    register_smell_rule('r_any', r'\bx\b')
+    register_smell_rule('r_lit', 'yy', literals=['yy'])
+    assert match_rule_literals('nothing here', 'Python') == {'r_any': None}
+    assert match_rule_literals('', 'Python') == {'r_any': None}
+
+
+def _naive_rule_lines(content, lang_name):
+    """对照组：每条适用规则都运行完整正则；行级规则逐行匹配，文件级规则在整个文件上匹配"""
+    lines = content.split('\n')
+    result = {}
+    for key, rule in SMELL_RULES.items():
+        if rule['languages'] is not None and lang_name not in rule['languages']:
+            continue
+        if rule['scope'] == 'file':
+            line_nums = [content.count('\n', 0, m.start()) + 1 for m in rule['pattern'].finditer(content)]
+        else:
+            line_nums = [ln for ln, line in enumerate(lines, 1) for _ in rule['pattern'].finditer(line)]
+        if line_nums:
+            result[key] = line_nums
+    return result
+
+
+SOURCE = '''import logging
+log = logging.getLogger(__name__)
+legacy_log("a"); legacy_log("b")
+def f(path):
+    handle = open(
+        path)
+    LEGACY_LOG("c")
+    os.system("rm -rf /tmp/x")
+    eval(source)
+    return handle
+'''
+
+
+def _register_sample_rules():
+    register_smell_rule('legacy_log', r'legacy_log\(', literals=['legacy_log'], ignore_case=True)
+    register_smell_rule('os_system', r'os\.system\(', literals=['os.system'])
+    register_smell_rule('split_open', r'open\(\s*\n\s*path', literals=['open('], scope='file')
+    register_smell_rule('eval_call', r'\beval\(')
+    register_smell_rule('go_panic', r'panic\(', literals=['panic('], languages=['Go'])
+    register_smell_rule('getlogger', r'getLogger\(', literals=['getLogger'], languages=['Python'])
+
+
+@pytest.mark.parametrize('lang_name', ['Python', 'Go'])
+def test_rule_scan_matches_naive_scan(restore_rules, lang_name):
+    _register_sample_rules()
+    contents = [SOURCE, SOURCE.replace('\n', '\n\n'), '', 'panic(1)\nos.system(x) os.system(y)\n']
+    contents += [text.replace('a', 'legacy_log(').replace('b', 'os.system(') for text in _random_texts(20)]
+    for content in contents:
+        lines = content.split('\n')
+        smells = scan_rule_smells(content, lines, build_line_starts(lines), lang_name)
+        assert {smell['key']: smell['all_lines'] for smell in smells} == _naive_rule_lines(content, lang_name)
+
+
+def test_line_and_file_scope(restore_rules):
+    register_smell_rule('split_open_line', r'open\(\s*\n\s*path', literals=['open('])
+    register_smell_rule('split_open_file', r'open\(\s*\n\s*path', literals=['open('], scope='file')
+    lines = SOURCE.split('\n')
+    found = {smell['key']: smell['all_lines'] for smell in
+             scan_rule_smells(SOURCE, lines, build_line_starts(lines), 'Python')}
+    # 行级规则看不到跨行的匹配
+    assert found == {'split_open_file': [5]}
+
+
+class RecordingPattern:
+    """包装编译好的正则，记录 finditer 被调用时的文本"""
+
+    def __init__(self, pattern):
+        self.pattern = re.compile(pattern)
+        self.texts = []
+
+    def finditer(self, text):
+        self.texts.append(text)
+        return self.pattern.finditer(text)
+
+
+def test_full_regex_runs_only_where_literals_appear(restore_rules):
+    line_rule = RecordingPattern(r'legacy_log\(')
+    file_rule = RecordingPattern(r'os\.system\(')
+    absent_rule = RecordingPattern(r'never_called\(')
+    register_smell_rule('legacy_log', line_rule, literals=['legacy_log'])
+    register_smell_rule('os_system', file_rule, literals=['os.system'], scope='file')
+    register_smell_rule('absent', absent_rule, literals=['never_called'])
+
+    lines = SOURCE.split('\n')
+    scan_rule_smells(SOURCE, lines, build_line_starts(lines), 'Python')
+    # 同一行出现两次字面量也只匹配一次
+    assert line_rule.texts == ['legacy_log("a"); legacy_log("b")']
+    assert file_rule.texts == [SOURCE]
+    assert absent_rule.texts == []
+
+
+def _write_rules(tmp_path, specs):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps(specs), encoding='utf-8')
+    return str(path)
+
+
+def test_load_smell_rules(restore_rules, tmp_path):
+    path = _write_rules(tmp_path, [
+        {'key': 'no_print', 'pattern': r'print\(', 'literals': ['print'], 'languages': ['Python']},
+        {'key': 'todo_owner', 'pattern': r'todo\(\w+\)', 'literals': ['todo('], 'ignore_case': True,
+         'scope': 'file', 'name': 'TODO with owner', 'suggestion': 'track in the issue tracker'},
+    ])
+    assert load_smell_rules(path) == 2
+    assert list(SMELL_RULES) == ['no_print', 'todo_owner']
+    assert SMELL_RULES['todo_owner']['pattern'].flags & re.IGNORECASE
+    assert SMELL_RULES['no_print']['languages'] == frozenset({'Python'})
+
+
+@pytest.mark.parametrize('specs', [
+    {'key': 'not_a_list', 'pattern': 'x'},
+    [{'key': 'unknown_kwarg', 'pattern': 'x', 'severity': 3}],
+    [{'key': 'bad_regex', 'pattern': '(unclosed'}],
+    [{'key': 'bad_scope', 'pattern': 'x', 'scope': 'block'}],
+    [{'key': 'empty_literal', 'pattern': 'x', 'literals': ['']}],
+    [{'pattern': 'missing key'}],
+])
+def test_load_smell_rules_errors(restore_rules, tmp_path, specs):
+    with pytest.raises(ValueError):
+        load_smell_rules(_write_rules(tmp_path, specs))
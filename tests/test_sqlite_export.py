@@ -0,0 +1,73 @@
+"""
+SQLite 导出：表和视图可查询；追加扫描复用字典编号；导出中途失败时回滚，之前的扫描保持完整
+"""
+import sqlite3
+
+import pytest
+
+from src.reporters import sqlite_export
+from src.analyzers.session import Analyzer
+from src.reporters.sqlite_export import CANNED_QUERIES, export_sqlite
+
+
+@pytest.fixture
+def scanned(source_tree):
+    return Analyzer(use_cache=False).scan_tree(source_tree)['files']
+
+
+def _query(db, sql):
+    conn = sqlite3.connect(db)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+def test_schema_and_views(source_tree, scanned, tmp_path):
+    db = str(tmp_path / 'report.sqlite')
+    counts = export_sqlite(scanned, db, source_tree, include_advice=True)
+    assert counts['files'] == len(scanned) and counts['smells'] > 0
+
+    names = {name for (name,) in _query(db, "SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+    assert {'scans', 'languages', 'directories', 'files', 'file_metrics', 'functions',
+            'smell_types', 'smells'} <= names
+    for view in CANNED_QUERIES:
+        if view in names:
+            _query(db, f"SELECT * FROM {view}")
+    paths = {path for (path,) in _query(db, "SELECT path FROM latest_files")}
+    assert 'app/service.py' in paths and len(paths) == len(scanned)
+    assert _query(db, "PRAGMA integrity_check") == [('ok',)]
+
+
+def test_append_scan_reuses_dictionaries(source_tree, scanned, tmp_path):
+    db = str(tmp_path / 'report.sqlite')
+    export_sqlite(scanned, db, source_tree, include_advice=True)
+    languages = _query(db, "SELECT id, name FROM languages ORDER BY id")
+    directories = _query(db, "SELECT id, path FROM directories ORDER BY id")
+    smell_types = _query(db, "SELECT id, key FROM smell_types ORDER BY id")
+
+    export_sqlite(scanned, db, source_tree, include_advice=True)
+    assert _query(db, "SELECT COUNT(*) FROM scans") == [(2,)]
+    assert _query(db, "SELECT scan_id, COUNT(*) FROM files GROUP BY scan_id") == [(1, len(scanned)), (2, len(scanned))]
+    assert _query(db, "SELECT id, name FROM languages ORDER BY id") == languages
+    assert _query(db, "SELECT id, path FROM directories ORDER BY id") == directories
+    assert _query(db, "SELECT id, key FROM smell_types ORDER BY id") == smell_types
+    assert len(_query(db, "SELECT * FROM latest_files")) == len(scanned)
+
+
+def test_failed_export_keeps_earlier_scan(source_tree, scanned, tmp_path, monkeypatch):
+    db = str(tmp_path / 'report.sqlite')
+    export_sqlite(scanned, db, source_tree)
+    before = _query(db, "SELECT * FROM files ORDER BY id")
+
+    def failing(*args):
+        raise RuntimeError('advice failed')
+
+    monkeypatch.setattr(sqlite_export, '_advice_rows', failing)
+    with pytest.raises(RuntimeError):
+        export_sqlite(scanned, db, source_tree, include_advice=True)
+
+    assert _query(db, "SELECT COUNT(*) FROM scans") == [(1,)]
+    assert _query(db, "SELECT * FROM files ORDER BY id") == before
+    assert _query(db, "PRAGMA integrity_check") == [('ok',)]
+    assert _query(db, "PRAGMA journal_mode") == [('delete',)]